@@ -2,9 +2,10 @@
 IMDb Top 250 Scraper - Pacote Principal
 """
 
-from .classes import TV, Movie, Series
-from .scraping import carregar_config, baixar_html, extrair_titulos, extrair_filmes_completos
+from .classes import TV, Movie, Series, CatalogoColunar
+from .catalog import Catalog, normalizar_titulo
+from .scraping import ChartPage, carregar_config, baixar_html, extrair_titulos, extrair_filmes_completos
 from .database import DatabaseManager
-from .analysis import analise_completa
+from .analysis import analise_completa, exportar_banco
 
 __version__ = "1.0.0"
@@ -4,14 +4,40 @@ Exercicios 7, 8, 9 e 10: Leitura do banco, analise e exportacao.
 """
 
 import pandas as pd
-from sqlalchemy import create_engine
-from typing import Tuple
+from sqlalchemy import bindparam, text
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+import gzip
 import os
+import queue
+import shutil
+import threading
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    from .database import obter_engine, montar_consulta_filmes, LIMIARES_NOTA, ROTULO_ABAIXO, SEM_CLASSIFICACAO
+    from .instrumentation import Span, span
+except ImportError:
+    from database import obter_engine, montar_consulta_filmes, LIMIARES_NOTA, ROTULO_ABAIXO, SEM_CLASSIFICACAO
+    from instrumentation import Span, span
 
 
 def criar_conexao(db_path: str = "data/imdb.db"):
     try:
-        engine = create_engine(f'sqlite:///{db_path}')
+        engine = obter_engine(db_path)
         return engine
     except Exception as e:
         print(f"Erro ao criar conexao: {e}")
@@ -27,6 +53,52 @@ def carregar_filmes(engine) -> pd.DataFrame:
         return pd.DataFrame()
 
 
+def carregar_filmes_filtrados(engine, ano_min: int = None, ano_max: int = None, nota_minima: float = None,
+                              nota_maior_que: float = None, ordenar_por: str = 'rating',
+                              decrescente: bool = True, limite: int = None, offset: int = 0) -> pd.DataFrame:
+    consulta = montar_consulta_filmes(ano_min, ano_max, nota_minima, nota_maior_que,
+                                      ordenar_por, decrescente, limite, offset)
+    try:
+        return pd.read_sql_query(consulta, engine)
+    except Exception as e:
+        print(f"Erro ao carregar filmes filtrados: {e}")
+        return pd.DataFrame()
+
+
+# Tipos compactos para leitura em chunks; year e nullable (filmes sem ano ficam <NA>)
+# read_sql_query nao conhece o tipo Boolean do modelo: sem isso em_chart vira 0/1
+DTYPES_BASE = {'em_chart': 'bool'}
+DTYPES_FILMES = {**DTYPES_BASE, 'year': 'Int16', 'rating': 'float32', 'title': 'category'}
+DTYPES_SERIES = {**DTYPES_BASE, 'year': 'Int16', 'seasons': 'Int16', 'episodes': 'Int32', 'title': 'category'}
+
+# Na exportacao em chunks os tipos precisam ser estaveis entre chunks (o schema Arrow e fixo)
+DTYPES_EXPORTACAO = {
+    'movies': {**DTYPES_BASE, 'year': 'Int16'},
+    'series': {**DTYPES_BASE, 'year': 'Int16', 'seasons': 'Int16', 'episodes': 'Int32'},
+}
+
+
+def iterar_tabela(engine, tabela: str, tamanho_chunk: int = 50000,
+                  dtypes: Dict[str, str] = None) -> Iterator[pd.DataFrame]:
+    if tabela not in ('movies', 'series'):
+        raise ValueError(f"Tabela invalida: '{tabela}'")
+    
+    # stream_results usa um cursor do lado do servidor: so um chunk fica em memoria por vez
+    with engine.connect().execution_options(stream_results=True) as conn:
+        for chunk in pd.read_sql_query(f"SELECT * FROM {tabela} ORDER BY id", conn,
+                                       chunksize=tamanho_chunk, dtype=dtypes):
+            if not chunk.empty:
+                yield chunk
+
+
+def iterar_filmes(engine, tamanho_chunk: int = 50000) -> Iterator[pd.DataFrame]:
+    return iterar_tabela(engine, 'movies', tamanho_chunk, DTYPES_FILMES)
+
+
+def iterar_series(engine, tamanho_chunk: int = 50000) -> Iterator[pd.DataFrame]:
+    return iterar_tabela(engine, 'series', tamanho_chunk, DTYPES_SERIES)
+
+
 def carregar_series(engine) -> pd.DataFrame:
     try:
         df = pd.read_sql_table('series', engine)
@@ -36,6 +108,61 @@ def carregar_series(engine) -> pd.DataFrame:
         return pd.DataFrame()
 
 
+def carregar_trajetorias(engine, titulos: List[str] = None, desde: datetime = None,
+                         ate: datetime = None) -> pd.DataFrame:
+    # engine do historico.db (database.caminho_historico). Filtros aplicados no SQL: com titulos,
+    # a busca usa o indice (title, year) de titulos e a chave (title_id, run_id) de rating_snapshots
+    consulta = (
+        "SELECT r.executado_em, s.run_id, t.title, t.year, s.rank, s.rating_x10 / 10.0 AS rating "
+        "FROM rating_snapshots s "
+        "JOIN scrape_runs r ON r.id = s.run_id "
+        "JOIN titulos t ON t.id = s.title_id"
+    )
+    filtros = []
+    params = {}
+    if titulos:
+        filtros.append("t.title IN :titulos")
+        params['titulos'] = list(titulos)
+    if desde is not None:
+        filtros.append("r.executado_em >= :desde")
+        params['desde'] = desde
+    if ate is not None:
+        filtros.append("r.executado_em <= :ate")
+        params['ate'] = ate
+    if filtros:
+        consulta += " WHERE " + " AND ".join(filtros)
+    consulta += " ORDER BY t.title, s.run_id"
+    
+    stmt = text(consulta)
+    if titulos:
+        stmt = stmt.bindparams(bindparam('titulos', expanding=True))
+    
+    try:
+        return pd.read_sql_query(stmt, engine, params=params, parse_dates=['executado_em'])
+    except Exception as e:
+        print(f"Erro ao carregar trajetorias: {e}")
+        return pd.DataFrame()
+
+
+def pivotar_trajetorias(df: pd.DataFrame, valor: str = 'rank') -> pd.DataFrame:
+    # Uma coluna por titulo, uma linha por execucao; execucoes sem o titulo ficam NaN
+    return df.pivot_table(index='executado_em', columns='title', values=valor, aggfunc='last')
+
+
+def calcular_variacao_rank(df: pd.DataFrame) -> pd.DataFrame:
+    if df.empty:
+        return pd.DataFrame(columns=['title', 'rank_inicial', 'rank_final', 'variacao'])
+    
+    agrupado = df.sort_values('run_id').groupby('title')['rank']
+    variacao = pd.DataFrame({
+        'rank_inicial': agrupado.first(),
+        'rank_final': agrupado.last()
+    })
+    # Positivo = subiu no ranking
+    variacao['variacao'] = variacao['rank_inicial'] - variacao['rank_final']
+    return variacao.reset_index().sort_values('variacao', ascending=False)
+
+
 def exibir_primeiras_linhas(df: pd.DataFrame, nome: str, n: int = 5) -> None:
     print(f"\n=== {nome} - Primeiras {n} linhas ===")
     print(df.head(n).to_string(index=False))
@@ -63,6 +190,68 @@ def exportar_csv(df: pd.DataFrame, caminho: str) -> bool:
         return False
 
 
+def _remover_caminho(caminho: str) -> None:
+    if os.path.isdir(caminho):
+        shutil.rmtree(caminho, ignore_errors=True)
+    elif os.path.exists(caminho):
+        os.remove(caminho)
+
+
+@contextmanager
+def _escrita_atomica(caminho: str) -> Iterator[str]:
+    # Escreve num temporario ao lado do destino e so troca no final: quem le nunca ve arquivo pela metade
+    diretorio = os.path.dirname(caminho)
+    if diretorio and not os.path.exists(diretorio):
+        os.makedirs(diretorio, exist_ok=True)
+    
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        yield temporario
+    except BaseException:
+        _remover_caminho(temporario)
+        raise
+    
+    # os.replace nao substitui diretorios (exportacao particionada): o antigo sai do caminho antes
+    antigo = None
+    if os.path.exists(caminho) and (os.path.isdir(caminho) or os.path.isdir(temporario)):
+        antigo = f"{temporario}.antigo"
+        os.replace(caminho, antigo)
+    os.replace(temporario, caminho)
+    if antigo:
+        _remover_caminho(antigo)
+
+
+COMPRESSOES_TEXTO = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+
+def _abrir_texto(caminho: str, compressao: str = None):
+    if compressao is None:
+        return open(caminho, 'w', encoding='utf-8', newline='')
+    if compressao == 'gzip':
+        return gzip.open(caminho, 'wt', encoding='utf-8', newline='', compresslevel=6)
+    if compressao == 'zstd':
+        if zstandard is None:
+            raise ImportError("zstandard nao instalado (pip install zstandard)")
+        return zstandard.open(caminho, 'wt', encoding='utf-8', newline='')
+    raise ValueError(f"Compressao invalida: '{compressao}'. Use uma de {list(COMPRESSOES_TEXTO)}")
+
+
+def _escrever_csv(chunks: Iterable[pd.DataFrame], caminho: str, compressao: str = None) -> None:
+    with _escrita_atomica(caminho) as temporario, _abrir_texto(temporario, compressao) as f:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(f, index=False, header=(i == 0))
+
+
+def exportar_csv_chunks(chunks: Iterable[pd.DataFrame], caminho: str, compressao: str = None) -> bool:
+    try:
+        _escrever_csv(chunks, caminho, compressao)
+        print(f"Arquivo CSV exportado: {caminho}")
+        return True
+    except Exception as e:
+        print(f"Erro ao exportar CSV '{caminho}': {e}")
+        return False
+
+
 def exportar_json(df: pd.DataFrame, caminho: str) -> bool:
     try:
         diretorio = os.path.dirname(caminho)
@@ -77,22 +266,250 @@ def exportar_json(df: pd.DataFrame, caminho: str) -> bool:
         return False
 
 
-def classificar_nota(nota: float) -> str:
+def _escrever_json(chunks: Iterable[pd.DataFrame], caminho: str, compressao: str = None) -> None:
+    # Array JSON montado chunk a chunk, sem materializar a tabela inteira
+    with _escrita_atomica(caminho) as temporario, _abrir_texto(temporario, compressao) as f:
+        f.write('[')
+        primeiro = True
+        for chunk in chunks:
+            registros = chunk.to_json(orient='records', indent=2, force_ascii=False)
+            corpo = registros.strip()[1:-1].strip()
+            if not corpo:
+                continue
+            f.write('\n  ' if primeiro else ',\n  ')
+            f.write(corpo)
+            primeiro = False
+        f.write('\n]' if not primeiro else ']')
+
+
+def exportar_json_chunks(chunks: Iterable[pd.DataFrame], caminho: str, compressao: str = None) -> bool:
+    try:
+        _escrever_json(chunks, caminho, compressao)
+        print(f"Arquivo JSON exportado: {caminho}")
+        return True
+    except Exception as e:
+        print(f"Erro ao exportar JSON '{caminho}': {e}")
+        return False
+
+
+def _lotes_arrow(dados: Union[pd.DataFrame, Iterable[pd.DataFrame]]):
+    chunks = iter([dados] if isinstance(dados, pd.DataFrame) else dados)
+    primeiro = next(chunks, None)
+    if primeiro is None:
+        return None, iter(())
+    
+    primeiro_lote = pa.RecordBatch.from_pandas(primeiro, preserve_index=False)
+    schema = primeiro_lote.schema
+    
+    def lotes():
+        yield primeiro_lote
+        for chunk in chunks:
+            yield pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False)
+    
+    return schema, lotes()
+
+
+def _exportar_arrow(dados: Union[pd.DataFrame, Iterable[pd.DataFrame]], caminho: str, formato: str,
+                    compressao: str = None, particionar_por_ano: bool = False) -> None:
+    if pa is None:
+        raise ImportError("pyarrow nao instalado (pip install pyarrow)")
+    
+    schema, lotes = _lotes_arrow(dados)
+    if schema is None:
+        return
+    
+    with _escrita_atomica(caminho) as temporario:
+        if particionar_por_ano:
+            # Layout hive (caminho/year=1994/part-0.parquet): leitores filtram pelo ano sem abrir os demais arquivos
+            formato_ds = ds.ParquetFileFormat() if formato == 'parquet' else ds.IpcFileFormat()
+            # Sem os metadados do pandas: o year lido da particao vem como dictionary, nao como Int16
+            ds.write_dataset(lotes, temporario, schema=schema.remove_metadata(), format=formato_ds,
+                             file_options=formato_ds.make_write_options(compression=compressao),
+                             partitioning=['year'], partitioning_flavor='hive')
+        elif formato == 'parquet':
+            with pq.ParquetWriter(temporario, schema, compression=compressao or 'none') as writer:
+                for lote in lotes:
+                    writer.write_batch(lote)
+        else:
+            # Feather v2 = arquivo Arrow IPC: pode ser lido com memory map, sem parsing
+            opcoes = pa.ipc.IpcWriteOptions(compression=compressao)
+            with pa.OSFile(temporario, 'wb') as destino, pa.ipc.new_file(destino, schema, options=opcoes) as writer:
+                for lote in lotes:
+                    writer.write_batch(lote)
+
+
+def exportar_parquet(dados: Union[pd.DataFrame, Iterable[pd.DataFrame]], caminho: str,
+                     compressao: str = 'snappy', particionar_por_ano: bool = False) -> bool:
+    try:
+        _exportar_arrow(dados, caminho, 'parquet', compressao, particionar_por_ano)
+        print(f"Arquivo Parquet exportado: {caminho}")
+        return True
+    except Exception as e:
+        print(f"Erro ao exportar Parquet '{caminho}': {e}")
+        return False
+
+
+def exportar_feather(dados: Union[pd.DataFrame, Iterable[pd.DataFrame]], caminho: str,
+                     compressao: str = 'lz4', particionar_por_ano: bool = False) -> bool:
+    try:
+        _exportar_arrow(dados, caminho, 'feather', compressao, particionar_por_ano)
+        print(f"Arquivo Feather (Arrow IPC) exportado: {caminho}")
+        return True
+    except Exception as e:
+        print(f"Erro ao exportar Feather '{caminho}': {e}")
+        return False
+
+
+FORMATOS_EXPORTACAO = ('csv', 'json', 'parquet', 'feather')
+_ROTULOS_FORMATO = {'csv': 'CSV', 'json': 'JSON', 'parquet': 'Parquet', 'feather': 'Feather (Arrow IPC)'}
+
+
+_FIM_CHUNKS = object()
+
+
+def _distribuir_chunks(fonte: Callable, filas: List[queue.Queue]) -> None:
+    # Uma unica leitura do banco por tabela, repassada a todos os formatos (filas limitadas = memoria limitada)
+    fim = _FIM_CHUNKS
+    try:
+        dados = fonte()
+        for chunk in ([dados] if isinstance(dados, pd.DataFrame) else dados):
+            for fila in filas:
+                fila.put(chunk)
+    except Exception as e:
+        fim = e
+    for fila in filas:
+        fila.put(fim)
+
+
+def _consumir_fila(fila: queue.Queue) -> Iterator[pd.DataFrame]:
+    while True:
+        item = fila.get()
+        if item is _FIM_CHUNKS:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def _contar_linhas(chunks: Iterable[pd.DataFrame], destino: Span) -> Iterator[pd.DataFrame]:
+    for chunk in chunks:
+        destino.registrar(linhas=len(chunk))
+        yield chunk
+
+
+def _exportar_formato(formato: str, chunks: Iterator[pd.DataFrame], caminho: str, opcoes: Dict,
+                      pai: Span = None) -> Optional[str]:
+    # Roda numa thread de escrita: nao imprime nada, devolve None ou a mensagem de erro para
+    # exportar_tabelas exibir na thread chamadora (sem linhas intercaladas). O span pai vem explicito
+    particionar = opcoes.get("particionar_por_ano", False)
+    try:
+        with span(os.path.basename(caminho), pai=pai, formato=formato) as etapa:
+            dados = _contar_linhas(chunks, etapa)
+            if formato == 'csv':
+                _escrever_csv(dados, caminho, opcoes.get("compressao_texto"))
+            elif formato == 'json':
+                _escrever_json(dados, caminho, opcoes.get("compressao_texto"))
+            elif formato == 'parquet':
+                _exportar_arrow(dados, caminho, formato, opcoes.get("compressao_parquet", 'snappy'), particionar)
+            else:
+                _exportar_arrow(dados, caminho, formato, opcoes.get("compressao_feather", 'lz4'), particionar)
+        return None
+    except Exception as e:
+        return str(e)
+    finally:
+        # Se o escritor parou no meio, continua esvaziando a fila para o leitor nao travar
+        for _ in chunks:
+            pass
+
+
+def _exportar_tabela(fonte: Callable, destinos: Dict[str, str], opcoes: Dict,
+                     pai: Span = None) -> Dict[str, Optional[str]]:
+    filas = {caminho: queue.Queue(maxsize=2) for caminho in destinos}
+    with ThreadPoolExecutor(max_workers=len(destinos)) as escritores:
+        futuros = {caminho: escritores.submit(_exportar_formato, formato, _consumir_fila(filas[caminho]),
+                                              caminho, opcoes, pai)
+                   for caminho, formato in destinos.items()}
+        _distribuir_chunks(fonte, list(filas.values()))
+        return {caminho: futuro.result() for caminho, futuro in futuros.items()}
+
+
+def exportar_tabelas(fontes: Dict[str, Callable[[], Union[pd.DataFrame, Iterable[pd.DataFrame]]]],
+                     output_dir: str, opcoes: Dict = None) -> Dict[str, bool]:
+    # fontes: nome da tabela -> funcao que devolve o DataFrame ou um iterador de chunks.
+    # Ate `workers` tabelas em paralelo; em cada uma, um escritor por formato consome a mesma leitura
+    opcoes = opcoes or {}
+    formatos = opcoes.get("formatos", ['csv', 'json'])
+    sufixo_texto = COMPRESSOES_TEXTO.get(opcoes.get("compressao_texto"), '')
+    
+    destinos = {}
+    for formato in formatos:
+        if formato not in FORMATOS_EXPORTACAO:
+            print(f"Formato de exportacao desconhecido: '{formato}'")
+            continue
+        sufixo = sufixo_texto if formato in ('csv', 'json') else ''
+        for tabela in fontes:
+            destinos.setdefault(tabela, {})[os.path.join(output_dir, f"{tabela}.{formato}{sufixo}")] = formato
+    
+    resultados = {}
+    with span("exportacao", formatos=list(formatos)) as etapa, \
+            ThreadPoolExecutor(max_workers=max(1, opcoes.get("workers", 4))) as executor:
+        futuros = {tabela: executor.submit(_exportar_tabela, fontes[tabela], destinos[tabela], opcoes, etapa)
+                   for tabela in destinos}
+        for tabela, futuro in futuros.items():
+            try:
+                erros = futuro.result()
+            except Exception as e:
+                print(f"Erro ao exportar tabela '{tabela}': {e}")
+                resultados.update({caminho: False for caminho in destinos[tabela]})
+                continue
+            for caminho, erro in erros.items():
+                rotulo = _ROTULOS_FORMATO[destinos[tabela][caminho]]
+                if erro is None:
+                    print(f"Arquivo {rotulo} exportado: {caminho}")
+                else:
+                    print(f"Erro ao exportar {rotulo} '{caminho}': {erro}")
+                resultados[caminho] = erro is None
+    return resultados
+
+
+def fontes_exportacao(engine, tamanho_chunk: int = 50000) -> Dict[str, Callable[[], Iterator[pd.DataFrame]]]:
+    # Um cursor por arquivo exportado, lendo o banco em chunks (sem DataFrame completo em memoria)
+    return {
+        tabela: (lambda t=tabela: iterar_tabela(engine, t, tamanho_chunk, DTYPES_EXPORTACAO[t]))
+        for tabela in ('movies', 'series')
+    }
+
+
+def classificar_nota(nota: float, limiares: Sequence[Tuple[float, str]] = LIMIARES_NOTA) -> str:
     if nota is None or pd.isna(nota):
-        return "Sem classificacao"
-    elif nota >= 9.0:
-        return "Obra-prima"
-    elif nota >= 8.0:
-        return "Excelente"
-    elif nota >= 7.0:
-        return "Bom"
-    else:
-        return "Mediano"
-
-
-def adicionar_coluna_categoria(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df['categoria'] = df['rating'].apply(classificar_nota)
+        return SEM_CLASSIFICACAO
+    # Da maior nota minima para a menor, qualquer que seja a ordem recebida (como em categorizar_notas)
+    for minimo, rotulo in sorted(limiares, key=lambda limiar: limiar[0], reverse=True):
+        if nota >= minimo:
+            return rotulo
+    return ROTULO_ABAIXO
+
+
+def categorizar_notas(notas: pd.Series, limiares: Sequence[Tuple[float, str]] = LIMIARES_NOTA) -> pd.Series:
+    # Mesmo resultado de classificar_nota linha a linha, mas com um unico pd.cut vetorizado
+    # Minimos empatados: classificar_nota fica com o primeiro rotulo listado, os outros nunca ocorrem
+    efetivos = {}
+    for minimo, rotulo in sorted(limiares, key=lambda limiar: limiar[0]):
+        efetivos.setdefault(minimo, rotulo)
+    bordas = [float('-inf')] + list(efetivos) + [float('inf')]
+    rotulos = [ROTULO_ABAIXO] + list(efetivos.values())
+    
+    # right=False: intervalos [minimo, proximo), igual ao ">=" de classificar_nota
+    categorias = pd.cut(pd.to_numeric(notas, errors='coerce'), bins=bordas, labels=rotulos, right=False, ordered=True)
+    categorias = categorias.cat.set_categories(_ordem_categorias(limiares), ordered=True)
+    return categorias.fillna(SEM_CLASSIFICACAO)
+
+
+def adicionar_coluna_categoria(df: pd.DataFrame, limiares: Sequence[Tuple[float, str]] = LIMIARES_NOTA,
+                               inplace: bool = False) -> pd.DataFrame:
+    if not inplace:
+        df = df.copy()
+    df['categoria'] = categorizar_notas(df['rating'], limiares)
     return df
 
 
@@ -118,16 +535,189 @@ def criar_resumo_categoria_ano(df: pd.DataFrame) -> pd.DataFrame:
     return resumo
 
 
-def analise_completa(db_path: str = "data/imdb.db", output_dir: str = "data/") -> Tuple[pd.DataFrame, pd.DataFrame]:
+def _ordem_categorias(limiares: Sequence[Tuple[float, str]] = LIMIARES_NOTA) -> List[str]:
+    return [SEM_CLASSIFICACAO, ROTULO_ABAIXO] + [rotulo for _, rotulo in sorted(limiares, key=lambda limiar: limiar[0])]
+
+
+def carregar_resumo_categoria_ano(engine) -> pd.DataFrame:
+    # Le a tabela resumo_ano_categoria (mantida por triggers): custo proporcional ao numero de anos
+    try:
+        contagens = pd.read_sql_query(
+            "SELECT year, categoria, total FROM resumo_ano_categoria WHERE total > 0", engine)
+    except Exception as e:
+        print(f"Erro ao carregar resumo por categoria e ano: {e}")
+        return pd.DataFrame()
+    if contagens.empty:
+        return pd.DataFrame()
+    
+    resumo = contagens.pivot(index='year', columns='categoria', values='total').fillna(0).astype('int64')
+    # Mesmo formato do crosstab de criar_resumo_categoria_ano: colunas na ordem das categorias e margens 'Total'
+    colunas = [c for c in _ordem_categorias() if c in resumo.columns]
+    resumo = resumo.sort_index().reindex(colunas, axis=1)
+    resumo.index.name = 'year'
+    resumo.columns.name = 'categoria'
+    resumo['Total'] = resumo.sum(axis=1)
+    resumo.loc['Total'] = resumo.sum(axis=0)
+    return resumo
+
+
+def carregar_resumo_notas_ano(engine) -> pd.DataFrame:
+    try:
+        return pd.read_sql_query(
+            "SELECT year, total, ROUND(soma_notas / NULLIF(n_notas, 0), 2) AS nota_media, "
+            "nota_min, nota_max FROM resumo_ano_nota ORDER BY year", engine)
+    except Exception as e:
+        print(f"Erro ao carregar resumo de notas por ano: {e}")
+        return pd.DataFrame()
+
+
+class AnaliseIncremental:
+    """Acumula os resultados dos Exercicios 8, 9 e 10 chunk a chunk, com memoria limitada."""
+    
+    def __init__(self, nota_minima: float = 9.0, top_n: int = 5, n_primeiras: int = 10):
+        self.nota_minima = nota_minima
+        self.top_n = top_n
+        self.n_primeiras = n_primeiras
+        self.total = 0
+        self.total_filtrados = 0
+        self.top = pd.DataFrame()
+        self.filtrados = pd.DataFrame()
+        self.primeiras = pd.DataFrame()
+        self.contagem_categorias = pd.Series(dtype='int64')
+        self._contagem_ano_categoria = None
+        self._ordem_categorias = []
+    
+    def _melhores(self, df: pd.DataFrame, n: int) -> pd.DataFrame:
+        # Mesmo desempate (id) da consulta ordenada no SQL
+        return df.sort_values(['rating', 'id'], ascending=[False, True]).head(n)
+    
+    def atualizar(self, chunk: pd.DataFrame) -> None:
+        # O chunk e descartado depois: pode receber a coluna sem copia
+        chunk = adicionar_coluna_categoria(chunk, inplace=True)
+        self.total += len(chunk)
+        
+        self.top = self._melhores(pd.concat([self.top, self._melhores(chunk, self.top_n)]), self.top_n)
+        
+        filtrado = chunk[chunk['rating'] > self.nota_minima]
+        self.total_filtrados += len(filtrado)
+        self.filtrados = self._melhores(pd.concat([self.filtrados, self._melhores(filtrado, self.top_n)]), self.top_n)
+        
+        if len(self.primeiras) < self.n_primeiras:
+            faltam = self.n_primeiras - len(self.primeiras)
+            self.primeiras = pd.concat([self.primeiras, chunk.head(faltam)], ignore_index=True)
+        
+        categoria = chunk['categoria']
+        self._ordem_categorias = list(categoria.cat.categories)
+        contagem = categoria.value_counts(sort=False)
+        self.contagem_categorias = self.contagem_categorias.add(contagem[contagem > 0], fill_value=0)
+        por_ano = chunk.groupby([chunk['year'], categoria], observed=True).size()
+        if self._contagem_ano_categoria is None:
+            self._contagem_ano_categoria = por_ano
+        else:
+            self._contagem_ano_categoria = self._contagem_ano_categoria.add(por_ano, fill_value=0)
+    
+    def resumo_categoria_ano(self) -> pd.DataFrame:
+        # Equivalente ao crosstab com margins de criar_resumo_categoria_ano
+        if self._contagem_ano_categoria is None or self._contagem_ano_categoria.empty:
+            return pd.DataFrame()
+        
+        resumo = self._contagem_ano_categoria.unstack(fill_value=0).astype('int64')
+        # Colunas na ordem da Categorical (Sem classificacao < Mediano < ... < Obra-prima), como no crosstab
+        colunas = [c for c in self._ordem_categorias if c in resumo.columns]
+        resumo = resumo.sort_index().reindex(colunas, axis=1)
+        resumo.index.name = 'year'
+        resumo.columns.name = 'categoria'
+        resumo['Total'] = resumo.sum(axis=1)
+        resumo.loc['Total'] = resumo.sum(axis=0)
+        return resumo
+
+
+def analisar_em_chunks(chunks: Iterable[pd.DataFrame], nota_minima: float = 9.0,
+                       top_n: int = 5) -> AnaliseIncremental:
+    analise = AnaliseIncremental(nota_minima, top_n)
+    for chunk in chunks:
+        analise.atualizar(chunk)
+    return analise
+
+
+def _analise_completa_em_chunks(engine, output_dir: str, tamanho_chunk: int,
+                                exportacao: Dict = None, exportar: bool = True) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    print(f"\n--- Exercicio 7: Carregando dados do banco (chunks de {tamanho_chunk} linhas) ---")
+    with span("carga", tamanho_chunk=tamanho_chunk):
+        primeiras_filmes = next(iterar_filmes(engine, tamanho_chunk), pd.DataFrame()).head(10)
+        primeiras_series = next(iterar_series(engine, tamanho_chunk), pd.DataFrame()).head(10)
+    exibir_primeiras_linhas(primeiras_filmes, "Filmes", 5)
+    exibir_primeiras_linhas(primeiras_series, "Series", 5)
+    
+    print("\n--- Exercicio 8: Analise e exportacao ---")
+    with span("analise_incremental", tamanho_chunk=tamanho_chunk) as etapa:
+        analise = analisar_em_chunks(_contar_linhas(iterar_filmes(engine, tamanho_chunk), etapa),
+                                     nota_minima=9.0, top_n=5)
+    
+    print("\nFilmes ordenados por nota (top 5):")
+    print(analise.top.drop(columns='categoria').to_string(index=False))
+    
+    print(f"\nFilmes com nota > 9.0: {analise.total_filtrados} encontrados")
+    if analise.total_filtrados > 0:
+        print(analise.filtrados.drop(columns='categoria').to_string(index=False))
+    
+    # Exportacao sem os dtypes compactos: float32 sairia com ruido de precisao no texto
+    if exportar:
+        exportar_tabelas(fontes_exportacao(engine, tamanho_chunk), output_dir, exportacao)
+    
+    print("\n--- Exercicio 9: Classificacao textual das notas ---")
+    exibir_titulo_rating_categoria(analise.primeiras, 10)
+    print("\nContagem por categoria:")
+    print(analise.contagem_categorias.astype('int64').to_string())
+    
+    print("\n--- Exercicio 10: Resumo de filmes por categoria e ano ---")
+    with span("resumo_categoria_ano") as etapa:
+        resumo = carregar_resumo_categoria_ano(engine)
+        etapa.registrar(origem='materializado')
+        if resumo.empty:
+            resumo = analise.resumo_categoria_ano()
+            etapa.registrar(origem='incremental')
+        etapa.registrar(linhas=len(resumo))
+    print("\nResumo de filmes por categoria e ano de lancamento:")
+    print(resumo.to_string())
+    
+    return analise.primeiras, primeiras_series
+
+
+def exportar_banco(db_path: str = "data/imdb.db", output_dir: str = "data/",
+                   exportacao: Dict = None) -> Dict[str, bool]:
+    # Exportacao sem a analise (etapa export do main.py): le o banco em chunks direto para os arquivos
+    try:
+        engine = criar_conexao(db_path)
+    except Exception as e:
+        print(f"Erro ao acessar o banco: {e}")
+        return {}
+    return exportar_tabelas(fontes_exportacao(engine, (exportacao or {}).get("tamanho_chunk", 50000)),
+                            output_dir, exportacao)
+
+
+def analise_completa(db_path: str = "data/imdb.db", output_dir: str = "data/", tamanho_chunk: int = None,
+                     exportacao: Dict = None, exportar: bool = True) -> Tuple[pd.DataFrame, pd.DataFrame]:
     print("\n" + "="*60)
     print("ANALISE DE DADOS - IMDb Top 250")
     print("="*60)
     
+    if tamanho_chunk:
+        # Tabelas grandes: nada e materializado por inteiro; retorna so as primeiras linhas
+        try:
+            engine = criar_conexao(db_path)
+            return _analise_completa_em_chunks(engine, output_dir, tamanho_chunk, exportacao, exportar)
+        except Exception as e:
+            print(f"Erro ao acessar o banco: {e}")
+            return pd.DataFrame(), pd.DataFrame()
+    
     print("\n--- Exercicio 7: Carregando dados do banco ---")
     try:
         engine = criar_conexao(db_path)
-        df_filmes = carregar_filmes(engine)
-        df_series = carregar_series(engine)
+        with span("carga") as etapa:
+            df_filmes = carregar_filmes(engine)
+            df_series = carregar_series(engine)
+            etapa.registrar(linhas=len(df_filmes) + len(df_series))
         
         exibir_primeiras_linhas(df_filmes, "Filmes", 5)
         exibir_primeiras_linhas(df_series, "Series", 5)
@@ -137,33 +727,37 @@ def analise_completa(db_path: str = "data/imdb.db", output_dir: str = "data/") -
     
     print("\n--- Exercicio 8: Analise e exportacao ---")
     
-    df_filmes_ordenado = ordenar_por_nota(df_filmes)
+    # Ordenacao e filtro executados no SQLite, com indice em movies.rating
+    with span("consultas") as etapa:
+        df_filmes_ordenado = carregar_filmes_filtrados(engine, ordenar_por='rating', limite=5)
+        df_filmes_filtrado = carregar_filmes_filtrados(engine, nota_maior_que=9.0)
+        etapa.registrar(linhas=len(df_filmes_ordenado) + len(df_filmes_filtrado))
     print("\nFilmes ordenados por nota (top 5):")
-    print(df_filmes_ordenado.head().to_string(index=False))
+    print(df_filmes_ordenado.to_string(index=False))
     
-    df_filmes_filtrado = filtrar_nota_maior_que(df_filmes_ordenado, 9.0)
     print(f"\nFilmes com nota > 9.0: {len(df_filmes_filtrado)} encontrados")
     if len(df_filmes_filtrado) > 0:
         print(df_filmes_filtrado.head().to_string(index=False))
     
-    try:
-        exportar_csv(df_filmes, os.path.join(output_dir, "movies.csv"))
-        exportar_csv(df_series, os.path.join(output_dir, "series.csv"))
-    except Exception as e:
-        print(f"Erro ao exportar CSV: {e}")
-    
-    try:
-        exportar_json(df_filmes, os.path.join(output_dir, "movies.json"))
-        exportar_json(df_series, os.path.join(output_dir, "series.json"))
-    except Exception as e:
-        print(f"Erro ao exportar JSON: {e}")
+    if exportar:
+        exportar_tabelas(fontes_exportacao(engine, (exportacao or {}).get("tamanho_chunk", 50000)),
+                         output_dir, exportacao)
     
     print("\n--- Exercicio 9: Classificacao textual das notas ---")
-    df_filmes = adicionar_coluna_categoria(df_filmes)
+    with span("categorizacao") as etapa:
+        df_filmes = adicionar_coluna_categoria(df_filmes)
+        etapa.registrar(linhas=len(df_filmes))
     exibir_titulo_rating_categoria(df_filmes, 10)
     
     print("\n--- Exercicio 10: Resumo de filmes por categoria e ano ---")
-    resumo = criar_resumo_categoria_ano(df_filmes)
+    # Resumo materializado no banco; recalculado em memoria se o banco ainda nao tiver a tabela
+    with span("resumo_categoria_ano") as etapa:
+        resumo = carregar_resumo_categoria_ano(engine)
+        etapa.registrar(origem='materializado')
+        if resumo.empty:
+            resumo = criar_resumo_categoria_ano(df_filmes)
+            etapa.registrar(origem='crosstab')
+        etapa.registrar(linhas=len(resumo))
     print("\nResumo de filmes por categoria e ano de lancamento:")
     print(resumo.to_string())
     
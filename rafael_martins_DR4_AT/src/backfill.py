@@ -0,0 +1,182 @@
+"""
+Modulo de Backfill de snapshots arquivados.
+Reextrai um diretorio de paginas salvas do IMDb Top 250 em paralelo (pool de processos),
+gravando no banco por um unico escritor, em ordem de data e com progresso retomavel.
+"""
+
+import argparse
+import fnmatch
+import gzip
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    from .scraping import ChartPage, carregar_config, extrair_filmes_completos
+    from .cache import hash_conteudo
+    from .database import DatabaseManager, configurar_sqlite, carregar_indice_anos, registrar_anos
+except ImportError:
+    from scraping import ChartPage, carregar_config, extrair_filmes_completos
+    from cache import hash_conteudo
+    from database import DatabaseManager, configurar_sqlite, carregar_indice_anos, registrar_anos
+
+
+PADROES_SNAPSHOT = ('*.html', '*.htm', '*.html.gz')
+
+# Data e hora no nome do arquivo: imdb_top250_2024-03-01T13-00.html, 20240301_1300.html, 2024-03-01.html...
+_DATA_HORA_NOME = re.compile(r'(\d{4})-?(\d{2})-?(\d{2})(?:[T_ -]?(\d{2})[-:h]?(\d{2})(?:[-:]?(\d{2}))?)?')
+
+
+def timestamp_snapshot(caminho: str) -> datetime:
+    # Data no nome do arquivo; sem ela (ou se for invalida), a data de modificacao
+    for m in _DATA_HORA_NOME.finditer(os.path.basename(caminho)):
+        try:
+            return datetime(*(int(parte) for parte in m.groups() if parte is not None))
+        except ValueError:
+            continue
+    return datetime.fromtimestamp(os.path.getmtime(caminho))
+
+
+def listar_snapshots(diretorio: str, padroes=PADROES_SNAPSHOT) -> List[Tuple[datetime, str]]:
+    # (timestamp, caminho relativo ao diretorio), do mais antigo para o mais recente
+    snapshots = []
+    for raiz, _, arquivos in os.walk(diretorio):
+        for nome in arquivos:
+            if any(fnmatch.fnmatch(nome, padrao) for padrao in padroes):
+                caminho = os.path.join(raiz, nome)
+                snapshots.append((timestamp_snapshot(caminho), os.path.relpath(caminho, diretorio)))
+    snapshots.sort()
+    return snapshots
+
+
+def _ler_snapshot(caminho: str) -> str:
+    abrir = gzip.open if caminho.endswith('.gz') else open
+    with abrir(caminho, 'rt', encoding='utf-8') as f:
+        return f.read()
+
+
+def extrair_snapshot(caminho: str, n_filmes: int = 250, parser: str = "auto",
+                     indice_path: Optional[str] = None) -> Tuple[str, List[Dict]]:
+    # Executado no pool de processos: recebe o caminho (nao o HTML) para nao copiar MBs entre processos
+    html = _ler_snapshot(caminho)
+    indice_anos = carregar_indice_anos(indice_path) if indice_path else None
+    return hash_conteudo(html), extrair_filmes_completos(ChartPage(html, parser), n_filmes, indice_anos=indice_anos)
+
+
+def _resultados_em_ordem(executor: ProcessPoolExecutor, pendentes: List[Tuple[datetime, str]], diretorio: str,
+                         n_filmes: int, parser: str, indice_path: Optional[str],
+                         janela: int) -> Iterator[Tuple[datetime, str, object]]:
+    # Janela deslizante de tarefas: os workers ficam ocupados, os resultados saem na ordem dos
+    # timestamps (o escritor aplica o historico em ordem) e no maximo `janela` ficam em memoria
+    fila = deque()
+    proximos = iter(pendentes)
+    for timestamp, arquivo in proximos:
+        fila.append((timestamp, arquivo, executor.submit(
+            extrair_snapshot, os.path.join(diretorio, arquivo), n_filmes, parser, indice_path)))
+        if len(fila) >= janela:
+            break
+    while fila:
+        timestamp, arquivo, futuro = fila.popleft()
+        proximo = next(proximos, None)
+        if proximo is not None:
+            fila.append((proximo[0], proximo[1], executor.submit(
+                extrair_snapshot, os.path.join(diretorio, proximo[1]), n_filmes, parser, indice_path)))
+        yield timestamp, arquivo, futuro
+
+
+def executar_backfill(diretorio: str, db_path: str, lote: str = "backfill", workers: Optional[int] = None,
+                      n_filmes: int = 250, parser: str = "auto", indice_path: Optional[str] = None,
+                      reiniciar: bool = False, padroes=PADROES_SNAPSHOT) -> Dict[str, int]:
+    workers = workers or os.cpu_count() or 1
+    db = DatabaseManager(db_path)
+    db.conectar()
+
+    if reiniciar:
+        print(f"Progresso do lote '{lote}' descartado ({db.reiniciar_lote(lote)} arquivos).")
+
+    snapshots = listar_snapshots(diretorio, padroes)
+    feitos = db.arquivos_processados(lote)
+    pendentes = [(timestamp, arquivo) for timestamp, arquivo in snapshots if arquivo not in feitos]
+    print(f"Snapshots: {len(snapshots)} encontrados, {len(snapshots) - len(pendentes)} ja processados "
+          f"no lote '{lote}', {len(pendentes)} pendentes ({workers} processos)")
+
+    resultado = {'processados': 0, 'falhas': 0, 'vazios': 0,
+                 'ignorados': len(snapshots) - len(pendentes), 'filmes': 0}
+    if not pendentes:
+        return resultado
+
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        resultados = _resultados_em_ordem(executor, pendentes, diretorio, n_filmes, parser,
+                                          indice_path, janela=workers * 4)
+        # Este loop e o unico escritor: snapshot e marca de progresso, no historico.db
+        for timestamp, arquivo, futuro in resultados:
+            try:
+                hash_pagina, filmes = futuro.result()
+            except Exception as e:
+                print(f"  Erro ao extrair '{arquivo}': {e}")
+                resultado['falhas'] += 1
+                continue
+
+            if not filmes:
+                # Pagina sem ranking (captura quebrada, erro do site): fica registrada com 0 itens
+                print(f"  Nenhum filme em '{arquivo}'")
+                resultado['vazios'] += 1
+            # O snapshot guarda a nota da epoca; a tabela movies (nota atual) nao e tocada
+            if db.registrar_snapshot_arquivo(filmes, lote, arquivo, hash_pagina, timestamp) is None:
+                resultado['falhas'] += 1
+                continue
+            if indice_path:
+                registrar_anos(indice_path, filmes)
+
+            resultado['processados'] += 1
+            resultado['filmes'] += len(filmes)
+            if resultado['processados'] % 100 == 0:
+                decorrido = time.perf_counter() - inicio
+                print(f"  {resultado['processados']}/{len(pendentes)} snapshots "
+                      f"({resultado['processados'] / decorrido:.1f}/s, ultimo: {timestamp:%Y-%m-%d %H:%M})")
+
+    return resultado
+
+
+if __name__ == "__main__":
+    diretorio_src = os.path.dirname(os.path.abspath(__file__))
+    dir_dados = os.path.join(os.path.dirname(diretorio_src), "data")
+
+    argumentos = argparse.ArgumentParser(description="Reextrai um diretorio de snapshots HTML do IMDb Top 250")
+    argumentos.add_argument("diretorio", help="diretorio com os snapshots (*.html, *.html.gz), percorrido recursivamente")
+    argumentos.add_argument("--db", default=os.path.join(dir_dados, "imdb.db"),
+                            help="banco SQLite; o historico vai para o historico.db ao lado dele")
+    argumentos.add_argument("--indice-anos", default=os.path.join(dir_dados, "indice_anos.db"),
+                            help="indice titulo -> ano")
+    argumentos.add_argument("--lote", default="backfill",
+                            help="nome do lote; o progresso e retomado por lote")
+    argumentos.add_argument("--workers", type=int, default=None, help="processos de parsing (padrao: todos os nucleos)")
+    argumentos.add_argument("--reiniciar", action="store_true",
+                            help="descarta o progresso do lote e reextrai tudo (ex.: apos mudar a extracao)")
+    args = argumentos.parse_args()
+
+    config_path = os.path.join(os.path.dirname(diretorio_src), "config.json")
+    config = carregar_config(config_path) if os.path.exists(config_path) else {}
+    configurar_sqlite(config.get("sqlite"))
+
+    print("\n" + "="*60)
+    print("BACKFILL DE SNAPSHOTS")
+    print("="*60)
+
+    inicio = time.perf_counter()
+    try:
+        resultado = executar_backfill(args.diretorio, args.db, args.lote, args.workers,
+                                      config.get("n_filmes", 250), config.get("parser", "auto"),
+                                      args.indice_anos, args.reiniciar)
+    except KeyboardInterrupt:
+        # Cada snapshot e gravado com a marca de progresso na mesma transacao: basta rodar de novo
+        print(f"\nInterrompido. Execute o mesmo comando para retomar o lote '{args.lote}'.")
+        raise SystemExit(130)
+    print(f"\nProcessados: {resultado['processados']} ({resultado['vazios']} sem filmes), falhas: {resultado['falhas']}, "
+          f"ja feitos: {resultado['ignorados']}, filmes: {resultado['filmes']} "
+          f"({time.perf_counter() - inicio:.1f}s)")
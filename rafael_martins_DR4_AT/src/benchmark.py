@@ -0,0 +1,339 @@
+"""
+Modulo de Benchmarks de desempenho.
+Mede tempo e pico de memoria dos caminhos de extracao do IMDb Top 250.
+"""
+
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterator, List, Sequence
+
+import numpy as np
+import pandas as pd
+from bs4 import BeautifulSoup
+
+try:
+    from .scraping import (ChartPage, PARSERS_SUPORTADOS, parser_disponivel, iterar_blocos_json_ld,
+                           itens_do_json_ld, extrair_titulos, extrair_filmes_completos, carregar_html_local)
+    from .scraping import _JSON_LD_INICIO
+    from .database import DatabaseManager
+    from .analysis import classificar_nota, categorizar_notas
+    from .classes import Movie, CatalogoColunar
+    from .catalog import Catalog
+    from .serialization import carregar_catalogo_binario, carregar_catalogo_json, salvar_cache_filmes, orjson
+    from .sinteticos import gerar_filmes_sinteticos
+except ImportError:
+    from scraping import (ChartPage, PARSERS_SUPORTADOS, parser_disponivel, iterar_blocos_json_ld,
+                          itens_do_json_ld, extrair_titulos, extrair_filmes_completos, carregar_html_local)
+    from scraping import _JSON_LD_INICIO
+    from database import DatabaseManager
+    from analysis import classificar_nota, categorizar_notas
+    from classes import Movie, CatalogoColunar
+    from catalog import Catalog
+    from serialization import carregar_catalogo_binario, carregar_catalogo_json, salvar_cache_filmes, orjson
+    from sinteticos import gerar_filmes_sinteticos
+
+
+def medir(nome: str, funcao: Callable, repeticoes: int = 5) -> Dict:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    try:
+        resultado = funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'nome': nome,
+        'tempo_min_ms': min(tempos) * 1000,
+        'tempo_medio_ms': sum(tempos) / len(tempos) * 1000,
+        'pico_memoria_kb': pico / 1024,
+        'itens': len(resultado) if resultado is not None else 0
+    }
+
+
+def _json_ld_via_dom(html: str) -> List[Dict]:
+    soup = BeautifulSoup(html, 'html.parser')
+    blocos = []
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            blocos.append(json.loads(script.string))
+        except (json.JSONDecodeError, TypeError):
+            continue
+    return itens_do_json_ld(blocos)
+
+
+def _json_ld_streaming_arquivo(caminho: str) -> List[Dict]:
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return itens_do_json_ld(iterar_blocos_json_ld(f))
+
+
+def benchmark_extracao(caminho_html: str = "imdb_top250.html", repeticoes: int = 5) -> List[Dict]:
+    html = carregar_html_local(caminho_html)
+
+    return [
+        medir("DOM (BeautifulSoup html.parser)", lambda: _json_ld_via_dom(html), repeticoes),
+        medir("JSON-LD (HTML em memoria)", lambda: itens_do_json_ld(iterar_blocos_json_ld(html)), repeticoes),
+        medir("JSON-LD (streaming do arquivo)", lambda: _json_ld_streaming_arquivo(caminho_html), repeticoes),
+    ]
+
+
+def _remover_json_ld(html: str) -> str:
+    # Forca o caminho DOM (li.ipc-metadata-list-summary-item) removendo os blocos ld+json
+    partes = []
+    pos = 0
+    for m in _JSON_LD_INICIO.finditer(html):
+        partes.append(html[pos:m.start()])
+        fim = html.find('</script>', m.end())
+        pos = fim + len('</script>') if fim != -1 else len(html)
+    partes.append(html[pos:])
+    return ''.join(partes)
+
+
+def verificar_paridade_backends(caminho_html: str = "imdb_top250.html") -> Dict[str, bool]:
+    html = carregar_html_local(caminho_html)
+    html_sem_json_ld = _remover_json_ld(html)
+    
+    referencia = None
+    resultados = {}
+    for nome in reversed(PARSERS_SUPORTADOS):
+        if not parser_disponivel(nome):
+            print(f"  {nome}: nao instalado")
+            continue
+        
+        saidas = []
+        for documento in (html, html_sem_json_ld):
+            chart = ChartPage(documento, nome)
+            saidas.append((chart.fonte, extrair_titulos(chart), extrair_filmes_completos(chart)))
+        
+        if referencia is None:
+            referencia = saidas
+        resultados[nome] = saidas == referencia
+        print(f"  {nome}: {'OK' if resultados[nome] else 'DIVERGENTE'} "
+              f"({len(saidas[0][2])} filmes via json-ld, {len(saidas[1][2])} via DOM)")
+    
+    return resultados
+
+
+def _inserir_linha_a_linha(db: DatabaseManager, filmes: Iterator[Dict]) -> int:
+    inseridos = 0
+    for filme in filmes:
+        if db.inserir_filme(filme['titulo'], filme['ano'], filme['nota']):
+            inseridos += 1
+    return inseridos
+
+
+def benchmark_insercao(tamanhos: Sequence[int] = (250, 10_000, 1_000_000),
+                       limite_linha_a_linha: int = 10_000) -> List[Dict]:
+    resultados = []
+    for n in tamanhos:
+        metodos = [("bulk (executemany + ON CONFLICT)", lambda db: db.inserir_filmes_bulk(gerar_filmes_sinteticos(n)))]
+        if n <= limite_linha_a_linha:
+            # Uma transacao (e um fsync) por linha: inviavel acima de alguns milhares
+            metodos.insert(0, ("linha a linha (inserir_filme)", lambda db: _inserir_linha_a_linha(db, gerar_filmes_sinteticos(n))))
+        
+        for nome, inserir in metodos:
+            with tempfile.TemporaryDirectory() as tmp:
+                db = DatabaseManager(os.path.join(tmp, "bench.db"))
+                db.conectar()
+                inicio = time.perf_counter()
+                inserir(db)
+                duracao = time.perf_counter() - inicio
+                db.fechar()
+            resultados.append({
+                'nome': f"{nome} [{n}]",
+                'linhas': n,
+                'tempo_s': duracao,
+                'linhas_por_s': n / duracao if duracao else float('inf')
+            })
+    return resultados
+
+
+def benchmark_categorizacao(n: int = 1_000_000, repeticoes: int = 3) -> List[Dict]:
+    gerador = np.random.default_rng(42)
+    notas = pd.Series(np.round(gerador.uniform(1.0, 10.0, n), 1))
+    # Inclui notas ausentes e os limiares exatos para cobrir os casos de borda
+    notas[::97] = np.nan
+    notas[1::101] = 9.0
+    notas[2::103] = 7.0
+    
+    por_linha = notas.apply(classificar_nota)
+    vetorizado = categorizar_notas(notas)
+    if not (vetorizado.astype(str) == por_linha).all():
+        raise AssertionError("categorizar_notas diverge de classificar_nota")
+    
+    resultados = []
+    for nome, funcao in (("apply(classificar_nota)", lambda: notas.apply(classificar_nota)),
+                         ("categorizar_notas (pd.cut)", lambda: categorizar_notas(notas))):
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append(time.perf_counter() - inicio)
+        resultados.append({'nome': f"{nome} [{n}]", 'linhas': n, 'tempo_s': min(tempos),
+                           'linhas_por_s': n / min(tempos)})
+    return resultados
+
+
+class _MovieComDict:
+    # Replica das classes antes de __slots__, so para comparacao
+    def __init__(self, title: str, year: int, rating: float):
+        self.title = title
+        self.year = year
+        self.rating = rating
+
+
+def _construir_lista_com_dict(n: int) -> list:
+    return [_MovieComDict(f['titulo'], f['ano'], f['nota']) for f in gerar_filmes_sinteticos(n)]
+
+
+def _construir_lista_com_slots(n: int) -> list:
+    return [Movie(f['titulo'], f['ano'], f['nota']) for f in gerar_filmes_sinteticos(n)]
+
+
+def _construir_catalogo_colunar(n: int) -> CatalogoColunar:
+    catalogo = CatalogoColunar()
+    for f in gerar_filmes_sinteticos(n):
+        catalogo.adicionar_filme(f['titulo'], f['ano'], f['nota'])
+    return catalogo
+
+
+def benchmark_catalogo(n: int = 1_000_000) -> List[Dict]:
+    # Memoria retida pela estrutura inteira, titulos incluidos (tracemalloc apos a construcao):
+    # as listas guardam um str por item, o CatalogoColunar so os bytes UTF-8 num buffer
+    resultados = []
+    for nome, construir in (("lista de objetos com __dict__", _construir_lista_com_dict),
+                            ("lista de Movie com __slots__", _construir_lista_com_slots),
+                            ("CatalogoColunar (arrays)", _construir_catalogo_colunar)):
+        tracemalloc.start()
+        try:
+            inicio = time.perf_counter()
+            estrutura = construir(n)
+            duracao = time.perf_counter() - inicio
+            atual, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        resultados.append({
+            'nome': f"{nome} [{n}]",
+            'memoria_kb': atual / 1024,
+            'bytes_por_item': atual / n,
+            'tempo_s': duracao
+        })
+        del estrutura
+    return resultados
+
+
+def benchmark_consultas_catalogo(n: int = 250_000, consultas: int = 20) -> List[Dict]:
+    lista = _construir_lista_com_slots(n)
+    catalogo = Catalog(lista)
+    titulos = [lista[i].title.casefold() for i in range(0, n, max(1, n // consultas))]
+    
+    def busca_linear():
+        return [[m for m in lista if m.title.casefold() == t] for t in titulos]
+    
+    def faixa_linear():
+        return [[m for m in lista if 1994 <= m.year <= 1995 and m.rating >= 9.0] for _ in range(3)]
+    
+    def faixa_indexada():
+        return [catalogo.por_ano(1994, 1995, nota_min=9.0) for _ in range(3)]
+    
+    # A primeira consulta por faixa ordena o indice; fica fora da medicao, como num servico ja aquecido
+    catalogo.por_ano(0, 0)
+    
+    if [[m.title for m in r] for r in busca_linear()[:3]] != [[m.title for m in catalogo.buscar(t)] for t in titulos[:3]]:
+        raise AssertionError("Catalog.buscar diverge da busca linear")
+    if sorted(m.title for m in faixa_linear()[0]) != sorted(m.title for m in faixa_indexada()[0]):
+        raise AssertionError("Catalog.por_ano diverge da varredura")
+    
+    return [
+        medir(f"titulo: varredura [{len(titulos)} buscas]", busca_linear, 1),
+        medir(f"titulo: Catalog.buscar [{len(titulos)} buscas]", lambda: [catalogo.buscar(t) for t in titulos], 1),
+        medir("faixa de ano e nota: varredura [3x]", faixa_linear, 5),
+        medir("faixa de ano e nota: Catalog.por_ano [3x]", faixa_indexada, 5),
+    ]
+
+
+def _recarga_json_stdlib(caminho: str) -> list:
+    # Caminho antigo do Exercicio 1/2 + 5: json.load e um Movie por dicionario
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return [Movie(f['titulo'], f['ano'], f['nota']) for f in json.load(f)]
+
+
+def benchmark_cache_filmes(n: int = 300_000, repeticoes: int = 3) -> List[Dict]:
+    catalogo = Catalog.de_registros(gerar_filmes_sinteticos(n))
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho_indentado = os.path.join(tmp, "indentado.json")
+        with open(caminho_indentado, 'w', encoding='utf-8') as f:
+            json.dump(list(catalogo.registros()), f, ensure_ascii=False, indent=2)
+        caminho = os.path.join(tmp, "filmes_extraidos.json")
+        salvar_cache_filmes(catalogo, caminho)
+        caminho_bin = os.path.join(tmp, "filmes_extraidos.bin")
+        
+        if list(carregar_catalogo_binario(caminho_bin).registros()) != list(catalogo.registros()):
+            raise AssertionError("Cache binario diverge do catalogo original")
+        
+        tamanhos = {'indentado': os.path.getsize(caminho_indentado), 'json': os.path.getsize(caminho),
+                    'bin': os.path.getsize(caminho_bin)}
+        backend = 'orjson' if orjson is not None else 'json'
+        return [
+            dict(medir(f"json indent=2 + Movie [{tamanhos['indentado'] // 1024} KB]",
+                       lambda: _recarga_json_stdlib(caminho_indentado), repeticoes)),
+            dict(medir(f"{backend} -> Catalog [{tamanhos['json'] // 1024} KB]",
+                       lambda: carregar_catalogo_json(caminho), repeticoes)),
+            dict(medir(f"binario -> Catalog [{tamanhos['bin'] // 1024} KB]",
+                       lambda: carregar_catalogo_binario(caminho_bin), repeticoes)),
+        ]
+
+
+def exibir_resultados_catalogo(resultados: List[Dict]) -> None:
+    print(f"\n{'Estrutura':<48} {'memoria (MB)':>13} {'bytes/item':>11} {'tempo (s)':>10}")
+    print('-' * 85)
+    for r in resultados:
+        print(f"{r['nome']:<48} {r['memoria_kb'] / 1024:>13.1f} {r['bytes_por_item']:>11.1f} {r['tempo_s']:>10.2f}")
+
+
+def exibir_resultados_insercao(resultados: List[Dict]) -> None:
+    print(f"\n{'Metodo':<48} {'tempo (s)':>10} {'linhas/s':>12}")
+    print('-' * 72)
+    for r in resultados:
+        print(f"{r['nome']:<48} {r['tempo_s']:>10.3f} {r['linhas_por_s']:>12,.0f}")
+
+
+def exibir_resultados(resultados: List[Dict]) -> None:
+    print(f"\n{'Caminho':<36} {'min (ms)':>10} {'medio (ms)':>11} {'pico (KB)':>11} {'itens':>7}")
+    print('-' * 79)
+    for r in resultados:
+        print(f"{r['nome']:<36} {r['tempo_min_ms']:>10.2f} {r['tempo_medio_ms']:>11.2f} "
+              f"{r['pico_memoria_kb']:>11.1f} {r['itens']:>7}")
+
+
+if __name__ == "__main__":
+    print("=== Benchmark de Extracao ===")
+    exibir_resultados(benchmark_extracao("imdb_top250.html"))
+    
+    print("\n=== Paridade entre backends de parser ===")
+    paridade = verificar_paridade_backends("imdb_top250.html")
+    if not all(paridade.values()):
+        raise SystemExit(1)
+    
+    print("\n=== Categorizacao das notas ===")
+    exibir_resultados_insercao(benchmark_categorizacao())
+    
+    print("\n=== Memoria do catalogo ===")
+    exibir_resultados_catalogo(benchmark_catalogo())
+    
+    print("\n=== Consultas no catalogo (250k itens) ===")
+    exibir_resultados(benchmark_consultas_catalogo())
+    
+    print("\n=== Recarga do cache de filmes (300k registros) ===")
+    exibir_resultados(benchmark_cache_filmes())
+    
+    print("\n=== Insercao no banco ===")
+    exibir_resultados_insercao(benchmark_insercao())
@@ -0,0 +1,341 @@
+"""
+Modulo de Benchmarks em escala.
+Mede os caminhos quentes (extracao, carga no banco, analise e exportacao) sobre dados sinteticos
+de 10k a 10M linhas e compara cada execucao com uma baseline gravada em JSON.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .scraping import extrair_titulos, extrair_filmes_completos, selecionar_parser
+    from .database import DatabaseManager, descartar_engine
+    from .analysis import (criar_conexao, carregar_filmes, fontes_exportacao, adicionar_coluna_categoria,
+                           criar_resumo_categoria_ano, exportar_csv_chunks, exportar_json_chunks,
+                           exportar_parquet, exportar_feather, pa)
+    from .serialization import salvar_cache_filmes, carregar_cache_filmes
+    from .sinteticos import gerar_filmes_sinteticos, gerar_html_chart, gerar_catalogo, popular_banco
+except ImportError:
+    from scraping import extrair_titulos, extrair_filmes_completos, selecionar_parser
+    from database import DatabaseManager, descartar_engine
+    from analysis import (criar_conexao, carregar_filmes, fontes_exportacao, adicionar_coluna_categoria,
+                          criar_resumo_categoria_ano, exportar_csv_chunks, exportar_json_chunks,
+                          exportar_parquet, exportar_feather, pa)
+    from serialization import salvar_cache_filmes, carregar_cache_filmes
+    from sinteticos import gerar_filmes_sinteticos, gerar_html_chart, gerar_catalogo, popular_banco
+
+
+TAMANHOS_PADRAO = (10_000, 100_000, 1_000_000)
+# Acima disto o HTML sintetico passa de centenas de MB e a lista de dicts nao cabe com folga na memoria
+LIMITE_HTML = 100_000
+LIMITE_LISTA = 1_000_000
+# Variacao tolerada em relacao a baseline antes de marcar regressao (ou melhora)
+TOLERANCIA_PADRAO = 0.15
+# Diferencas menores que isto sao ruido do agendador, mesmo que a razao passe da tolerancia
+DIFERENCA_MINIMA_S = 0.01
+
+
+class ContextoEscala:
+    # Dados sinteticos de um tamanho: gerados no primeiro uso e compartilhados pelos casos
+    # (a pagina, a lista e o banco populado nao entram no tempo medido)
+
+    def __init__(self, n: int, diretorio: str, parser: str = "auto"):
+        self.n = n
+        self.diretorio = diretorio
+        self.parser = parser
+        self._dados: Dict[str, object] = {}
+
+    def _obter(self, chave: str, gerar: Callable):
+        if chave not in self._dados:
+            self._dados[chave] = gerar()
+        return self._dados[chave]
+
+    @property
+    def html(self) -> str:
+        return self._obter('html', lambda: gerar_html_chart(self.n))
+
+    @property
+    def html_dom(self) -> str:
+        return self._obter('html_dom', lambda: gerar_html_chart(self.n, json_ld=False))
+
+    @property
+    def filmes(self) -> List[Dict]:
+        return self._obter('filmes', lambda: list(gerar_filmes_sinteticos(self.n)))
+
+    @property
+    def db_path(self) -> str:
+        def gerar():
+            caminho = os.path.join(self.diretorio, f"leitura_{self.n}.db")
+            popular_banco(caminho, self.n, self.n // 50)
+            return caminho
+        return self._obter('db_path', gerar)
+
+    @property
+    def engine(self):
+        return self._obter('engine', lambda: criar_conexao(self.db_path))
+
+    @property
+    def df(self):
+        return self._obter('df', lambda: carregar_filmes(self.engine))
+
+    @property
+    def cache_json(self) -> str:
+        def gerar():
+            caminho = os.path.join(self.diretorio, f"filmes_{self.n}.json")
+            salvar_cache_filmes(gerar_catalogo(self.n), caminho)
+            return caminho
+        return self._obter('cache_json', gerar)
+
+    def caminho_temporario(self, nome: str) -> str:
+        return os.path.join(self.diretorio, f"{self.n}_{nome}")
+
+    def liberar(self) -> None:
+        if 'db_path' in self._dados:
+            descartar_engine(self._dados['db_path'])
+        self._dados.clear()
+
+
+# Cada caso recebe o contexto e devolve (preparar, executar): preparar roda antes de cada repeticao,
+# fora do cronometro (gera os dados sinteticos no primeiro uso), e o que retorna vai para executar
+Caso = Callable[[ContextoEscala], Tuple[Callable, Callable]]
+
+
+def _banco_vazio(ctx: ContextoEscala) -> DatabaseManager:
+    caminho = ctx.caminho_temporario("insercao.db")
+    descartar_engine(caminho)
+    for sufixo in ('', '-wal', '-shm'):
+        if os.path.exists(caminho + sufixo):
+            os.remove(caminho + sufixo)
+    db = DatabaseManager(caminho)
+    db.conectar()
+    return db
+
+
+def _inserir_em_lote(args: Tuple[List[Dict], DatabaseManager]) -> None:
+    filmes, db = args
+    try:
+        db.inserir_filmes_em_lote(filmes)
+    finally:
+        db.fechar()
+
+
+def _inserir_streaming(ctx: ContextoEscala, db: DatabaseManager) -> None:
+    try:
+        db.inserir_filmes_bulk(gerar_filmes_sinteticos(ctx.n))
+    finally:
+        db.fechar()
+
+
+def _exportar(ctx: ContextoEscala, exportador: Callable, nome: str) -> Tuple[Callable, Callable]:
+    # Mesmo caminho do analysis.exportar_tabelas: blocos lidos do banco (tipos de exportacao) direto para o arquivo
+    caminho = ctx.caminho_temporario(nome)
+
+    def executar(engine):
+        if not exportador(fontes_exportacao(engine)['movies'](), caminho):
+            raise RuntimeError(f"Falha ao exportar '{caminho}'")
+    return lambda: ctx.engine, executar
+
+
+CASOS: Dict[str, Tuple[Caso, Optional[int]]] = {
+    # nome: (caso, maior tamanho suportado)
+    'scraping.extrair_titulos': (
+        lambda ctx: (lambda: ctx.html, lambda html: extrair_titulos(html, ctx.n, ctx.parser)), LIMITE_HTML),
+    'scraping.extrair_filmes_completos': (
+        lambda ctx: (lambda: ctx.html, lambda html: extrair_filmes_completos(html, ctx.n, ctx.parser)), LIMITE_HTML),
+    'scraping.extrair_filmes_completos[dom]': (
+        lambda ctx: (lambda: ctx.html_dom, lambda html: extrair_filmes_completos(html, ctx.n, ctx.parser)),
+        LIMITE_HTML),
+    'DatabaseManager.inserir_filmes_em_lote': (
+        lambda ctx: (lambda: (ctx.filmes, _banco_vazio(ctx)), _inserir_em_lote), LIMITE_LISTA),
+    'DatabaseManager.inserir_filmes_bulk[streaming]': (
+        lambda ctx: (lambda: _banco_vazio(ctx), lambda db: _inserir_streaming(ctx, db)), None),
+    'serialization.carregar_cache_filmes': (
+        lambda ctx: (lambda: ctx.cache_json, carregar_cache_filmes), None),
+    'analysis.carregar_filmes': (
+        lambda ctx: (lambda: ctx.engine, carregar_filmes), None),
+    'analysis.adicionar_coluna_categoria': (
+        lambda ctx: (lambda: ctx.df, adicionar_coluna_categoria), None),
+    'analysis.criar_resumo_categoria_ano': (
+        lambda ctx: (lambda: ctx.df, criar_resumo_categoria_ano), None),
+    'analysis.exportar_csv_chunks': (
+        lambda ctx: _exportar(ctx, exportar_csv_chunks, "movies.csv"), None),
+    'analysis.exportar_json_chunks': (
+        lambda ctx: _exportar(ctx, exportar_json_chunks, "movies.json"), None),
+    'analysis.exportar_parquet': (
+        lambda ctx: _exportar(ctx, exportar_parquet, "movies.parquet"), None),
+    'analysis.exportar_feather': (
+        lambda ctx: _exportar(ctx, exportar_feather, "movies.feather"), None),
+}
+
+if pa is None:
+    for _nome in ('analysis.exportar_parquet', 'analysis.exportar_feather'):
+        del CASOS[_nome]
+
+
+def cronometrar(preparar: Callable, executar: Callable, repeticoes: int) -> List[float]:
+    tempos = []
+    for _ in range(repeticoes):
+        # As funcoes medidas imprimem progresso; a saida fica fora do terminal
+        with contextlib.redirect_stdout(io.StringIO()):
+            argumento = preparar()
+            inicio = time.perf_counter()
+            executar(argumento)
+            tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def repeticoes_para(n: int, repeticoes: int) -> int:
+    # Tamanhos grandes ja levam segundos por execucao: uma medida basta
+    return repeticoes if n <= 100_000 else 1
+
+
+def executar_suite(tamanhos: Sequence[int] = TAMANHOS_PADRAO, casos: Sequence[str] = None,
+                   repeticoes: int = 3, parser: str = "auto") -> List[Dict]:
+    selecionados = list(casos or CASOS)
+    desconhecidos = [nome for nome in selecionados if nome not in CASOS]
+    if desconhecidos:
+        raise ValueError(f"Casos desconhecidos: {desconhecidos}. Disponiveis: {list(CASOS)}")
+
+    resultados = []
+    with tempfile.TemporaryDirectory(prefix="benchmark_escala_") as diretorio:
+        for n in tamanhos:
+            ctx = ContextoEscala(n, diretorio, parser)
+            try:
+                for nome in selecionados:
+                    caso, limite = CASOS[nome]
+                    if limite is not None and n > limite:
+                        print(f"  {nome} [{n:,}]: ignorado (limite {limite:,})")
+                        continue
+                    preparar, executar = caso(ctx)
+                    tempos = cronometrar(preparar, executar, repeticoes_para(n, repeticoes))
+                    resultado = {
+                        'caso': nome,
+                        'tamanho': n,
+                        'repeticoes': len(tempos),
+                        'tempo_min_s': min(tempos),
+                        'tempo_mediano_s': statistics.median(tempos),
+                        'linhas_por_s': n / min(tempos) if min(tempos) else None,
+                    }
+                    resultados.append(resultado)
+                    print(f"  {nome} [{n:,}]: {resultado['tempo_min_s']:.4f}s")
+            finally:
+                ctx.liberar()
+    return resultados
+
+
+def _chave(resultado: Dict) -> str:
+    return f"{resultado['caso']}[{resultado['tamanho']}]"
+
+
+def ambiente() -> Dict:
+    return {
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'processador': platform.processor() or platform.machine(),
+        'nucleos': os.cpu_count(),
+        'parser': selecionar_parser("auto"),
+    }
+
+
+def salvar_baseline(resultados: List[Dict], caminho: str) -> None:
+    # Uma entrada por caso e tamanho; uma baseline existente mantem os casos nao medidos agora
+    baseline = carregar_baseline(caminho) or {'resultados': {}}
+    baseline.update({'atualizado_em': datetime.now().isoformat(timespec='seconds'), 'ambiente': ambiente()})
+    baseline['resultados'].update({_chave(r): r for r in resultados})
+
+    diretorio = os.path.dirname(caminho)
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+    temporario = f"{caminho}.tmp-{os.getpid()}"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(temporario, caminho)
+
+
+def carregar_baseline(caminho: str) -> Optional[Dict]:
+    if not os.path.exists(caminho):
+        return None
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Erro ao carregar baseline '{caminho}': {e}")
+        return None
+
+
+def comparar_com_baseline(resultados: List[Dict], baseline: Dict, tolerancia: float = TOLERANCIA_PADRAO,
+                          diferenca_minima_s: float = DIFERENCA_MINIMA_S) -> List[Dict]:
+    # Compara o menor tempo (o menos sujeito a ruido): razao > 1 + tolerancia e regressao
+    referencias = (baseline or {}).get('resultados', {})
+    comparacoes = []
+    for resultado in resultados:
+        referencia = referencias.get(_chave(resultado))
+        comparacao = {'chave': _chave(resultado), 'tempo_s': resultado['tempo_min_s'],
+                      'baseline_s': None, 'razao': None, 'situacao': 'novo'}
+        if referencia and referencia.get('tempo_min_s'):
+            razao = resultado['tempo_min_s'] / referencia['tempo_min_s']
+            significativa = abs(resultado['tempo_min_s'] - referencia['tempo_min_s']) >= diferenca_minima_s
+            comparacao.update(baseline_s=referencia['tempo_min_s'], razao=razao,
+                              situacao='regressao' if significativa and razao > 1 + tolerancia
+                              else 'melhora' if significativa and razao < 1 - tolerancia else 'estavel')
+        comparacoes.append(comparacao)
+    return comparacoes
+
+
+def exibir_comparacao(comparacoes: List[Dict]) -> None:
+    print(f"\n{'Caso':<58} {'atual (s)':>10} {'baseline (s)':>13} {'razao':>7}  situacao")
+    print('-' * 100)
+    for c in comparacoes:
+        baseline = f"{c['baseline_s']:>13.4f}" if c['baseline_s'] is not None else f"{'-':>13}"
+        razao = f"{c['razao']:>7.2f}" if c['razao'] is not None else f"{'-':>7}"
+        print(f"{c['chave']:<58} {c['tempo_s']:>10.4f} {baseline} {razao}  {c['situacao']}")
+
+
+if __name__ == "__main__":
+    diretorio_src = os.path.dirname(os.path.abspath(__file__))
+    dir_dados = os.path.join(os.path.dirname(diretorio_src), "data")
+
+    argumentos = argparse.ArgumentParser(description="Benchmarks em escala com dados sinteticos")
+    argumentos.add_argument("--tamanhos", type=int, nargs="+", default=list(TAMANHOS_PADRAO),
+                            help="numero de linhas/itens por rodada (ex.: 10000 1000000 10000000)")
+    argumentos.add_argument("--casos", nargs="+", default=None, help=f"subconjunto dos casos: {', '.join(CASOS)}")
+    argumentos.add_argument("--repeticoes", type=int, default=3, help="repeticoes ate 100k linhas (acima: 1)")
+    argumentos.add_argument("--baseline", default=os.path.join(dir_dados, "benchmark_baseline.json"),
+                            help="arquivo JSON da baseline")
+    argumentos.add_argument("--salvar-baseline", action="store_true",
+                            help="grava os resultados desta execucao como nova baseline")
+    argumentos.add_argument("--saida", default=None, help="grava os resultados brutos desta execucao em JSON")
+    argumentos.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO,
+                            help="variacao aceita antes de marcar regressao (0.15 = 15%%)")
+    argumentos.add_argument("--parser", default="auto", help="backend de parsing HTML")
+    args = argumentos.parse_args()
+
+    print("=== Benchmarks em escala ===")
+    resultados = executar_suite(args.tamanhos, args.casos, args.repeticoes, args.parser)
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump({'executado_em': datetime.now().isoformat(timespec='seconds'), 'ambiente': ambiente(),
+                       'resultados': resultados}, f, ensure_ascii=False, indent=2)
+
+    baseline = carregar_baseline(args.baseline)
+    comparacoes = comparar_com_baseline(resultados, baseline, args.tolerancia)
+    exibir_comparacao(comparacoes)
+    if baseline and baseline.get('ambiente') != ambiente():
+        print("\nAviso: baseline gravada em outro ambiente; compare com cautela.")
+
+    if args.salvar_baseline:
+        salvar_baseline(resultados, args.baseline)
+        print(f"\nBaseline atualizada: {args.baseline}")
+    elif any(c['situacao'] == 'regressao' for c in comparacoes):
+        # Codigo de saida diferente de zero para uso em CI
+        raise SystemExit(1)
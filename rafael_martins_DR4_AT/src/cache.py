@@ -0,0 +1,253 @@
+"""
+Modulo de Cache HTTP em disco.
+Guarda as respostas por URL com ETag/Last-Modified e TTL, revalida com
+requisicoes condicionais e mantem os corpos comprimidos com descarte LRU por tamanho.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Optional
+
+import requests
+
+try:
+    from .scraping import HEADERS_PADRAO, carregar_html_local
+except ImportError:
+    from scraping import HEADERS_PADRAO, carregar_html_local
+
+
+class CacheHTTP:
+    def __init__(self, diretorio: str = "cache_http", ttl_segundos: float = 3600,
+                 tamanho_max_bytes: int = 200 * 1024 * 1024, timeout: float = 30):
+        self.diretorio = diretorio
+        self.ttl_segundos = ttl_segundos
+        self.tamanho_max_bytes = tamanho_max_bytes
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _chave(self, url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _caminhos(self, url: str):
+        chave = self._chave(url)
+        return (os.path.join(self.diretorio, f"{chave}.json"),
+                os.path.join(self.diretorio, f"{chave}.html.gz"))
+
+    def _ler_metadados(self, caminho_meta: str) -> Optional[Dict]:
+        try:
+            with open(caminho_meta, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            meta = None
+        if isinstance(meta, dict) and isinstance(meta.get('armazenado_em'), (int, float)):
+            return meta
+        # Metadados truncados ou de uma versao anterior: descarta a entrada, como um corpo corrompido
+        self._remover_entrada(caminho_meta)
+        return None
+
+    def _gravar_metadados(self, caminho_meta: str, meta: Dict) -> None:
+        temporario = f"{caminho_meta}.{threading.get_ident()}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(temporario, caminho_meta)
+
+    def _ler_corpo(self, caminho_corpo: str, meta: Dict) -> Optional[str]:
+        try:
+            with gzip.open(caminho_corpo, 'rb') as f:
+                return f.read().decode(meta.get('encoding') or 'utf-8', errors='replace')
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, zlib.error):
+            # Corpo truncado ou corrompido: descarta a entrada para que a pagina seja baixada de novo
+            self._remover_entrada(caminho_corpo[:-len('.html.gz')] + '.json')
+            return None
+
+    def _remover_entrada(self, caminho_meta: str) -> None:
+        for caminho in (caminho_meta, caminho_meta[:-len('.json')] + '.html.gz'):
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+
+    def _tocar(self, caminho_meta: str, meta: Dict, revalidado: bool = False) -> None:
+        meta['ultimo_acesso'] = time.time()
+        if revalidado:
+            meta['armazenado_em'] = meta['ultimo_acesso']
+        self._gravar_metadados(caminho_meta, meta)
+
+    def _encoding(self, response: requests.Response) -> str:
+        # Sem charset no Content-Type o requests assume ISO-8859-1; paginas HTML5 usam UTF-8
+        if 'charset' in response.headers.get('Content-Type', '').lower() and response.encoding:
+            return response.encoding
+        return 'utf-8'
+
+    def _armazenar(self, url: str, response: requests.Response) -> str:
+        caminho_meta, caminho_corpo = self._caminhos(url)
+        temporario = f"{caminho_corpo}.{threading.get_ident()}.tmp"
+        with gzip.open(temporario, 'wb', compresslevel=6) as f:
+            f.write(response.content)
+        os.replace(temporario, caminho_corpo)
+
+        encoding = self._encoding(response)
+        agora = time.time()
+        self._gravar_metadados(caminho_meta, {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'encoding': encoding,
+            'armazenado_em': agora,
+            'ultimo_acesso': agora,
+            'tamanho': os.path.getsize(caminho_corpo)
+        })
+        self.descartar_excedente()
+        return response.content.decode(encoding, errors='replace')
+
+    def _requisitar(self, url: str, headers: Dict[str, str]) -> requests.Response:
+        return requests.get(url, headers={**HEADERS_PADRAO, **headers}, timeout=self.timeout)
+
+    def obter(self, url: str,
+              requisitar: Callable[[str, Dict[str, str]], requests.Response] = None) -> str:
+        requisitar = requisitar or self._requisitar
+        caminho_meta, caminho_corpo = self._caminhos(url)
+        meta = self._ler_metadados(caminho_meta)
+        corpo = self._ler_corpo(caminho_corpo, meta) if meta else None
+
+        if corpo is not None and time.time() - meta['armazenado_em'] < self.ttl_segundos:
+            self._tocar(caminho_meta, meta)
+            return corpo
+
+        condicionais = {}
+        if corpo is not None:
+            if meta.get('etag'):
+                condicionais['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                condicionais['If-Modified-Since'] = meta['last_modified']
+
+        try:
+            response = requisitar(url, condicionais)
+            if response.status_code == 304 and corpo is not None:
+                self._tocar(caminho_meta, meta, revalidado=True)
+                return corpo
+            response.raise_for_status()
+        except requests.RequestException as e:
+            if corpo is not None:
+                print(f"Falha ao revalidar '{url}' ({e}). Usando copia em cache.")
+                return corpo
+            raise
+
+        return self._armazenar(url, response)
+
+    def tamanho_total(self) -> int:
+        return sum(meta.get('tamanho', 0) for _, meta in self._entradas())
+
+    def _entradas(self):
+        for nome in os.listdir(self.diretorio):
+            if nome.endswith('.json'):
+                caminho_meta = os.path.join(self.diretorio, nome)
+                meta = self._ler_metadados(caminho_meta)
+                if meta is not None:
+                    yield caminho_meta, meta
+
+    def descartar_excedente(self) -> int:
+        removidos = 0
+        with self._lock:
+            entradas = sorted(self._entradas(), key=lambda e: e[1].get('ultimo_acesso', 0))
+            total = sum(meta.get('tamanho', 0) for _, meta in entradas)
+            # Mantem sempre a entrada mais recente, mesmo que sozinha exceda o limite
+            while total > self.tamanho_max_bytes and len(entradas) > 1:
+                caminho_meta, meta = entradas.pop(0)
+                self._remover_entrada(caminho_meta)
+                total -= meta.get('tamanho', 0)
+                removidos += 1
+        return removidos
+
+
+def criar_cache(config: dict) -> CacheHTTP:
+    opcoes = config.get("cache", {})
+    return CacheHTTP(
+        diretorio=opcoes.get("diretorio", "cache_http"),
+        ttl_segundos=opcoes.get("ttl_segundos", 3600),
+        tamanho_max_bytes=int(opcoes.get("tamanho_max_mb", 200) * 1024 * 1024),
+        timeout=config.get("crawler", {}).get("timeout", 30)
+    )
+
+
+def obter_html(config: dict, html_local: str = "imdb_top250.html") -> str:
+    url = config.get("url", "https://www.imdb.com/chart/top/")
+    try:
+        print(f"\nObtendo pagina do IMDb (cache HTTP em '{config.get('cache', {}).get('diretorio', 'cache_http')}')...")
+        return criar_cache(config).obter(url)
+    except requests.RequestException as e:
+        # Sem rede e sem copia em cache: usar a pagina salva manualmente, se existir
+        if os.path.exists(html_local):
+            print(f"Erro ao baixar pagina: {e}")
+            print(f"Carregando HTML local de '{html_local}'...")
+            return carregar_html_local(html_local)
+        raise
+
+
+def hash_conteudo(html: str) -> str:
+    return hashlib.sha256(html.encode('utf-8')).hexdigest()
+
+
+def carregar_manifesto(caminho: str) -> Dict:
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def salvar_manifesto(caminho: str, manifesto: Dict) -> None:
+    temporario = f"{caminho}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho)
+
+
+def registrar_pagina(manifesto: Dict, url: str, hash_pagina: str, n_filmes: int, registros: str) -> None:
+    manifesto[url] = {
+        'hash': hash_pagina,
+        'n_filmes': n_filmes,
+        'registros': registros,
+        'atualizado_em': time.time()
+    }
+
+
+def pagina_inalterada(manifesto: Dict, url: str, hash_pagina: str, n_filmes: int, *arquivos: str) -> bool:
+    # So pula o processamento se os artefatos gerados na ultima execucao ainda existem
+    entrada = manifesto.get(url)
+    if not entrada or entrada.get('hash') != hash_pagina or entrada.get('n_filmes') != n_filmes:
+        return False
+    return all(os.path.exists(caminho) for caminho in (entrada.get('registros'), *arquivos) if caminho)
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    try:
+        from .crawler import servir_fixtures
+    except ImportError:
+        from crawler import servir_fixtures
+
+    print("=== Teste do Cache HTTP contra servidor local ===\n")
+
+    diretorio = os.path.dirname(os.path.abspath(__file__))
+    with servir_fixtures(diretorio) as base_url, tempfile.TemporaryDirectory() as tmp:
+        url = f"{base_url}/imdb_top250.html"
+        cache = CacheHTTP(tmp, ttl_segundos=0)
+
+        for rodada in ("primeira (download)", "segunda (revalidacao condicional)"):
+            inicio = time.perf_counter()
+            html = cache.obter(url)
+            print(f"Requisicao {rodada}: {len(html)} caracteres em {time.perf_counter() - inicio:.3f}s")
+
+        print(f"Tamanho em disco: {cache.tamanho_total() / 1024:.1f} KB")
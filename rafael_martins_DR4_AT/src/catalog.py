@@ -0,0 +1,171 @@
+"""
+Modulo do Catalogo indexado.
+Busca por titulo em O(1) e consultas por faixa de ano/nota via bisect, sem varrer os itens.
+"""
+
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import compress
+from operator import not_
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from .classes import TV, Movie, Series, CatalogoColunar, _AUSENTE, _TIPO_FILME, _TIPO_SERIE
+except ImportError:
+    from classes import TV, Movie, Series, CatalogoColunar, _AUSENTE, _TIPO_FILME, _TIPO_SERIE
+
+
+_ESPACOS = re.compile(r"\s+")
+
+
+def normalizar_titulo(titulo: str) -> str:
+    # "  Amélie " e "amelie" caem na mesma chave: sem acentos, casefold e espacos colapsados
+    sem_acentos = ''.join(c for c in unicodedata.normalize('NFKD', titulo) if not unicodedata.combining(c))
+    return _ESPACOS.sub(' ', sem_acentos).strip().casefold()
+
+
+def _indice_ordenado(chaves: array, posicoes: Iterable[int]) -> Tuple[array, array]:
+    # Pares (chave, posicao) ordenados por chave; itens sem valor ficam fora do indice
+    pares = sorted((chaves[i], i) for i in posicoes if chaves[i] != _AUSENTE)
+    return array('h', (c for c, _ in pares)), array('i', (i for _, i in pares))
+
+
+def _faixa(chaves: array, posicoes: array, minimo: Optional[int], maximo: Optional[int]) -> array:
+    inicio = 0 if minimo is None else bisect_left(chaves, minimo)
+    fim = len(chaves) if maximo is None else bisect_right(chaves, maximo)
+    return posicoes[inicio:fim]
+
+
+class Catalog(CatalogoColunar):
+    # Catalogo colunar com indices: hash por titulo normalizado, particoes Movie/Series e indices
+    # ordenados de ano e nota. Os ordenados sao reconstruidos sob demanda apos novas insercoes,
+    # entao carregar N itens custa uma ordenacao, nao N insercoes ordenadas. Depois de uma carga
+    # em bloco (_reindexar), hash de titulos e particoes tambem so sao montados no primeiro uso,
+    # para a leitura do cache binario continuar barata
+
+    def __init__(self, itens: Iterable[TV] = ()):
+        self._por_titulo: Optional[Dict[str, List[int]]] = None
+        self._pos_filmes: Optional[array] = array('i')
+        self._pos_series: Optional[array] = array('i')
+        self._indice_anos: Optional[Tuple[array, array]] = None
+        self._indice_notas: Optional[Tuple[array, array]] = None
+        super().__init__(itens)
+
+    def _indexar(self, tipo: int) -> None:
+        posicao = len(self) - 1
+        if self._por_titulo is not None:
+            self._por_titulo.setdefault(normalizar_titulo(self._titulos[posicao]), []).append(posicao)
+        if self._pos_filmes is not None:
+            (self._pos_series if tipo == _TIPO_SERIE else self._pos_filmes).append(posicao)
+        self._indice_anos = None
+        self._indice_notas = None
+
+    def _reindexar(self) -> None:
+        self._pos_filmes = None
+        self._pos_series = None
+        self._por_titulo = None
+        self._indice_anos = None
+        self._indice_notas = None
+
+    def _particoes(self) -> Tuple[array, array]:
+        if self._pos_filmes is None:
+            # compress/map ficam em C: particionar 1M itens nao passa por um loop Python
+            self._pos_filmes = array('i', compress(range(len(self)), map(not_, self._tipos)))
+            self._pos_series = array('i', compress(range(len(self)), self._tipos))
+        return self._pos_filmes, self._pos_series
+
+    def _titulos_normalizados(self) -> Dict[str, List[int]]:
+        if self._por_titulo is None:
+            self._por_titulo = {}
+            for i, titulo in enumerate(self._titulos):
+                self._por_titulo.setdefault(normalizar_titulo(titulo), []).append(i)
+        return self._por_titulo
+
+    def adicionar_filme(self, title: str, year: Optional[int], rating: Optional[float]) -> None:
+        super().adicionar_filme(title, year, rating)
+        self._indexar(_TIPO_FILME)
+
+    def adicionar_serie(self, title: str, year: Optional[int], seasons: Optional[int], episodes: Optional[int]) -> None:
+        super().adicionar_serie(title, year, seasons, episodes)
+        self._indexar(_TIPO_SERIE)
+
+    def _anos_ordenados(self) -> Tuple[array, array]:
+        if self._indice_anos is None:
+            self._indice_anos = _indice_ordenado(self._anos, range(len(self)))
+        return self._indice_anos
+
+    def _notas_ordenadas(self) -> Tuple[array, array]:
+        if self._indice_notas is None:
+            self._indice_notas = _indice_ordenado(self._notas_x10, self._particoes()[0])
+        return self._indice_notas
+
+    def buscar(self, titulo: str, ano: Optional[int] = None) -> List[TV]:
+        posicoes = self._titulos_normalizados().get(normalizar_titulo(titulo), ())
+        if ano is not None:
+            posicoes = [i for i in posicoes if self._anos[i] == ano]
+        return [self._item(i) for i in posicoes]
+
+    def __contains__(self, titulo: str) -> bool:
+        return normalizar_titulo(titulo) in self._titulos_normalizados()
+
+    def por_ano(self, ano_min: Optional[int] = None, ano_max: Optional[int] = None,
+                nota_min: Optional[float] = None, nota_max: Optional[float] = None) -> List[TV]:
+        # Limites inclusivos; None deixa a faixa aberta. Resultado em ordem crescente de ano.
+        # Com faixa de nota (so filmes), a nota e testada no array: so os aprovados viram objetos
+        chaves, posicoes = self._anos_ordenados()
+        posicoes = _faixa(chaves, posicoes, ano_min, ano_max)
+        if nota_min is not None or nota_max is not None:
+            notas = self._notas_x10
+            minimo = _AUSENTE + 1 if nota_min is None else round(nota_min * 10)
+            maximo = 32767 if nota_max is None else round(nota_max * 10)
+            posicoes = [i for i in posicoes if minimo <= notas[i] <= maximo]
+        return [self._item(i) for i in posicoes]
+
+    def por_nota(self, nota_min: Optional[float] = None, nota_max: Optional[float] = None) -> List[Movie]:
+        # So filmes tem nota; a comparacao usa a mesma escala x10 do armazenamento
+        chaves, posicoes = self._notas_ordenadas()
+        minimo = None if nota_min is None else round(nota_min * 10)
+        maximo = None if nota_max is None else round(nota_max * 10)
+        return [self._item(i) for i in _faixa(chaves, posicoes, minimo, maximo)]
+
+    def filmes(self) -> Iterator[Movie]:
+        for i in self._particoes()[0]:
+            yield self._item(i)
+
+    def series(self) -> Iterator[Series]:
+        for i in self._particoes()[1]:
+            yield self._item(i)
+
+    def contar_filmes(self) -> int:
+        return len(self._particoes()[0])
+
+    def contar_series(self) -> int:
+        return len(self._particoes()[1])
+
+    def __repr__(self) -> str:
+        return f"Catalog({self.contar_filmes()} filmes, {self.contar_series()} series)"
+
+
+if __name__ == "__main__":
+    print("=== Teste do Catalogo indexado ===\n")
+
+    catalogo = Catalog([
+        Movie("The Shawshank Redemption", 1994, 9.3),
+        Movie("Amélie", 2001, 8.3),
+        Movie("Pulp Fiction", 1994, 8.8),
+        Series("Breaking Bad", 2008, 5, 62)
+    ])
+    print(catalogo)
+
+    print(f"\nBusca 'amelie': {catalogo.buscar('amelie')}")
+    print(f"'PULP  fiction' no catalogo: {'PULP  fiction' in catalogo}")
+
+    print("\nItens de 1990 a 2005:")
+    for item in catalogo.por_ano(1990, 2005):
+        print(f"  {item}")
+
+    print("\nFilmes com nota >= 8.8:")
+    for item in catalogo.por_nota(8.8):
+        print(f"  {item}")
@@ -3,8 +3,14 @@ Modulo de Classes para representacao de midias de TV/Cinema.
 Exercicios 3 e 4: Classe base TV e classes especializadas Movie e Series.
 """
 
+from array import array
+from typing import Iterable, Iterator, Optional, Union
+
 
 class TV:
+    # __slots__: sem __dict__ por instancia, cada objeto ocupa so os ponteiros dos atributos
+    __slots__ = ('title', 'year')
+    
     def __init__(self, title: str, year: int):
         self.title = title
         self.year = year
@@ -17,6 +23,8 @@ class TV:
 
 
 class Movie(TV):
+    __slots__ = ('rating',)
+    
     def __init__(self, title: str, year: int, rating: float):
         super().__init__(title, year)
         self.rating = rating
@@ -29,6 +37,8 @@ class Movie(TV):
 
 
 class Series(TV):
+    __slots__ = ('seasons', 'episodes')
+    
     def __init__(self, title: str, year: int, seasons: int, episodes: int):
         super().__init__(title, year)
         self.seasons = seasons
@@ -41,6 +51,201 @@ class Series(TV):
         return f"Series(title='{self.title}', year={self.year}, seasons={self.seasons}, episodes={self.episodes})"
 
 
+
+_AUSENTE = -32768
+_TIPO_FILME = 0
+_TIPO_SERIE = 1
+
+
+def _para_array(valor: Optional[int]) -> int:
+    return _AUSENTE if valor is None else valor
+
+
+def _de_array(valor: int) -> Optional[int]:
+    return None if valor == _AUSENTE else valor
+
+
+def _nota_para_array(nota: Optional[float]) -> int:
+    # A coluna guarda a nota x10 num inteiro: uma segunda casa decimal seria arredondada em silencio
+    if nota is None:
+        return _AUSENTE
+    nota_x10 = round(nota * 10)
+    if abs(nota * 10 - nota_x10) > 1e-6:
+        raise ValueError(f"Nota com mais de uma casa decimal: {nota} (o catalogo guarda 0.1 de precisao)")
+    return nota_x10
+
+
+class _TitulosCompactos:
+    # Todos os titulos num unico buffer UTF-8 e o fim de cada um num array: ~1 byte por caractere
+    # + 8 por titulo, contra ~50 bytes de cabecalho de cada str + 8 do ponteiro numa lista.
+    # O str e decodificado no acesso, como os objetos Movie/Series
+    __slots__ = ('_dados', '_fins')
+    
+    def __init__(self, titulos: Iterable[str] = ()):
+        self._dados = bytearray()
+        self._fins = array('q')
+        for titulo in titulos:
+            self.append(titulo)
+    
+    @classmethod
+    def de_buffer(cls, dados: bytes, fins: array) -> '_TitulosCompactos':
+        titulos = cls()
+        titulos._dados = bytearray(dados)
+        titulos._fins = fins
+        return titulos
+    
+    def append(self, titulo: str) -> None:
+        self._dados += titulo.encode('utf-8')
+        self._fins.append(len(self._dados))
+    
+    def __len__(self) -> int:
+        return len(self._fins)
+    
+    def __getitem__(self, i: int) -> str:
+        if i < 0:
+            i += len(self._fins)
+        inicio = self._fins[i - 1] if i else 0
+        return self._dados[inicio:self._fins[i]].decode('utf-8')
+    
+    def __iter__(self) -> Iterator[str]:
+        dados = self._dados
+        inicio = 0
+        for fim in self._fins:
+            yield dados[inicio:fim].decode('utf-8')
+            inicio = fim
+
+
+class CatalogoColunar:
+    # Um array tipado por coluna em vez de um objeto por item: ano, temporadas e nota (x10, como em
+    # rating_snapshots) com 2 bytes, episodios com 4 e titulos num buffer UTF-8 unico (_TitulosCompactos).
+    # Movie/Series sao criados no acesso. As notas tem precisao de 0.1, como as do IMDb: uma nota com
+    # mais casas decimais levanta ValueError em vez de ser arredondada
+    
+    def __init__(self, itens: Iterable[TV] = ()):
+        self._tipos = array('b')
+        self._titulos = _TitulosCompactos()
+        self._anos = array('h')
+        self._notas_x10 = array('h')
+        self._temporadas = array('h')
+        self._episodios = array('i')
+        for item in itens:
+            self.adicionar(item)
+    
+    @classmethod
+    def de_registros(cls, registros: Iterable[dict]) -> 'CatalogoColunar':
+        # Registros do scraping ({'titulo', 'ano', 'nota'} ou as chaves em ingles), na ordem do ranking.
+        # Preenche as colunas num unico loop e troca de uma vez, sem uma chamada de metodo por filme
+        titulos = _TitulosCompactos()
+        anos = array('h')
+        notas_x10 = array('h')
+        for r in registros:
+            titulos.append(r.get('titulo', r.get('title', '')))
+            anos.append(_para_array(r.get('ano', r.get('year'))))
+            notas_x10.append(_nota_para_array(r.get('nota', r.get('rating'))))
+        
+        catalogo = cls()
+        n = len(titulos)
+        catalogo._tipos = array('b', [_TIPO_FILME]) * n
+        catalogo._titulos = titulos
+        catalogo._anos = anos
+        catalogo._notas_x10 = notas_x10
+        catalogo._temporadas = array('h', [_AUSENTE]) * n
+        catalogo._episodios = array('i', [_AUSENTE]) * n
+        catalogo._reindexar()
+        return catalogo
+    
+    def adicionar_filme(self, title: str, year: Optional[int], rating: Optional[float]) -> None:
+        # Valida a nota antes de tocar nas colunas, para nao deixa-las com tamanhos diferentes
+        nota_x10 = _nota_para_array(rating)
+        self._tipos.append(_TIPO_FILME)
+        self._titulos.append(title)
+        self._anos.append(_para_array(year))
+        self._notas_x10.append(nota_x10)
+        self._temporadas.append(_AUSENTE)
+        self._episodios.append(_AUSENTE)
+    
+    def adicionar_serie(self, title: str, year: Optional[int], seasons: Optional[int], episodes: Optional[int]) -> None:
+        self._tipos.append(_TIPO_SERIE)
+        self._titulos.append(title)
+        self._anos.append(_para_array(year))
+        self._notas_x10.append(_AUSENTE)
+        self._temporadas.append(_para_array(seasons))
+        self._episodios.append(_para_array(episodes))
+    
+    def adicionar(self, item: TV) -> None:
+        if isinstance(item, Series):
+            self.adicionar_serie(item.title, item.year, item.seasons, item.episodes)
+        elif isinstance(item, Movie):
+            self.adicionar_filme(item.title, item.year, item.rating)
+        else:
+            raise TypeError(f"Item nao suportado no catalogo: {type(item).__name__}")
+    
+    def append(self, item: TV) -> None:
+        # Mesmo nome de list.append: o catalogo substitui a lista de objetos do Exercicio 5
+        self.adicionar(item)
+    
+    def _reindexar(self) -> None:
+        # Chamado depois que as colunas sao substituidas de uma vez (copia filtrada, cache binario)
+        pass
+    
+    def completos(self) -> 'CatalogoColunar':
+        # Copia so com os itens que tem titulo e ano (e nota, no caso de filmes), sem criar objetos
+        posicoes = [i for i, tipo in enumerate(self._tipos)
+                    if self._titulos[i] and self._anos[i] != _AUSENTE
+                    and (tipo == _TIPO_SERIE or self._notas_x10[i] != _AUSENTE)]
+        copia = type(self)()
+        for nome in ('_tipos', '_anos', '_notas_x10', '_temporadas', '_episodios'):
+            coluna = getattr(self, nome)
+            setattr(copia, nome, array(coluna.typecode, (coluna[i] for i in posicoes)))
+        copia._titulos = _TitulosCompactos(self._titulos[i] for i in posicoes)
+        copia._reindexar()
+        return copia
+    
+    def registros(self) -> Iterator[dict]:
+        # Formato do filmes_extraidos.json, so para os filmes
+        for i, tipo in enumerate(self._tipos):
+            if tipo == _TIPO_FILME:
+                nota = self._notas_x10[i]
+                yield {'titulo': self._titulos[i], 'ano': _de_array(self._anos[i]),
+                       'nota': None if nota == _AUSENTE else nota / 10}
+    
+    def _item(self, i: int) -> Union[Movie, Series]:
+        if self._tipos[i] == _TIPO_SERIE:
+            return Series(self._titulos[i], _de_array(self._anos[i]),
+                          _de_array(self._temporadas[i]), _de_array(self._episodios[i]))
+        nota = self._notas_x10[i]
+        return Movie(self._titulos[i], _de_array(self._anos[i]), None if nota == _AUSENTE else nota / 10)
+    
+    def __len__(self) -> int:
+        return len(self._tipos)
+    
+    def __getitem__(self, indice: Union[int, slice]):
+        if isinstance(indice, slice):
+            return [self._item(i) for i in range(*indice.indices(len(self)))]
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError("indice fora do catalogo")
+        return self._item(indice)
+    
+    def __iter__(self) -> Iterator[Union[Movie, Series]]:
+        for i in range(len(self)):
+            yield self._item(i)
+    
+    def filmes(self) -> Iterator[Movie]:
+        for i, tipo in enumerate(self._tipos):
+            if tipo == _TIPO_FILME:
+                yield self._item(i)
+    
+    def series(self) -> Iterator[Series]:
+        for i, tipo in enumerate(self._tipos):
+            if tipo == _TIPO_SERIE:
+                yield self._item(i)
+    
+    def __repr__(self) -> str:
+        return f"CatalogoColunar({len(self)} itens)"
+
+
 if __name__ == "__main__":
     print("=== Teste das Classes ===\n")
     
@@ -52,3 +257,8 @@ if __name__ == "__main__":
     
     series = Series("Breaking Bad", 2008, 5, 62)
     print(f"Series: {series}")
+    
+    catalogo = CatalogoColunar([movie, series])
+    print(f"\nCatalogo colunar: {catalogo}")
+    for item in catalogo:
+        print(f"  {item!r}")
@@ -0,0 +1,198 @@
+"""
+Modulo de Crawler para multiplos rankings do IMDb.
+Baixa varias paginas em paralelo reaproveitando conexoes HTTP,
+respeitando um limite de requisicoes por host e repetindo falhas com backoff.
+"""
+
+import functools
+import http.server
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from .scraping import HEADERS_PADRAO, ChartPage, extrair_filmes_completos
+    from .cache import criar_cache
+except ImportError:
+    from scraping import HEADERS_PADRAO, ChartPage, extrair_filmes_completos
+    from cache import criar_cache
+
+
+STATUS_REPETIVEIS = (429, 500, 502, 503, 504)
+
+
+class LimitadorPorHost:
+    def __init__(self, requisicoes_por_segundo: float = 2.0):
+        self.intervalo = 1.0 / requisicoes_por_segundo if requisicoes_por_segundo > 0 else 0.0
+        self._proxima_liberacao = {}
+        self._lock = threading.Lock()
+
+    def aguardar(self, url: str) -> None:
+        host = urlparse(url).netloc
+        with self._lock:
+            agora = time.monotonic()
+            liberacao = max(agora, self._proxima_liberacao.get(host, agora))
+            self._proxima_liberacao[host] = liberacao + self.intervalo
+        espera = liberacao - agora
+        if espera > 0:
+            time.sleep(espera)
+
+
+class ChartCrawler:
+    def __init__(self, max_workers: int = 4, requisicoes_por_segundo: float = 2.0,
+                 tentativas: int = 3, backoff: float = 0.5, timeout: float = 30, cache=None):
+        if tentativas < 1:
+            # Sem nenhuma tentativa, requisitar nao teria erro nem resposta para devolver
+            raise ValueError(f"tentativas deve ser pelo menos 1, recebido: {tentativas}")
+        self.max_workers = max_workers
+        self.tentativas = tentativas
+        self.backoff = backoff
+        self.timeout = timeout
+        self.limitador = LimitadorPorHost(requisicoes_por_segundo)
+        self.cache = cache
+        self._local = threading.local()
+        self._sessoes = []
+        self._lock = threading.Lock()
+
+    def _sessao(self) -> requests.Session:
+        # Uma sessao por thread do pool, mantida aberta (keep-alive) entre requisicoes
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update(HEADERS_PADRAO)
+            self._local.session = session
+            with self._lock:
+                self._sessoes.append(session)
+        return session
+
+    def requisitar(self, url: str, headers: Dict[str, str] = None) -> requests.Response:
+        ultimo_erro = None
+        espera_servidor = 0.0
+        for tentativa in range(self.tentativas):
+            if tentativa > 0:
+                time.sleep(max(self.backoff * (2 ** (tentativa - 1)), espera_servidor))
+            self.limitador.aguardar(url)
+            try:
+                response = self._sessao().get(url, headers=headers, timeout=self.timeout)
+                if response.status_code in STATUS_REPETIVEIS:
+                    ultimo_erro = requests.HTTPError(f"{response.status_code} para {url}", response=response)
+                    retry_after = response.headers.get('Retry-After', '')
+                    espera_servidor = float(retry_after) if retry_after.isdigit() else 0.0
+                    continue
+                response.raise_for_status()
+                return response
+            except (requests.ConnectionError, requests.Timeout) as e:
+                ultimo_erro = e
+        raise ultimo_erro
+
+    def baixar(self, url: str) -> str:
+        if self.cache is not None:
+            return self.cache.obter(url, self.requisitar)
+        return self.requisitar(url).text
+
+    def baixar_varios(self, urls: Dict[str, str]) -> Dict[str, Optional[str]]:
+        resultados = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futuros = {nome: executor.submit(self.baixar, url) for nome, url in urls.items()}
+            for nome, futuro in futuros.items():
+                try:
+                    resultados[nome] = futuro.result()
+                except requests.RequestException as e:
+                    print(f"Erro ao baixar '{nome}' ({urls[nome]}): {e}")
+                    resultados[nome] = None
+        return resultados
+
+    def fechar(self) -> None:
+        with self._lock:
+            for session in self._sessoes:
+                session.close()
+            self._sessoes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+def criar_crawler(config: dict, cache=None) -> ChartCrawler:
+    opcoes = config.get("crawler", {})
+    return ChartCrawler(
+        max_workers=opcoes.get("max_workers", 4),
+        requisicoes_por_segundo=opcoes.get("requisicoes_por_segundo", 2.0),
+        tentativas=opcoes.get("tentativas", 3),
+        backoff=opcoes.get("backoff", 0.5),
+        timeout=opcoes.get("timeout", 30),
+        cache=cache
+    )
+
+
+def baixar_charts(config: dict, crawler: ChartCrawler = None) -> Dict[str, Optional[str]]:
+    urls = config.get("charts") or {"top250": config.get("url", "https://www.imdb.com/chart/top/")}
+    if crawler is not None:
+        return crawler.baixar_varios(urls)
+    with criar_crawler(config, criar_cache(config)) as crawler:
+        return crawler.baixar_varios(urls)
+
+
+def extrair_charts(htmls: Dict[str, Optional[str]], n_filmes: int = 250,
+                   parser: str = "auto") -> Dict[str, List[Dict]]:
+    filmes_por_chart = {}
+    for nome, html in htmls.items():
+        if html is None:
+            continue
+        filmes_por_chart[nome] = extrair_filmes_completos(ChartPage(html, parser), n_filmes)
+    return filmes_por_chart
+
+
+class _HandlerSilencioso(http.server.SimpleHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def servir_fixtures(diretorio: str, porta: int = 0,
+                    handler_cls: type = _HandlerSilencioso) -> Iterator[str]:
+    # Servidor HTTP local que substitui o IMDb servindo paginas salvas. handler_cls (subclasse de
+    # _HandlerSilencioso) permite simular falhas e lentidao do servidor nos testes
+    handler = functools.partial(handler_cls, directory=diretorio)
+    servidor = http.server.ThreadingHTTPServer(('127.0.0.1', porta), handler)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{servidor.server_address[1]}"
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    print("=== Teste do Crawler contra servidor local ===\n")
+
+    diretorio = os.path.dirname(os.path.abspath(__file__))
+    with servir_fixtures(diretorio) as base_url, tempfile.TemporaryDirectory() as tmp:
+        config = {
+            "charts": {f"copia_{i}": f"{base_url}/imdb_top250.html" for i in range(4)},
+            "crawler": {"max_workers": 4, "requisicoes_por_segundo": 20},
+            "cache": {"diretorio": os.path.join(tmp, "cache_http")}
+        }
+        inicio = time.perf_counter()
+        htmls = baixar_charts(config)
+        print(f"{len(htmls)} paginas baixadas em {time.perf_counter() - inicio:.2f}s")
+
+        for nome, filmes in extrair_charts(htmls).items():
+            print(f"  {nome}: {len(filmes)} filmes, primeiro: {filmes[0]['titulo'] if filmes else 'N/A'}")
@@ -3,22 +3,95 @@ Modulo de Banco de Dados com SQLAlchemy.
 Exercicio 6: Criacao do banco imdb.db com tabelas movies e series.
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, Float
+from sqlalchemy import create_engine, event, inspect, select, text, Column, Integer, SmallInteger, String, Float, Boolean, DateTime, Index
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import declarative_base, sessionmaker
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from typing import List
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List
 import os
+import threading
 
 Base = declarative_base()
 
 
+# Perfil aplicado em cada nova conexao. WAL permite leitores (analise/exportacao)
+# concorrentes ao escritor da ingestao sem "database is locked".
+PERFIL_SQLITE_PADRAO = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -65536,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,
+}
+
+_perfil_sqlite = dict(PERFIL_SQLITE_PADRAO)
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def configurar_sqlite(perfil: dict = None) -> None:
+    _perfil_sqlite.clear()
+    _perfil_sqlite.update(PERFIL_SQLITE_PADRAO)
+    if perfil:
+        _perfil_sqlite.update(perfil)
+
+
+def _aplicar_pragmas(perfil: dict):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for nome, valor in perfil.items():
+            cursor.execute(f"PRAGMA {nome}={valor}")
+        cursor.close()
+    return on_connect
+
+
+def obter_engine(db_path: str):
+    # Um unico engine (e pool de conexoes) por arquivo, compartilhado pelos modulos
+    caminho = os.path.abspath(db_path)
+    with _engines_lock:
+        engine = _engines.get(caminho)
+        if engine is None:
+            engine = create_engine(f'sqlite:///{caminho}', echo=False,
+                                   pool_size=5, max_overflow=10, pool_pre_ping=True)
+            event.listen(engine, 'connect', _aplicar_pragmas(dict(_perfil_sqlite)))
+            _engines[caminho] = engine
+        return engine
+
+
+def descartar_engine(db_path: str) -> None:
+    with _engines_lock:
+        engine = _engines.pop(os.path.abspath(db_path), None)
+    if engine is not None:
+        engine.dispose()
+
+
+def remover_banco(db_path: str) -> bool:
+    descartar_engine(db_path)
+    removido = False
+    for caminho in (db_path, f"{db_path}-wal", f"{db_path}-shm"):
+        if os.path.exists(caminho):
+            os.remove(caminho)
+            removido = True
+    return removido
+
+
 class MovieDB(Base):
     __tablename__ = 'movies'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    title = Column(String(500), nullable=False, unique=True)
+    title = Column(String(500), nullable=False)
     year = Column(Integer)
     rating = Column(Float)
+    em_chart = Column(Boolean, nullable=False, default=True, server_default='1')
+    
+    __table_args__ = (
+        Index('uq_movies_title_year', 'title', 'year', unique=True),
+        Index('ix_movies_rating', 'rating'),
+        Index('ix_movies_year', 'year'),
+    )
     
     def __repr__(self):
         return f"<MovieDB(id={self.id}, title='{self.title}', year={self.year}, rating={self.rating})>"
@@ -28,19 +101,323 @@ class SeriesDB(Base):
     __tablename__ = 'series'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    title = Column(String(500), nullable=False, unique=True)
+    title = Column(String(500), nullable=False)
     year = Column(Integer)
     seasons = Column(Integer)
     episodes = Column(Integer)
+    em_chart = Column(Boolean, nullable=False, default=True, server_default='1')
+    
+    __table_args__ = (Index('uq_series_title_year', 'title', 'year', unique=True),)
     
     def __repr__(self):
         return f"<SeriesDB(id={self.id}, title='{self.title}', year={self.year}, seasons={self.seasons}, episodes={self.episodes})>"
 
 
+class ResumoAnoCategoriaDB(Base):
+    # Contagem de filmes por (ano, categoria), mantida por triggers em movies
+    __tablename__ = 'resumo_ano_categoria'
+    
+    year = Column(Integer, primary_key=True)
+    categoria = Column(String(30), primary_key=True)
+    total = Column(Integer, nullable=False)
+    
+    __table_args__ = ({'sqlite_with_rowid': False},)
+    
+    def __repr__(self):
+        return f"<ResumoAnoCategoriaDB(year={self.year}, categoria='{self.categoria}', total={self.total})>"
+
+
+class ResumoAnoNotaDB(Base):
+    # Estatisticas de nota por ano; media = soma_notas / n_notas
+    __tablename__ = 'resumo_ano_nota'
+    
+    year = Column(Integer, primary_key=True)
+    total = Column(Integer, nullable=False)
+    n_notas = Column(Integer, nullable=False)
+    soma_notas = Column(Float, nullable=False)
+    nota_min = Column(Float)
+    nota_max = Column(Float)
+    
+    def __repr__(self):
+        return f"<ResumoAnoNotaDB(year={self.year}, total={self.total}, nota_min={self.nota_min}, nota_max={self.nota_max})>"
+
+
+# Historico de execucoes num arquivo SQLite proprio (data/historico.db), como o indice de anos:
+# o modo recriar apaga o imdb.db e renumera movies.id, entao os snapshots apontam para um id
+# de titulo estavel, da tabela titulos deste arquivo
+HistoricoBase = declarative_base()
+HISTORICO_PADRAO = "historico.db"
+
+
+def caminho_historico(db_path: str) -> str:
+    return os.path.join(os.path.dirname(db_path), HISTORICO_PADRAO)
+
+
+def fonte_backfill(lote: str, arquivo: str) -> str:
+    # arquivo e relativo ao diretorio de snapshots: dois lotes podem ter o mesmo caminho relativo
+    return f"{lote}:{arquivo}"
+
+
+class TituloHistoricoDB(HistoricoBase):
+    __tablename__ = 'titulos'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    title = Column(String(500), nullable=False)
+    year = Column(Integer)
+    
+    __table_args__ = (Index('uq_titulos_title_year', 'title', 'year', unique=True),)
+    
+    def __repr__(self):
+        return f"<TituloHistoricoDB(id={self.id}, title='{self.title}', year={self.year})>"
+
+
+class ScrapeRunDB(HistoricoBase):
+    __tablename__ = 'scrape_runs'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    executado_em = Column(DateTime, nullable=False, index=True)
+    fonte = Column(String(500), index=True)
+    hash_pagina = Column(String(64))
+    total_itens = Column(Integer)
+    
+    def __repr__(self):
+        return f"<ScrapeRunDB(id={self.id}, executado_em={self.executado_em}, fonte='{self.fonte}', total_itens={self.total_itens})>"
+
+
+class RatingSnapshotDB(HistoricoBase):
+    # Tabela so de insercao: WITHOUT ROWID com chave (title_id, run_id) e valores em SMALLINT
+    # (nota armazenada x10) para manter cada linha com poucos bytes. title_id aponta para titulos.id
+    __tablename__ = 'rating_snapshots'
+    
+    title_id = Column(Integer, primary_key=True)
+    run_id = Column(Integer, primary_key=True)
+    rank = Column(SmallInteger)
+    rating_x10 = Column(SmallInteger)
+    
+    __table_args__ = (
+        Index('ix_rating_snapshots_run_id', 'run_id'),
+        {'sqlite_with_rowid': False},
+    )
+    
+    def __repr__(self):
+        return f"<RatingSnapshotDB(title_id={self.title_id}, run_id={self.run_id}, rank={self.rank}, rating_x10={self.rating_x10})>"
+
+
+class BackfillProgressoDB(HistoricoBase):
+    # Arquivos de snapshot ja gravados por lote de backfill, para retomar apos interrupcao
+    __tablename__ = 'backfill_progresso'
+    
+    lote = Column(String(100), primary_key=True)
+    arquivo = Column(String(1000), primary_key=True)
+    run_id = Column(Integer, nullable=False)
+    processado_em = Column(DateTime, nullable=False)
+    
+    __table_args__ = ({'sqlite_with_rowid': False},)
+    
+    def __repr__(self):
+        return f"<BackfillProgressoDB(lote='{self.lote}', arquivo='{self.arquivo}', run_id={self.run_id})>"
+
+
+# O indice titulo -> ano fica num arquivo SQLite proprio (data/indice_anos.db): o imdb.db e
+# apagado a cada execucao no modo recriar, e o indice precisa sobreviver entre execucoes
+IndiceBase = declarative_base()
+
+
+class TituloAnoDB(IndiceBase):
+    __tablename__ = 'titulo_ano'
+    
+    title = Column(String(500), primary_key=True)
+    year = Column(SmallInteger, nullable=False)
+    atualizado_em = Column(DateTime, nullable=False)
+    
+    __table_args__ = ({'sqlite_with_rowid': False},)
+    
+    def __repr__(self):
+        return f"<TituloAnoDB(title='{self.title}', year={self.year})>"
+
+
+_indices_anos: Dict[str, Dict[str, int]] = {}
+_indices_anos_lock = threading.Lock()
+
+
+def carregar_indice_anos(indice_path: str) -> Dict[str, int]:
+    # Lido do disco uma vez por processo; registrar_anos mantem esta copia em memoria atualizada
+    caminho = os.path.abspath(indice_path)
+    with _indices_anos_lock:
+        indice = _indices_anos.get(caminho)
+        if indice is not None:
+            return indice
+        indice = {}
+        if os.path.exists(caminho):
+            try:
+                with obter_engine(caminho).connect() as conn:
+                    if inspect(conn).has_table(TituloAnoDB.__tablename__):
+                        indice = dict(conn.execute(select(TituloAnoDB.title, TituloAnoDB.year)).all())
+            except SQLAlchemyError as e:
+                print(f"Erro ao carregar indice de anos: {e}")
+        _indices_anos[caminho] = indice
+        return indice
+
+
+def registrar_anos(indice_path: str, filmes: Iterable[dict]) -> int:
+    # Grava so os pares (titulo, ano) novos ou com ano diferente do que o indice ja conhece
+    indice = carregar_indice_anos(indice_path)
+    novos = {}
+    for filme in filmes:
+        titulo = filme.get('titulo', filme.get('title'))
+        ano = filme.get('ano', filme.get('year'))
+        if titulo and ano is not None and indice.get(titulo) != ano:
+            novos[titulo] = ano
+    if not novos:
+        return 0
+    
+    agora = datetime.now()
+    stmt = sqlite_insert(TituloAnoDB.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['title'],
+        set_={'year': stmt.excluded.year, 'atualizado_em': stmt.excluded.atualizado_em}
+    )
+    try:
+        engine = obter_engine(indice_path)
+        IndiceBase.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(stmt, [{'title': t, 'year': a, 'atualizado_em': agora} for t, a in novos.items()])
+    except SQLAlchemyError as e:
+        print(f"Erro ao atualizar indice de anos: {e}")
+        return 0
+    
+    with _indices_anos_lock:
+        indice.update(novos)
+    return len(novos)
+
+
+# Nota minima de cada categoria, da maior para a menor; abaixo da ultima vale ROTULO_ABAIXO.
+# Os triggers de resumo_ano_categoria sao gerados a partir destes limiares
+LIMIARES_NOTA = ((9.0, "Obra-prima"), (8.0, "Excelente"), (7.0, "Bom"))
+ROTULO_ABAIXO = "Mediano"
+SEM_CLASSIFICACAO = "Sem classificacao"
+
+
+def _sql_categoria(coluna: str) -> str:
+    casos = " ".join(f"WHEN {coluna} >= {minimo} THEN '{rotulo}'" for minimo, rotulo in LIMIARES_NOTA)
+    return f"CASE WHEN {coluna} IS NULL THEN '{SEM_CLASSIFICACAO}' {casos} ELSE '{ROTULO_ABAIXO}' END"
+
+
+# Soma (em vez de +1) para servir tanto aos triggers quanto a carga em lote agregada
+_SQL_CONFLITO_CATEGORIA = "ON CONFLICT (year, categoria) DO UPDATE SET total = total + excluded.total"
+_SQL_CONFLITO_NOTA = """ON CONFLICT (year) DO UPDATE SET
+                total = total + excluded.total,
+                n_notas = n_notas + excluded.n_notas,
+                soma_notas = soma_notas + excluded.soma_notas,
+                nota_min = CASE WHEN nota_min IS NULL OR excluded.nota_min < nota_min THEN COALESCE(excluded.nota_min, nota_min) ELSE nota_min END,
+                nota_max = CASE WHEN nota_max IS NULL OR excluded.nota_max > nota_max THEN COALESCE(excluded.nota_max, nota_max) ELSE nota_max END"""
+
+
+def _sql_somar_resumo(linha: str) -> List[str]:
+    return [
+        f"""INSERT INTO resumo_ano_categoria (year, categoria, total)
+            VALUES ({linha}.year, {_sql_categoria(f'{linha}.rating')}, 1) {_SQL_CONFLITO_CATEGORIA}""",
+        f"""INSERT INTO resumo_ano_nota (year, total, n_notas, soma_notas, nota_min, nota_max)
+            VALUES ({linha}.year, 1, {linha}.rating IS NOT NULL, COALESCE({linha}.rating, 0), {linha}.rating, {linha}.rating)
+            {_SQL_CONFLITO_NOTA}""",
+    ]
+
+
+def _sql_somar_resumo_desde() -> List[str]:
+    # Carga em lote: um GROUP BY sobre as linhas novas (id > :id_minimo) no lugar de um trigger por linha
+    return [
+        f"""INSERT INTO resumo_ano_categoria (year, categoria, total)
+            SELECT year, {_sql_categoria('rating')}, COUNT(*) FROM movies
+            WHERE id > :id_minimo AND year IS NOT NULL GROUP BY 1, 2
+            {_SQL_CONFLITO_CATEGORIA}""",
+        f"""INSERT INTO resumo_ano_nota (year, total, n_notas, soma_notas, nota_min, nota_max)
+            SELECT year, COUNT(*), COUNT(rating), COALESCE(SUM(rating), 0), MIN(rating), MAX(rating) FROM movies
+            WHERE id > :id_minimo AND year IS NOT NULL GROUP BY year
+            {_SQL_CONFLITO_NOTA}""",
+    ]
+
+
+def _sql_subtrair_resumo(linha: str) -> List[str]:
+    # min/max nao podem ser desfeitos aritmeticamente: recalculados so para o ano afetado (ix_movies_year)
+    return [
+        f"""UPDATE resumo_ano_categoria SET total = total - 1
+            WHERE year = {linha}.year AND categoria = {_sql_categoria(f'{linha}.rating')}""",
+        f"""DELETE FROM resumo_ano_categoria WHERE year = {linha}.year AND total <= 0""",
+        f"""UPDATE resumo_ano_nota SET
+                total = total - 1,
+                n_notas = n_notas - ({linha}.rating IS NOT NULL),
+                soma_notas = soma_notas - COALESCE({linha}.rating, 0),
+                nota_min = (SELECT MIN(rating) FROM movies WHERE year = {linha}.year),
+                nota_max = (SELECT MAX(rating) FROM movies WHERE year = {linha}.year)
+            WHERE year = {linha}.year""",
+        f"""DELETE FROM resumo_ano_nota WHERE year = {linha}.year AND total <= 0""",
+    ]
+
+
+def _sql_triggers_resumo() -> Dict[str, str]:
+    def corpo(comandos: List[str]) -> str:
+        return "BEGIN " + " ".join(f"{c};" for c in comandos) + " END"
+    
+    # Filmes sem ano ficam fora do resumo, como no crosstab (NaN e descartado)
+    return {
+        'trg_movies_resumo_insert': (
+            "CREATE TRIGGER trg_movies_resumo_insert AFTER INSERT ON movies "
+            "WHEN NEW.year IS NOT NULL " + corpo(_sql_somar_resumo('NEW'))
+        ),
+        'trg_movies_resumo_delete': (
+            "CREATE TRIGGER trg_movies_resumo_delete AFTER DELETE ON movies "
+            "WHEN OLD.year IS NOT NULL " + corpo(_sql_subtrair_resumo('OLD'))
+        ),
+        'trg_movies_resumo_update_old': (
+            "CREATE TRIGGER trg_movies_resumo_update_old AFTER UPDATE OF year, rating ON movies "
+            "WHEN OLD.year IS NOT NULL AND (NEW.year IS NOT OLD.year OR NEW.rating IS NOT OLD.rating) "
+            + corpo(_sql_subtrair_resumo('OLD'))
+        ),
+        'trg_movies_resumo_update_new': (
+            "CREATE TRIGGER trg_movies_resumo_update_new AFTER UPDATE OF year, rating ON movies "
+            "WHEN NEW.year IS NOT NULL AND (NEW.year IS NOT OLD.year OR NEW.rating IS NOT OLD.rating) "
+            + corpo(_sql_somar_resumo('NEW'))
+        ),
+    }
+
+
+COLUNAS_ORDENACAO_FILMES = ('rating', 'year', 'title', 'id')
+
+
+def montar_consulta_filmes(ano_min: int = None, ano_max: int = None, nota_minima: float = None,
+                           nota_maior_que: float = None, ordenar_por: str = 'rating',
+                           decrescente: bool = True, limite: int = None, offset: int = 0):
+    # Filtros e ordenacao resolvidos pelo SQLite usando ix_movies_year / ix_movies_rating
+    if ordenar_por not in COLUNAS_ORDENACAO_FILMES:
+        raise ValueError(f"Ordenacao invalida: '{ordenar_por}'. Use uma de {COLUNAS_ORDENACAO_FILMES}")
+    
+    tabela = MovieDB.__table__
+    consulta = select(tabela)
+    if ano_min is not None:
+        consulta = consulta.where(tabela.c.year >= ano_min)
+    if ano_max is not None:
+        consulta = consulta.where(tabela.c.year <= ano_max)
+    if nota_minima is not None:
+        consulta = consulta.where(tabela.c.rating >= nota_minima)
+    if nota_maior_que is not None:
+        consulta = consulta.where(tabela.c.rating > nota_maior_que)
+    
+    coluna = tabela.c[ordenar_por]
+    consulta = consulta.order_by(coluna.desc() if decrescente else coluna.asc(), tabela.c.id)
+    if limite is not None:
+        consulta = consulta.limit(limite)
+    if offset:
+        consulta = consulta.offset(offset)
+    return consulta
+
+
 class DatabaseManager:
-    def __init__(self, db_path: str = "data/imdb.db"):
+    def __init__(self, db_path: str = "data/imdb.db", historico_path: str = None):
         self.db_path = db_path
+        # Execucoes e snapshots ficam ao lado do banco, num arquivo que nunca e apagado
+        self.historico_path = historico_path or caminho_historico(db_path)
         self.engine = None
+        self.engine_historico = None
         self.Session = None
         
     def conectar(self) -> None:
@@ -49,8 +426,13 @@ class DatabaseManager:
             if db_dir and not os.path.exists(db_dir):
                 os.makedirs(db_dir)
             
-            self.engine = create_engine(f'sqlite:///{self.db_path}', echo=False)
+            self.engine = obter_engine(self.db_path)
             Base.metadata.create_all(self.engine)
+            self._migrar_esquema()
+            self.engine_historico = obter_engine(self.historico_path)
+            HistoricoBase.metadata.create_all(self.engine_historico)
+            self._migrar_historico()
+            self._migrar_fontes_backfill()
             self.Session = sessionmaker(bind=self.engine)
             
             print(f"Banco de dados '{self.db_path}' conectado com sucesso.")
@@ -59,6 +441,123 @@ class DatabaseManager:
             print(f"Erro ao conectar ao banco de dados: {e}")
             raise
     
+    def _migrar_esquema(self) -> None:
+        # Bancos criados por versoes anteriores: titulo unico, sem a coluna em_chart e sem os triggers de resumo
+        inspector = inspect(self.engine)
+        with self.engine.begin() as conn:
+            for tabela in (MovieDB.__table__, SeriesDB.__table__):
+                colunas = {c['name'] for c in inspector.get_columns(tabela.name)}
+                if 'em_chart' not in colunas:
+                    conn.exec_driver_sql(
+                        f"ALTER TABLE {tabela.name} ADD COLUMN em_chart BOOLEAN NOT NULL DEFAULT 1"
+                    )
+                if self._tem_titulo_unico(conn, tabela.name):
+                    self._reconstruir_tabela(conn, tabela)
+                # create_all nao cria indices novos em tabelas que ja existem
+                for indice in tabela.indexes:
+                    indice.create(conn, checkfirst=True)
+            
+            # Triggers de resumo: na primeira vez o resumo e preenchido a partir dos filmes existentes
+            existentes = {nome for (nome,) in conn.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+            triggers = _sql_triggers_resumo()
+            if not set(triggers) <= existentes:
+                for nome, ddl in triggers.items():
+                    conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {nome}")
+                    conn.exec_driver_sql(ddl)
+                self._reconstruir_resumos(conn)
+    
+    def _migrar_historico(self) -> None:
+        # Versoes anteriores guardavam o historico no proprio imdb.db, com title_id = movies.id:
+        # copia para o historico.db (se ele ainda estiver vazio) e remove as tabelas antigas
+        with self.engine.connect() as conn:
+            if not inspect(conn).has_table(ScrapeRunDB.__tablename__):
+                return
+        
+        with self.engine_historico.connect() as conn:
+            conn.exec_driver_sql("ATTACH DATABASE ? AS principal", (os.path.abspath(self.db_path),))
+            try:
+                if conn.exec_driver_sql("SELECT COUNT(*) FROM scrape_runs").scalar() == 0:
+                    conn.exec_driver_sql(
+                        "INSERT INTO scrape_runs (id, executado_em, fonte, hash_pagina, total_itens) "
+                        "SELECT id, executado_em, fonte, hash_pagina, total_itens FROM principal.scrape_runs")
+                    conn.exec_driver_sql(
+                        "INSERT INTO titulos (title, year) SELECT DISTINCT m.title, m.year "
+                        "FROM principal.movies m WHERE m.id IN (SELECT title_id FROM principal.rating_snapshots)")
+                    conn.exec_driver_sql(
+                        "INSERT OR IGNORE INTO rating_snapshots (title_id, run_id, rank, rating_x10) "
+                        "SELECT t.id, s.run_id, s.rank, s.rating_x10 FROM principal.rating_snapshots s "
+                        "JOIN principal.movies m ON m.id = s.title_id "
+                        "JOIN titulos t ON t.title = m.title AND t.year IS m.year")
+                    if conn.exec_driver_sql("SELECT 1 FROM principal.sqlite_master "
+                                            "WHERE name = 'backfill_progresso'").first():
+                        conn.exec_driver_sql(
+                            "INSERT INTO backfill_progresso (lote, arquivo, run_id, processado_em) "
+                            "SELECT lote, arquivo, run_id, processado_em FROM principal.backfill_progresso")
+                for tabela in ('rating_snapshots', 'scrape_runs', 'backfill_progresso'):
+                    conn.exec_driver_sql(f"DROP TABLE IF EXISTS principal.{tabela}")
+                conn.commit()
+            finally:
+                conn.rollback()
+                conn.exec_driver_sql("DETACH DATABASE principal")
+        print(f"Historico de execucoes movido para '{self.historico_path}'.")
+    
+    def _migrar_fontes_backfill(self) -> None:
+        # Versoes anteriores gravavam so o caminho relativo como fonte do backfill: qualifica pelo lote
+        with self.engine_historico.begin() as conn:
+            conn.exec_driver_sql(
+                "UPDATE scrape_runs SET fonte = p.lote || ':' || p.arquivo FROM backfill_progresso p "
+                "WHERE p.run_id = scrape_runs.id AND scrape_runs.fonte = p.arquivo")
+    
+    @staticmethod
+    def _tem_titulo_unico(conn, nome: str) -> bool:
+        # UNIQUE(title) inline das versoes antigas: o SQLite nao permite remover, so recriar a tabela
+        for _, indice, unico, *_ in conn.exec_driver_sql(f"PRAGMA index_list({nome})").fetchall():
+            colunas = [linha[2] for linha in conn.exec_driver_sql(f"PRAGMA index_info('{indice}')")]
+            if unico and colunas == ['title']:
+                return True
+        return False
+    
+    def _reconstruir_tabela(self, conn, tabela) -> None:
+        # Cria a tabela nova, copia as linhas (mantendo os ids), remove a antiga. Indices e triggers
+        # da antiga saem antes, para os nomes ficarem livres; os triggers voltam logo abaixo
+        nome = tabela.name
+        legado = f"{nome}_legado"
+        for tipo, objeto in conn.exec_driver_sql(
+                "SELECT type, name FROM sqlite_master WHERE type IN ('index', 'trigger') "
+                "AND tbl_name = ? AND sql IS NOT NULL", (nome,)).fetchall():
+            conn.exec_driver_sql(f"DROP {tipo.upper()} {objeto}")
+        # legacy_alter_table: o RENAME nao reescreve referencias de outras tabelas para o nome temporario
+        conn.exec_driver_sql("PRAGMA legacy_alter_table = ON")
+        try:
+            conn.exec_driver_sql(f"ALTER TABLE {nome} RENAME TO {legado}")
+        finally:
+            conn.exec_driver_sql("PRAGMA legacy_alter_table = OFF")
+        tabela.create(conn)
+        colunas = ', '.join(c.name for c in tabela.columns)
+        conn.exec_driver_sql(f"INSERT INTO {nome} ({colunas}) SELECT {colunas} FROM {legado}")
+        conn.exec_driver_sql(f"DROP TABLE {legado}")
+        print(f"Tabela '{nome}' migrada: titulo unico substituido por (titulo, ano).")
+    
+    def _reconstruir_resumos(self, conn) -> None:
+        conn.exec_driver_sql("DELETE FROM resumo_ano_categoria")
+        conn.exec_driver_sql("DELETE FROM resumo_ano_nota")
+        conn.exec_driver_sql(
+            f"INSERT INTO resumo_ano_categoria (year, categoria, total) "
+            f"SELECT year, {_sql_categoria('rating')}, COUNT(*) FROM movies "
+            f"WHERE year IS NOT NULL GROUP BY 1, 2"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO resumo_ano_nota (year, total, n_notas, soma_notas, nota_min, nota_max) "
+            "SELECT year, COUNT(*), COUNT(rating), COALESCE(SUM(rating), 0), MIN(rating), MAX(rating) "
+            "FROM movies WHERE year IS NOT NULL GROUP BY year"
+        )
+    
+    def reconstruir_resumos(self) -> None:
+        # Recalcula do zero (ex.: apos alterar LIMIARES_NOTA ou editar o banco sem os triggers)
+        with self.engine.begin() as conn:
+            self._reconstruir_resumos(conn)
+    
     def inserir_filme(self, title: str, year: int, rating: float) -> bool:
         try:
             session = self.Session()
@@ -79,24 +578,256 @@ class DatabaseManager:
             print(f"Erro ao inserir filme '{title}': {e}")
             return False
     
-    def inserir_filmes_em_lote(self, filmes: List[dict]) -> int:
-        inseridos = 0
+    def _normalizar_filmes(self, filmes: Iterable[dict], contagem: Dict[str, int]) -> Iterator[dict]:
         for filme in filmes:
-            try:
-                titulo = filme.get('titulo', filme.get('title', ''))
-                ano = filme.get('ano', filme.get('year'))
+            contagem['recebidos'] += 1
+            titulo = filme.get('titulo', filme.get('title', ''))
+            ano = filme.get('ano', filme.get('year'))
+            nota = filme.get('nota', filme.get('rating'))
+            if titulo and ano is not None and nota is not None:
+                yield {'title': titulo, 'year': ano, 'rating': nota}
+            else:
+                contagem['invalidos'] += 1
+    
+    def _normalizar_series(self, series: Iterable[dict], contagem: Dict[str, int]) -> Iterator[dict]:
+        for serie in series:
+            contagem['recebidos'] += 1
+            titulo = serie.get('titulo', serie.get('title', ''))
+            if titulo:
+                yield {
+                    'title': titulo,
+                    'year': serie.get('ano', serie.get('year')),
+                    'seasons': serie.get('temporadas', serie.get('seasons')),
+                    'episodes': serie.get('episodios', serie.get('episodes'))
+                }
+            else:
+                contagem['invalidos'] += 1
+    
+    def _inserir_bulk(self, tabela, linhas: Iterable[dict], tamanho_lote: int) -> int:
+        # Uma unica transacao; cada lote vira um executemany com ON CONFLICT DO NOTHING
+        stmt = sqlite_insert(tabela).on_conflict_do_nothing()
+        inseridos = 0
+        linhas = iter(linhas)
+        resumir = tabela is MovieDB.__table__
+        with self.engine.begin() as conn:
+            if resumir:
+                # DDL e transacional no SQLite: sem os triggers durante a carga, o resumo recebe
+                # um GROUP BY das linhas novas no final (rowids novos sao sempre maiores que o maximo atual)
+                id_minimo = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM movies")).scalar()
+                triggers = _sql_triggers_resumo()
+                for nome in triggers:
+                    conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {nome}")
+            while True:
+                lote = list(islice(linhas, tamanho_lote))
+                if not lote:
+                    break
+                inseridos += conn.execute(stmt, lote).rowcount
+            if resumir:
+                for ddl in triggers.values():
+                    conn.exec_driver_sql(ddl)
+                for comando in _sql_somar_resumo_desde():
+                    conn.execute(text(comando), {'id_minimo': id_minimo})
+        return inseridos
+    
+    def inserir_filmes_bulk(self, filmes: Iterable[dict], tamanho_lote: int = 50000) -> Dict[str, int]:
+        contagem = {'recebidos': 0, 'invalidos': 0}
+        try:
+            inseridos = self._inserir_bulk(MovieDB.__table__, self._normalizar_filmes(filmes, contagem), tamanho_lote)
+        except SQLAlchemyError as e:
+            print(f"Erro ao inserir filmes em lote: {e}")
+            inseridos = 0
+        
+        return {
+            'inseridos': inseridos,
+            'ignorados': contagem['recebidos'] - contagem['invalidos'] - inseridos,
+            'invalidos': contagem['invalidos']
+        }
+    
+    def inserir_series_bulk(self, series: Iterable[dict], tamanho_lote: int = 50000) -> Dict[str, int]:
+        contagem = {'recebidos': 0, 'invalidos': 0}
+        try:
+            inseridos = self._inserir_bulk(SeriesDB.__table__, self._normalizar_series(series, contagem), tamanho_lote)
+        except SQLAlchemyError as e:
+            print(f"Erro ao inserir series em lote: {e}")
+            inseridos = 0
+        
+        return {
+            'inseridos': inseridos,
+            'ignorados': contagem['recebidos'] - contagem['invalidos'] - inseridos,
+            'invalidos': contagem['invalidos']
+        }
+    
+    def _carregar_staging(self, conn, staging: str, colunas: List[str],
+                          linhas: Iterable[dict], tamanho_lote: int) -> int:
+        lista_colunas = ', '.join(colunas)
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS temp.{staging}")
+        conn.exec_driver_sql(f"CREATE TEMP TABLE {staging} ({lista_colunas})")
+        conn.exec_driver_sql(f"CREATE INDEX temp.ix_{staging}_title ON {staging} (title, year)")
+        
+        marcadores = ', '.join('?' for _ in colunas)
+        total = 0
+        linhas = iter(linhas)
+        while True:
+            lote = [tuple(linha[c] for c in colunas) for linha in islice(linhas, tamanho_lote)]
+            if not lote:
+                break
+            conn.exec_driver_sql(f"INSERT INTO {staging} ({lista_colunas}) VALUES ({marcadores})", lote)
+            total += len(lote)
+        return total
+    
+    def _sincronizar(self, tabela, linhas: Iterable[dict], colunas_valor: List[str],
+                     marcar_ausentes: bool, tamanho_lote: int) -> Dict[str, int]:
+        # Carrega a versao atual numa tabela temporaria e aplica a diferenca com SQL em lote
+        nome = tabela.name
+        staging = f"staging_{nome}"
+        colunas = ['title', 'year'] + colunas_valor
+        lista_colunas = ', '.join(colunas)
+        
+        resultado = {'recebidos': 0, 'inseridos': 0, 'atualizados': 0, 'inalterados': 0, 'ausentes': 0}
+        with self.engine.begin() as conn:
+            resultado['recebidos'] = self._carregar_staging(conn, staging, colunas, linhas, tamanho_lote)
+            
+            encontrados = conn.exec_driver_sql(
+                f"SELECT COUNT(*) FROM {staging} s WHERE EXISTS "
+                f"(SELECT 1 FROM {nome} t WHERE t.title = s.title AND t.year IS s.year)"
+            ).scalar()
+            
+            atribuicoes = ', '.join(f"{c} = s.{c}" for c in colunas_valor)
+            diferencas = ' OR '.join(f"{nome}.{c} IS NOT s.{c}" for c in colunas_valor)
+            resultado['atualizados'] = conn.exec_driver_sql(
+                f"UPDATE {nome} SET {atribuicoes}, em_chart = 1 FROM {staging} s "
+                f"WHERE {nome}.title = s.title AND {nome}.year IS s.year "
+                f"AND ({diferencas} OR {nome}.em_chart = 0)"
+            ).rowcount
+            
+            resultado['inseridos'] = conn.exec_driver_sql(
+                f"INSERT INTO {nome} ({lista_colunas}, em_chart) "
+                f"SELECT {', '.join('s.' + c for c in colunas)}, 1 FROM {staging} s "
+                f"WHERE NOT EXISTS (SELECT 1 FROM {nome} t WHERE t.title = s.title AND t.year IS s.year) "
+                f"ON CONFLICT DO NOTHING"
+            ).rowcount
+            
+            if marcar_ausentes:
+                resultado['ausentes'] = conn.exec_driver_sql(
+                    f"UPDATE {nome} SET em_chart = 0 WHERE em_chart = 1 AND NOT EXISTS "
+                    f"(SELECT 1 FROM {staging} s WHERE s.title = {nome}.title AND s.year IS {nome}.year)"
+                ).rowcount
+            
+            conn.exec_driver_sql(f"DROP TABLE temp.{staging}")
+        
+        # So linhas que casaram com (titulo, ano) existentes; as descartadas nao contam como inalteradas
+        resultado['inalterados'] = encontrados - resultado['atualizados']
+        return resultado
+    
+    def sincronizar_filmes(self, filmes: Iterable[dict], marcar_ausentes: bool = False,
+                           tamanho_lote: int = 50000) -> Dict[str, int]:
+        contagem = {'recebidos': 0, 'invalidos': 0}
+        try:
+            resultado = self._sincronizar(MovieDB.__table__, self._normalizar_filmes(filmes, contagem),
+                                          ['rating'], marcar_ausentes, tamanho_lote)
+        except SQLAlchemyError as e:
+            print(f"Erro ao sincronizar filmes: {e}")
+            resultado = {'recebidos': 0, 'inseridos': 0, 'atualizados': 0, 'inalterados': 0, 'ausentes': 0}
+        resultado['invalidos'] = contagem['invalidos']
+        return resultado
+    
+    def sincronizar_series(self, series: Iterable[dict], marcar_ausentes: bool = False,
+                           tamanho_lote: int = 50000) -> Dict[str, int]:
+        contagem = {'recebidos': 0, 'invalidos': 0}
+        try:
+            resultado = self._sincronizar(SeriesDB.__table__, self._normalizar_series(series, contagem),
+                                          ['seasons', 'episodes'], marcar_ausentes, tamanho_lote)
+        except SQLAlchemyError as e:
+            print(f"Erro ao sincronizar series: {e}")
+            resultado = {'recebidos': 0, 'inseridos': 0, 'atualizados': 0, 'inalterados': 0, 'ausentes': 0}
+        resultado['invalidos'] = contagem['invalidos']
+        return resultado
+    
+    def registrar_execucao(self, filmes: Iterable[dict], fonte: str = None, hash_pagina: str = None,
+                           tamanho_lote: int = 50000, executado_em: datetime = None) -> int:
+        # Grava uma linha em scrape_runs e o snapshot (posicao, nota) de cada titulo da pagina
+        try:
+            with self.engine_historico.begin() as conn:
+                return self._registrar_execucao(conn, filmes, fonte, hash_pagina, tamanho_lote, executado_em)
+        except SQLAlchemyError as e:
+            print(f"Erro ao registrar execucao: {e}")
+            return None
+    
+    def _registrar_execucao(self, conn, filmes: Iterable[dict], fonte: str, hash_pagina: str,
+                            tamanho_lote: int, executado_em: datetime = None) -> int:
+        def linhas():
+            for posicao, filme in enumerate(filmes, 1):
                 nota = filme.get('nota', filme.get('rating'))
-                
-                if titulo and ano is not None and nota is not None:
-                    sucesso = self.inserir_filme(title=titulo, year=ano, rating=nota)
-                    if sucesso:
-                        inseridos += 1
-            except Exception as e:
-                print(f"Erro ao inserir filme: {e}")
-                continue
+                yield {
+                    'title': filme.get('titulo', filme.get('title', '')),
+                    'year': filme.get('ano', filme.get('year')),
+                    'rank': filme.get('rank', posicao),
+                    'rating_x10': int(round(nota * 10)) if nota is not None else None
+                }
         
-        print(f"Total de filmes inseridos: {inseridos}/{len(filmes)}")
-        return inseridos
+        run_id = conn.execute(ScrapeRunDB.__table__.insert().values(
+            executado_em=executado_em or datetime.now(), fonte=fonte, hash_pagina=hash_pagina
+        )).inserted_primary_key[0]
+        
+        total = self._carregar_staging(conn, "staging_snapshots", ['title', 'year', 'rank', 'rating_x10'],
+                                       linhas(), tamanho_lote)
+        # Titulos vistos pela primeira vez ganham um id que nao muda mais, mesmo com o imdb.db recriado
+        conn.exec_driver_sql(
+            "INSERT INTO titulos (title, year) SELECT DISTINCT s.title, s.year FROM staging_snapshots s "
+            "WHERE s.title != '' AND NOT EXISTS "
+            "(SELECT 1 FROM titulos t WHERE t.title = s.title AND t.year IS s.year)"
+        )
+        conn.exec_driver_sql(
+            "INSERT OR IGNORE INTO rating_snapshots (title_id, run_id, rank, rating_x10) "
+            "SELECT t.id, ?, s.rank, s.rating_x10 FROM staging_snapshots s "
+            "JOIN titulos t ON t.title = s.title AND t.year IS s.year",
+            (run_id,)
+        )
+        conn.exec_driver_sql("DROP TABLE temp.staging_snapshots")
+        conn.execute(ScrapeRunDB.__table__.update()
+                     .where(ScrapeRunDB.__table__.c.id == run_id)
+                     .values(total_itens=total))
+        return run_id
+    
+    def registrar_snapshot_arquivo(self, filmes: Iterable[dict], lote: str, arquivo: str, hash_pagina: str,
+                                   executado_em: datetime, tamanho_lote: int = 50000) -> int:
+        # Backfill: substitui a execucao anterior do mesmo arquivo no mesmo lote (reextracao) e marca o
+        # progresso na mesma transacao, entao um arquivo nunca fica gravado sem marca, nem marcado sem dados
+        fonte = fonte_backfill(lote, arquivo)
+        try:
+            with self.engine_historico.begin() as conn:
+                conn.exec_driver_sql(
+                    "DELETE FROM rating_snapshots WHERE run_id IN (SELECT id FROM scrape_runs WHERE fonte = ?)",
+                    (fonte,)
+                )
+                conn.execute(ScrapeRunDB.__table__.delete().where(ScrapeRunDB.__table__.c.fonte == fonte))
+                run_id = self._registrar_execucao(conn, filmes, fonte, hash_pagina, tamanho_lote, executado_em)
+                stmt = sqlite_insert(BackfillProgressoDB.__table__).values(
+                    lote=lote, arquivo=arquivo, run_id=run_id, processado_em=datetime.now())
+                conn.execute(stmt.on_conflict_do_update(
+                    index_elements=['lote', 'arquivo'],
+                    set_={'run_id': stmt.excluded.run_id, 'processado_em': stmt.excluded.processado_em}
+                ))
+            return run_id
+        except SQLAlchemyError as e:
+            print(f"Erro ao registrar snapshot '{arquivo}': {e}")
+            return None
+    
+    def arquivos_processados(self, lote: str) -> set:
+        with self.engine_historico.connect() as conn:
+            return {arquivo for (arquivo,) in conn.execute(
+                select(BackfillProgressoDB.arquivo).where(BackfillProgressoDB.lote == lote))}
+    
+    def reiniciar_lote(self, lote: str) -> int:
+        with self.engine_historico.begin() as conn:
+            return conn.execute(BackfillProgressoDB.__table__.delete()
+                                .where(BackfillProgressoDB.__table__.c.lote == lote)).rowcount
+    
+    def inserir_filmes_em_lote(self, filmes: List[dict]) -> int:
+        resultado = self.inserir_filmes_bulk(filmes)
+        print(f"Total de filmes inseridos: {resultado['inseridos']}/{len(filmes)} "
+              f"(duplicados: {resultado['ignorados']}, incompletos: {resultado['invalidos']})")
+        return resultado['inseridos']
     
     def inserir_serie(self, title: str, year: int, seasons: int, episodes: int) -> bool:
         try:
@@ -128,6 +859,20 @@ class DatabaseManager:
             print(f"Erro ao consultar filmes: {e}")
             return []
     
+    def consultar_filmes_filtrados(self, ano_min: int = None, ano_max: int = None, nota_minima: float = None,
+                                   nota_maior_que: float = None, ordenar_por: str = 'rating',
+                                   decrescente: bool = True, limite: int = None, offset: int = 0) -> List[MovieDB]:
+        consulta = montar_consulta_filmes(ano_min, ano_max, nota_minima, nota_maior_que,
+                                          ordenar_por, decrescente, limite, offset)
+        try:
+            session = self.Session()
+            filmes = session.scalars(select(MovieDB).from_statement(consulta)).all()
+            session.close()
+            return filmes
+        except SQLAlchemyError as e:
+            print(f"Erro ao consultar filmes: {e}")
+            return []
+    
     def consultar_series(self) -> List[SeriesDB]:
         try:
             session = self.Session()
@@ -140,6 +885,13 @@ class DatabaseManager:
     
     def get_engine(self):
         return self.engine
+    
+    def fechar(self) -> None:
+        descartar_engine(self.db_path)
+        descartar_engine(self.historico_path)
+        self.engine = None
+        self.engine_historico = None
+        self.Session = None
 
 
 if __name__ == "__main__":
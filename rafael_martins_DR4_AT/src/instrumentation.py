@@ -0,0 +1,245 @@
+"""
+Modulo de Instrumentacao da execucao.
+Spans aninhados com tempo de parede e de CPU, linhas processadas e pico de memoria (tracemalloc),
+cProfile opcional por etapa e relatorio em JSON ao final da execucao.
+"""
+
+import cProfile
+import json
+import os
+import platform
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+class Span:
+    __slots__ = ('nome', 'atributos', 'linhas', 'inicio', 'duracao_s', 'cpu_s', 'pico_memoria_kb',
+                 'perfil', 'filhos', '_memoria_inicio', '_pico')
+
+    def __init__(self, nome: str, atributos: Dict = None):
+        self.nome = nome
+        self.atributos = dict(atributos or {})
+        self.linhas = None
+        self.inicio = None
+        self.duracao_s = None
+        self.cpu_s = None
+        self.pico_memoria_kb = None
+        self.perfil = None
+        self.filhos: List['Span'] = []
+        self._memoria_inicio = 0
+        self._pico = 0
+
+    def registrar(self, linhas: int = None, **atributos) -> None:
+        # Linhas somam: um span de exportacao chama registrar uma vez por chunk
+        if linhas is not None:
+            self.linhas = (self.linhas or 0) + linhas
+        self.atributos.update(atributos)
+
+    def como_dict(self, origem: float) -> Dict:
+        dados = {
+            'nome': self.nome,
+            'inicio_s': round(self.inicio - origem, 6) if self.inicio is not None else None,
+            'duracao_s': round(self.duracao_s, 6) if self.duracao_s is not None else None,
+            'cpu_s': round(self.cpu_s, 6) if self.cpu_s is not None else None,
+            'linhas': self.linhas,
+        }
+        if self.pico_memoria_kb is not None:
+            dados['pico_memoria_kb'] = round(self.pico_memoria_kb, 1)
+        if self.perfil:
+            dados['perfil'] = self.perfil
+        if self.atributos:
+            dados['atributos'] = self.atributos
+        if self.filhos:
+            dados['filhos'] = [filho.como_dict(origem) for filho in self.filhos]
+        return dados
+
+
+class Instrumentacao:
+    # cpu_s e o tempo de CPU do processo inteiro (inclui threads de exportacao em paralelo).
+    # Memoria: o pico do tracemalloc e global, entao so os spans da thread principal medem memoria;
+    # cada span reinicia o pico ao abrir e repassa o seu ao span pai ao fechar.
+    # cProfile so perfila a thread que abriu o span, e um perfil por vez
+
+    def __init__(self, ativo: bool = True, memoria: bool = False, perfilar: Iterable[str] = (),
+                 dir_perfis: str = "perfis"):
+        self.ativo = ativo
+        self.memoria = ativo and memoria
+        self.perfilar = set(perfilar or ())
+        self.dir_perfis = dir_perfis
+        self.raiz = Span('execucao')
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._perfil_em_uso = False
+        self._iniciado_em = datetime.now()
+        self._origem = time.perf_counter()
+        self._cpu_origem = time.process_time()
+        self.raiz.inicio = self._origem
+        if self.memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _pilha(self) -> List[Span]:
+        pilha = getattr(self._local, 'pilha', None)
+        if pilha is None:
+            pilha = self._local.pilha = []
+        return pilha
+
+    def atual(self) -> Span:
+        # Span aberto mais interno desta thread; para abrir filhos em outra thread, passe-o como `pai`
+        pilha = self._pilha()
+        return pilha[-1] if pilha else self.raiz
+
+    def _iniciar_perfil(self, nome: str) -> Optional[cProfile.Profile]:
+        if nome not in self.perfilar:
+            return None
+        with self._lock:
+            if self._perfil_em_uso:
+                return None
+            self._perfil_em_uso = True
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:
+            # Outro profiler ja ativo no interpretador (ex.: python -m cProfile main.py)
+            with self._lock:
+                self._perfil_em_uso = False
+            return None
+        return perfil
+
+    def _salvar_perfil(self, perfil: cProfile.Profile, span: Span) -> None:
+        perfil.disable()
+        os.makedirs(self.dir_perfis, exist_ok=True)
+        caminho = os.path.join(self.dir_perfis, f"{span.nome}.prof")
+        perfil.dump_stats(caminho)
+        span.perfil = caminho
+        with self._lock:
+            self._perfil_em_uso = False
+
+    @contextmanager
+    def span(self, nome: str, pai: Span = None, **atributos) -> Iterator[Span]:
+        atual = Span(nome, atributos)
+        if not self.ativo:
+            yield atual
+            return
+
+        pai = pai or self.atual()
+        with self._lock:
+            pai.filhos.append(atual)
+
+        medir_memoria = self.memoria and threading.current_thread() is threading.main_thread()
+        if medir_memoria:
+            memoria, pico = tracemalloc.get_traced_memory()
+            pai._pico = max(pai._pico, pico)
+            tracemalloc.reset_peak()
+            atual._memoria_inicio = atual._pico = memoria
+
+        perfil = self._iniciar_perfil(nome)
+        pilha = self._pilha()
+        pilha.append(atual)
+        atual.inicio = time.perf_counter()
+        cpu_inicio = time.process_time()
+        try:
+            yield atual
+        finally:
+            atual.duracao_s = time.perf_counter() - atual.inicio
+            atual.cpu_s = time.process_time() - cpu_inicio
+            pilha.pop()
+            if perfil is not None:
+                self._salvar_perfil(perfil, atual)
+            if medir_memoria:
+                atual._pico = max(atual._pico, tracemalloc.get_traced_memory()[1])
+                atual.pico_memoria_kb = (atual._pico - atual._memoria_inicio) / 1024
+                pai._pico = max(pai._pico, atual._pico)
+
+    def relatorio(self) -> Dict:
+        duracao = time.perf_counter() - self._origem
+        relatorio = {
+            'iniciado_em': self._iniciado_em.isoformat(timespec='seconds'),
+            'duracao_s': round(duracao, 6),
+            'cpu_s': round(time.process_time() - self._cpu_origem, 6),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'nucleos': os.cpu_count(),
+            'memoria_rastreada': self.memoria,
+        }
+        if self.memoria:
+            relatorio['pico_memoria_kb'] = round(max(self.raiz._pico, tracemalloc.get_traced_memory()[1]) / 1024, 1)
+        relatorio['spans'] = [filho.como_dict(self._origem) for filho in self.raiz.filhos]
+        return relatorio
+
+    def salvar_relatorio(self, caminho: str) -> None:
+        temporario = f"{caminho}.tmp-{os.getpid()}"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(self.relatorio(), f, ensure_ascii=False, indent=2)
+        os.replace(temporario, caminho)
+
+    def exibir_resumo(self) -> None:
+        colunas_memoria = f" {'pico (MB)':>10}" if self.memoria else ""
+        print(f"\n{'Etapa':<44} {'parede (s)':>11} {'CPU (s)':>9} {'linhas':>9}{colunas_memoria}")
+        print('-' * (75 + len(colunas_memoria)))
+
+        def exibir(span: Span, nivel: int) -> None:
+            linhas = f"{span.linhas:>9}" if span.linhas is not None else f"{'':>9}"
+            memoria = ""
+            if self.memoria:
+                memoria = f" {span.pico_memoria_kb / 1024:>10.1f}" if span.pico_memoria_kb is not None else f" {'':>10}"
+            nome = ('  ' * nivel + span.nome)[:44]
+            print(f"{nome:<44} {span.duracao_s or 0:>11.3f} {span.cpu_s or 0:>9.3f} {linhas}{memoria}")
+            for filho in span.filhos:
+                exibir(filho, nivel + 1)
+
+        for span in self.raiz.filhos:
+            exibir(span, 0)
+
+    def finalizar(self) -> None:
+        if self.memoria and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+# Instancia usada pelos modulos; inativa ate configurar_instrumentacao ser chamada (como em main.py)
+_instrumentacao = Instrumentacao(ativo=False)
+
+
+def configurar_instrumentacao(opcoes: Dict = None, output_dir: str = ".") -> Instrumentacao:
+    global _instrumentacao
+    opcoes = opcoes or {}
+    _instrumentacao = Instrumentacao(
+        ativo=opcoes.get("ativo", True),
+        memoria=opcoes.get("memoria", False),
+        perfilar=opcoes.get("perfilar", ()),
+        dir_perfis=os.path.join(output_dir, opcoes.get("dir_perfis", "perfis"))
+    )
+    return _instrumentacao
+
+
+def obter_instrumentacao() -> Instrumentacao:
+    return _instrumentacao
+
+
+def span(nome: str, pai: Span = None, **atributos):
+    return _instrumentacao.span(nome, pai, **atributos)
+
+
+def span_atual() -> Span:
+    return _instrumentacao.atual()
+
+
+if __name__ == "__main__":
+    instr = configurar_instrumentacao({"memoria": True, "perfilar": ["ordenar"]}, "/tmp")
+
+    with span("gerar") as s:
+        dados = [(i * 7919) % 100_003 for i in range(500_000)]
+        s.registrar(linhas=len(dados))
+        with span("ordenar") as filho:
+            ordenados = sorted(dados)
+            filho.registrar(linhas=len(ordenados))
+        with span("copiar", tipo="lista") as filho:
+            copia = list(ordenados) * 2
+            filho.registrar(linhas=len(copia))
+
+    instr.exibir_resumo()
+    print(json.dumps(instr.relatorio(), indent=2)[:600])
+    instr.finalizar()
@@ -1,103 +1,138 @@
 """
 Arquivo Principal - IMDb Top 250 Scraper
-Executa o fluxo completo: scraping, classes, banco de dados e analise.
+Executa o fluxo completo ou so as etapas escolhidas (scrape, load, analyze, export), sem interacao.
 """
 
+import argparse
 import os
 import sys
-import json
+from itertools import islice
+from typing import List, Optional
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from scraping import (
+    ChartPage,
     carregar_config,
-    baixar_html,
     extrair_titulos,
     extrair_filmes_completos,
     exibir_primeiros_titulos,
     exibir_filmes_formatados,
-    carregar_html_local,
-    salvar_html_local
+    carregar_html_local
 )
 from classes import TV, Movie, Series
-from database import DatabaseManager
-from analysis import analise_completa
+from catalog import Catalog
+from serialization import cache_filmes_existe, carregar_cache_filmes, salvar_cache_filmes
+from database import (DatabaseManager, configurar_sqlite, remover_banco, descartar_engine,
+                      caminho_historico, carregar_indice_anos, registrar_anos)
+from analysis import analise_completa, exportar_banco
+from pipeline import executar_pipeline
+from instrumentation import configurar_instrumentacao, span
+from cache import obter_html, hash_conteudo, carregar_manifesto, salvar_manifesto, registrar_pagina, pagina_inalterada
 
 
-def executar_exercicio_1_2(config: dict) -> list:
+ETAPAS = ("scrape", "load", "analyze", "export")
+POLITICAS_CACHE = ("auto", "usar", "renovar", "offline")
+
+SAIDA_OK = 0
+SAIDA_ERRO = 1
+SAIDA_SEM_DADOS = 3
+SAIDA_EXPORTACAO_INCOMPLETA = 4
+SAIDA_INTERROMPIDO = 130
+
+
+def _carregar_filmes_do_cache(json_local: str) -> Catalog:
+    # Le o cache binario direto para as colunas do catalogo (o JSON so se o .bin faltar)
+    with span("cache_leitura") as etapa:
+        catalogo = carregar_cache_filmes(json_local)
+        etapa.registrar(linhas=len(catalogo))
+    print(f"Carregados {len(catalogo)} filmes do cache '{json_local}'.")
+    exibir_primeiros_titulos([item.title for item in catalogo[:10]], 10)
+    exibir_filmes_formatados(list(islice(catalogo.registros(), 5)), 5)
+    return catalogo
+
+
+def executar_exercicio_1_2(config: dict, html: str = None, indice_path: str = None,
+                           politica_cache: str = "auto", baixar: bool = True) -> Optional[Catalog]:
+    # politica_cache (ver POLITICAS_CACHE): de onde vem os filmes, sem perguntar nada no terminal.
+    # baixar=False: quem chamou ja tentou o download (html=None e a falha), entao vai direto para
+    # o HTML local e o cache. Retorna None se nao houver pagina nem cache utilizavel
     print("\n" + "="*60)
     print("EXERCICIOS 1 e 2: WEB SCRAPING")
     print("="*60)
     
     url = config.get("url", "https://www.imdb.com/chart/top/")
     n_filmes = config.get("n_filmes", 250)
+    parser = config.get("parser", "auto")
     
     print(f"\nURL: {url}")
     print(f"Numero maximo de filmes: {n_filmes}")
+    print(f"Politica de cache: {politica_cache}")
     
     json_local = "filmes_extraidos.json"
     html_local = "imdb_top250.html"
     
-    if os.path.exists(json_local):
-        print(f"\nEncontrado arquivo '{json_local}' com dados ja extraidos.")
-        resposta = input("Usar dados existentes? (s/n): ").strip().lower()
-        if resposta == 's':
-            with open(json_local, 'r', encoding='utf-8') as f:
-                filmes = json.load(f)
-            print(f"Carregados {len(filmes)} filmes do arquivo JSON.")
-            titulos = [f['titulo'] for f in filmes]
-            exibir_primeiros_titulos(titulos, 10)
-            exibir_filmes_formatados(filmes, 5)
-            return filmes
-    
+    if politica_cache in ("usar", "offline") and cache_filmes_existe(json_local):
+        return _carregar_filmes_do_cache(json_local)
+    
+    if html is None and baixar and politica_cache != "offline":
+        try:
+            with span("download"):
+                html = obter_html(config, html_local)
+        except Exception as e:
+            print(f"\nErro ao obter a pagina: {e}")
+    if html is None and os.path.exists(html_local):
+        print(f"Carregando HTML local de '{html_local}'...")
+        html = carregar_html_local(html_local)
+    
+    if html is None:
+        if politica_cache == "auto" and cache_filmes_existe(json_local):
+            print("Pagina indisponivel; usando os filmes extraidos na ultima execucao.")
+            return _carregar_filmes_do_cache(json_local)
+        print(f"\nNenhuma fonte de dados. Salve a pagina {url} como '{html_local}' "
+              f"ou execute com --cache usar se houver '{json_local}'.")
+        return None
+    
+    print(f"HTML carregado com sucesso! ({len(html)} caracteres)")
+    
+    indice_anos = carregar_indice_anos(indice_path) if indice_path else None
     try:
-        if os.path.exists(html_local):
-            print(f"\nCarregando HTML local de '{html_local}'...")
-            html = carregar_html_local(html_local)
-        else:
-            print("\nBaixando pagina do IMDb Top 250...")
-            html = baixar_html(url)
-            salvar_html_local(html, html_local)
-        
-        print(f"HTML carregado com sucesso! ({len(html)} caracteres)")
-        
-        print("\n--- Exercicio 1: Extracao de titulos ---")
-        titulos = extrair_titulos(html, n_filmes)
-        print(f"Total de titulos extraidos: {len(titulos)}")
-        exibir_primeiros_titulos(titulos, 10)
-        
-        print("\n--- Exercicio 2: Extracao de titulo, ano e nota ---")
-        filmes = extrair_filmes_completos(html, n_filmes)
-        print(f"Total de filmes com dados completos: {len(filmes)}")
-        exibir_filmes_formatados(filmes, 5)
-        
-        with open(json_local, 'w', encoding='utf-8') as f:
-            json.dump(filmes, f, ensure_ascii=False, indent=2)
-        print(f"\nDados salvos em '{json_local}'")
-        
-        return filmes
-        
+        with span("parse") as etapa:
+            chart = ChartPage(html, parser)
+            titulos = extrair_titulos(chart, n_filmes)
+            filmes = extrair_filmes_completos(chart, n_filmes, indice_anos=indice_anos)
+            etapa.registrar(linhas=len(filmes), parser=chart.parser, fonte=chart.fonte)
     except Exception as e:
         print(f"\nERRO DURANTE O SCRAPING: {e}")
-        print("\nSalve a pagina https://www.imdb.com/chart/top/ como 'imdb_top250.html'")
-        
-        input("\nPressione ENTER apos salvar o arquivo HTML...")
-        
-        if os.path.exists(html_local):
-            html = carregar_html_local(html_local)
-            titulos = extrair_titulos(html, n_filmes)
-            filmes = extrair_filmes_completos(html, n_filmes)
-            
-            exibir_primeiros_titulos(titulos, 10)
-            exibir_filmes_formatados(filmes, 5)
-            
-            with open(json_local, 'w', encoding='utf-8') as f:
-                json.dump(filmes, f, ensure_ascii=False, indent=2)
-            
-            return filmes
-        else:
-            print(f"\nArquivo '{html_local}' nao encontrado.")
-            sys.exit(1)
+        return None
+    print(f"Parser HTML: {chart.parser}")
+    
+    if not filmes:
+        # Pagina sem ranking (bloqueio, layout novo): o cache da execucao anterior nao e sobrescrito
+        print("\nNenhum filme encontrado na pagina.")
+        return None
+    
+    print("\n--- Exercicio 1: Extracao de titulos ---")
+    print(f"Total de titulos extraidos: {len(titulos)}")
+    exibir_primeiros_titulos(titulos, 10)
+    
+    print("\n--- Exercicio 2: Extracao de titulo, ano e nota ---")
+    print(f"Total de filmes com dados completos: {len(filmes)}")
+    exibir_filmes_formatados(filmes, 5)
+    
+    if indice_path:
+        with span("indice_anos") as etapa:
+            novos = registrar_anos(indice_path, filmes)
+            etapa.registrar(linhas=novos)
+        print(f"Indice titulo -> ano: {novos} titulos novos ou corrigidos")
+    
+    with span("cache_gravacao") as etapa:
+        catalogo = Catalog.de_registros(filmes)
+        salvar_cache_filmes(catalogo, json_local)
+        etapa.registrar(linhas=len(catalogo))
+    print(f"\nDados salvos em '{json_local}'")
+    
+    return catalogo
 
 
 def executar_exercicio_3_4():
@@ -122,23 +157,16 @@ def executar_exercicio_3_4():
     print(f"  - Series e subclasse de TV: {issubclass(Series, TV)}")
 
 
-def executar_exercicio_5(filmes_dados: list) -> list:
+def executar_exercicio_5(filmes_extraidos: Catalog) -> Catalog:
     print("\n" + "="*60)
     print("EXERCICIO 5: LISTA DE OBJETOS")
     print("="*60)
     
-    catalog = []
-    
+    # Catalogo colunar indexado: os itens viram objetos Movie/Series so quando acessados
     print("\n--- Criando objetos Movie a partir do scraping ---")
-    for filme in filmes_dados:
-        titulo = filme.get('titulo', filme.get('title', ''))
-        ano = filme.get('ano', filme.get('year'))
-        nota = filme.get('nota', filme.get('rating'))
-        
-        if titulo and ano is not None and nota is not None:
-            movie = Movie(titulo, ano, nota)
-            catalog.append(movie)
-    
+    with span("objetos") as etapa:
+        catalog = filmes_extraidos.completos()
+        etapa.registrar(linhas=len(catalog))
     print(f"Objetos Movie criados: {len(catalog)}")
     
     print("\n--- Criando objetos Series ficticios ---")
@@ -163,7 +191,7 @@ def executar_exercicio_5(filmes_dados: list) -> list:
     return catalog
 
 
-def executar_exercicio_6(catalog: list, db_path: str):
+def executar_exercicio_6(catalog: Catalog, db_path: str, incremental: bool = False, marcar_ausentes: bool = False):
     print("\n" + "="*60)
     print("EXERCICIO 6: BANCO DE DADOS")
     print("="*60)
@@ -171,46 +199,201 @@ def executar_exercicio_6(catalog: list, db_path: str):
     db = DatabaseManager(db_path)
     db.conectar()
     
+    # Particoes do catalogo: sem varrer a lista inteira com isinstance para cada tipo
+    filmes = ({'title': item.title, 'year': item.year, 'rating': item.rating} for item in catalog.filmes())
+    series = (
+        {'title': item.title, 'year': item.year, 'seasons': item.seasons, 'episodes': item.episodes}
+        for item in catalog.series()
+    )
+    
+    if incremental:
+        print("\n--- Sincronizando filmes no banco (modo incremental) ---")
+        with span("sincronizacao_filmes") as etapa:
+            resultado = db.sincronizar_filmes(filmes, marcar_ausentes)
+            etapa.registrar(linhas=resultado['recebidos'])
+        print(f"Filmes: {resultado['inseridos']} novos, {resultado['atualizados']} com nota alterada, "
+              f"{resultado['inalterados']} inalterados, {resultado['ausentes']} fora do ranking")
+        
+        print("\n--- Sincronizando series no banco (modo incremental) ---")
+        with span("sincronizacao_series") as etapa:
+            resultado = db.sincronizar_series(series, marcar_ausentes)
+            etapa.registrar(linhas=resultado['recebidos'])
+        print(f"Series: {resultado['inseridos']} novas, {resultado['atualizados']} alteradas, "
+              f"{resultado['inalterados']} inalteradas, {resultado['ausentes']} fora do ranking")
+        return db
+    
     print("\n--- Inserindo filmes no banco ---")
-    filmes_inseridos = 0
-    for item in catalog:
-        if isinstance(item, Movie) and not isinstance(item, Series):
-            try:
-                sucesso = db.inserir_filme(item.title, item.year, item.rating)
-                if sucesso:
-                    filmes_inseridos += 1
-            except Exception as e:
-                print(f"Erro ao inserir '{item.title}': {e}")
-    
-    print(f"Filmes inseridos: {filmes_inseridos}")
+    with span("insercao_filmes") as etapa:
+        resultado = db.inserir_filmes_bulk(filmes)
+        etapa.registrar(linhas=resultado['inseridos'])
+    print(f"Filmes inseridos: {resultado['inseridos']} (duplicados ignorados: {resultado['ignorados']})")
     
     print("\n--- Inserindo series no banco ---")
-    series_inseridas = 0
-    for item in catalog:
-        if isinstance(item, Series):
-            try:
-                sucesso = db.inserir_serie(item.title, item.year, item.seasons, item.episodes)
-                if sucesso:
-                    series_inseridas += 1
-            except Exception as e:
-                print(f"Erro ao inserir '{item.title}': {e}")
-    
-    print(f"Series inseridas: {series_inseridas}")
+    with span("insercao_series") as etapa:
+        resultado = db.inserir_series_bulk(series)
+        etapa.registrar(linhas=resultado['inseridos'])
+    print(f"Series inseridas: {resultado['inseridos']} (duplicadas ignoradas: {resultado['ignorados']})")
     
     return db
 
 
-def executar_exercicio_7_8_9_10(db_path: str, output_dir: str):
+def executar_exercicio_7_8_9_10(db_path: str, output_dir: str, tamanho_chunk: int = None,
+                                exportacao: dict = None, exportar: bool = True):
     print("\n" + "="*60)
     print("EXERCICIOS 7, 8, 9 e 10: ANALISE DE DADOS")
     print("="*60)
     
-    df_filmes, df_series = analise_completa(db_path, output_dir)
+    df_filmes, df_series = analise_completa(db_path, output_dir, tamanho_chunk, exportacao, exportar)
     
     return df_filmes, df_series
 
 
-def main():
+def executar_exportacao(db_path: str, output_dir: str, exportacao: dict = None) -> List[str]:
+    # Retorna os arquivos que falharam (lista vazia = tudo exportado)
+    print("\n" + "="*60)
+    print("EXPORTACAO")
+    print("="*60)
+    
+    resultados = exportar_banco(db_path, output_dir, exportacao)
+    if not resultados:
+        return ["(nenhum arquivo exportado)"]
+    return [caminho for caminho, ok in resultados.items() if not ok]
+
+
+def criar_parser_argumentos() -> argparse.ArgumentParser:
+    argumentos = argparse.ArgumentParser(
+        description="IMDb Top 250: scraping, carga no banco, analise e exportacao",
+        epilog="Sem etapas, executa o fluxo completo (com a demonstracao das classes). Codigos de saida: "
+               f"{SAIDA_OK} ok, {SAIDA_ERRO} erro, 2 argumentos invalidos, {SAIDA_SEM_DADOS} sem dados de entrada "
+               f"(pagina, cache ou banco), {SAIDA_EXPORTACAO_INCOMPLETA} exportacao incompleta, "
+               f"{SAIDA_INTERROMPIDO} interrompido."
+    )
+    argumentos.add_argument("etapas", nargs="*", metavar="etapa",
+                            help=f"etapas a executar, em qualquer ordem: {', '.join(ETAPAS)}")
+    argumentos.add_argument("--cache", choices=POLITICAS_CACHE, default="auto",
+                            help="auto: processa a pagina (cache HTTP) e usa os filmes extraidos so se ela "
+                                 "estiver indisponivel; usar: filmes extraidos, se existirem, sem baixar nem "
+                                 "processar a pagina; renovar: revalida a pagina e reprocessa mesmo sem mudancas; "
+                                 "offline: sem rede (filmes extraidos ou HTML salvo)")
+    argumentos.add_argument("--modo-banco", choices=("recriar", "incremental"), default=None,
+                            help="sobrepoe banco.modo do config.json na etapa load")
+    argumentos.add_argument("--demo", action="store_true",
+                            help="inclui a demonstracao das classes (exercicios 3 e 4)")
+    argumentos.add_argument("--config", default=None, help="arquivo de configuracao (padrao: config.json do projeto)")
+    return argumentos
+
+
+def _etapas_selecionadas(nomes: List[str], argumentos: argparse.ArgumentParser) -> List[str]:
+    invalidas = [nome for nome in nomes if nome not in ETAPAS]
+    if invalidas:
+        argumentos.error(f"etapa(s) invalida(s): {', '.join(invalidas)} (use {', '.join(ETAPAS)})")
+    return [etapa for etapa in ETAPAS if etapa in nomes] or list(ETAPAS)
+
+
+def executar_etapas(config: dict, etapas: List[str], politica_cache: str, incremental: bool,
+                    demo: bool, db_path: str, output_dir: str, indice_path: str) -> int:
+    url = config.get("url", "https://www.imdb.com/chart/top/")
+    n_filmes = config.get("n_filmes", 250)
+    pipeline_ativo = config.get("pipeline", {}).get("ativo", False)
+    marcar_ausentes = config.get("banco", {}).get("marcar_ausentes", False)
+    manifesto_path = os.path.join(output_dir, "manifesto_ingestao.json")
+    manifesto = carregar_manifesto(manifesto_path)
+    json_local = "filmes_extraidos.json"
+    
+    if politica_cache == "renovar":
+        # TTL zero: o cache HTTP revalida a pagina (requisicao condicional) em vez de servir a copia
+        config = {**config, "cache": {**config.get("cache", {}), "ttl_segundos": 0}}
+    
+    codigo = SAIDA_OK
+    html = None
+    hash_pagina = None
+    baixar = "scrape" in etapas and politica_cache not in ("usar", "offline")
+    download_tentado = baixar and not pipeline_ativo
+    if download_tentado:
+        try:
+            with span("download"):
+                html = obter_html(config, "imdb_top250.html")
+            hash_pagina = hash_conteudo(html)
+        except Exception as e:
+            print(f"Erro ao obter pagina: {e}")
+    
+    if "load" in etapas and politica_cache != "renovar" and hash_pagina \
+            and pagina_inalterada(manifesto, url, hash_pagina, n_filmes, db_path):
+        # Mesmo conteudo da ultima execucao: parsing e carga do banco seriam identicos
+        print(f"\nPagina inalterada desde a ultima execucao (sha256 {hash_pagina[:12]}).")
+        print("Parsing e carga do banco ignorados (use --cache renovar para reprocessar).")
+    elif "scrape" in etapas or "load" in etapas:
+        recriar_banco = "load" in etapas and not incremental
+        if pipeline_ativo and baixar and "load" in etapas:
+            if recriar_banco and remover_banco(db_path):
+                print(f"Banco de dados anterior removido.")
+            # Download, parsing e gravacao sobrepostos em vez de sequenciais
+            with span("pipeline"):
+                executar_pipeline(config, db_path, indice_path=indice_path,
+                                  incremental=incremental, marcar_ausentes=marcar_ausentes)
+        else:
+            if "scrape" in etapas:
+                with span("scraping"):
+                    # Download que falhou acima nao e repetido: cai direto no HTML local ou no cache
+                    filmes_dados = executar_exercicio_1_2(config, html, indice_path, politica_cache,
+                                                          baixar=not download_tentado)
+            elif cache_filmes_existe(json_local):
+                # So a carga: os filmes extraidos por uma execucao anterior da etapa scrape
+                filmes_dados = _carregar_filmes_do_cache(json_local)
+            else:
+                print(f"\nCache '{json_local}' nao encontrado: execute a etapa scrape antes da load.")
+                filmes_dados = None
+            
+            if filmes_dados is None:
+                return SAIDA_SEM_DADOS
+            
+            if demo:
+                executar_exercicio_3_4()
+            
+            if "load" in etapas:
+                # O banco anterior so e removido com os filmes novos em maos: um scraping que falha nao o apaga
+                if recriar_banco and remover_banco(db_path):
+                    print(f"Banco de dados anterior removido.")
+                
+                catalog = executar_exercicio_5(filmes_dados)
+                
+                with span("banco"):
+                    db = executar_exercicio_6(catalog, db_path, incremental, marcar_ausentes)
+                
+                if hash_pagina is not None:
+                    # Filmes relidos do cache sao uma captura antiga: registra-los criaria um ponto
+                    # falso, com a data de agora, nas trajetorias de nota
+                    with span("snapshot_notas") as etapa:
+                        run_id = db.registrar_execucao(filmes_dados.registros(), url, hash_pagina)
+                        etapa.registrar(linhas=len(filmes_dados))
+                    print(f"\nSnapshot de notas e posicoes registrado (execucao #{run_id})")
+                    
+                    registrar_pagina(manifesto, url, hash_pagina, n_filmes, os.path.abspath(json_local))
+                    salvar_manifesto(manifesto_path, manifesto)
+    
+    if ("analyze" in etapas or "export" in etapas) and not os.path.exists(db_path):
+        print(f"\nBanco '{db_path}' nao encontrado: execute a etapa load antes.")
+        return SAIDA_SEM_DADOS
+    
+    if "analyze" in etapas:
+        with span("analise"):
+            executar_exercicio_7_8_9_10(db_path, output_dir, config.get("analise", {}).get("tamanho_chunk"),
+                                        config.get("exportacao"), exportar=False)
+    
+    if "export" in etapas:
+        falhas = executar_exportacao(db_path, output_dir, config.get("exportacao"))
+        if falhas:
+            print(f"\nExportacao incompleta: {', '.join(falhas)}")
+            codigo = SAIDA_EXPORTACAO_INCOMPLETA
+    
+    return codigo
+
+
+def main(argv: List[str] = None) -> int:
+    argumentos = criar_parser_argumentos()
+    args = argumentos.parse_intermixed_args(argv)
+    etapas = _etapas_selecionadas(args.etapas, argumentos)
+    
     print("\n" + "#"*60)
     print("#" + "   IMDb Top 250 - Projeto AT".center(58) + "#")
     print("#"*60)
@@ -218,42 +401,64 @@ def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))
     project_dir = os.path.dirname(script_dir)
     
-    config_path = os.path.join(project_dir, "config.json")
+    config_path = args.config or os.path.join(project_dir, "config.json")
     db_path = os.path.join(project_dir, "data", "imdb.db")
     output_dir = os.path.join(project_dir, "data")
+    indice_path = os.path.join(output_dir, "indice_anos.db")
     
     os.makedirs(output_dir, exist_ok=True)
     
-    # Remover banco antigo para recriar
-    if os.path.exists(db_path):
-        os.remove(db_path)
-        print(f"Banco de dados anterior removido.")
-    
     print("\n--- Carregando configuracao ---")
     config = carregar_config(config_path)
+    if not config:
+        print(f"Configuracao '{config_path}' invalida ou ausente.")
+        return SAIDA_ERRO
     print(f"URL: {config.get('url')}")
     print(f"Numero de filmes: {config.get('n_filmes')}")
+    print(f"Etapas: {', '.join(etapas)}")
     
-    filmes_dados = executar_exercicio_1_2(config)
-    
-    executar_exercicio_3_4()
-    
-    catalog = executar_exercicio_5(filmes_dados)
+    configurar_sqlite(config.get("sqlite"))
+    opcoes_instrumentacao = config.get("instrumentacao", {})
+    instrumentacao = configurar_instrumentacao(opcoes_instrumentacao, output_dir)
     
-    executar_exercicio_6(catalog, db_path)
-    
-    executar_exercicio_7_8_9_10(db_path, output_dir)
+    modo_banco = args.modo_banco or config.get("banco", {}).get("modo", "recriar")
+    try:
+        codigo = executar_etapas(config, etapas, args.cache, modo_banco == "incremental",
+                                 args.demo or not args.etapas, db_path, output_dir, indice_path)
+    except KeyboardInterrupt:
+        print("\nInterrompido.")
+        codigo = SAIDA_INTERROMPIDO
+    except Exception as e:
+        print(f"\nERRO: {e}")
+        codigo = SAIDA_ERRO
+    finally:
+        # Fecha o pool: o SQLite faz o checkpoint do WAL de volta para o imdb.db
+        descartar_engine(db_path)
+        descartar_engine(caminho_historico(db_path))
+        descartar_engine(indice_path)
     
     print("\n" + "="*60)
-    print("EXECUCAO CONCLUIDA")
+    print("EXECUCAO CONCLUIDA" if codigo == SAIDA_OK else f"EXECUCAO ENCERRADA (codigo {codigo})")
     print("="*60)
-    print(f"\nArquivos gerados em: {output_dir}")
-    print("  - imdb.db (banco de dados SQLite)")
-    print("  - movies.csv")
-    print("  - series.csv")
-    print("  - movies.json")
-    print("  - series.json")
+    if codigo == SAIDA_OK:
+        print(f"\nArquivos gerados em: {output_dir}")
+        if "load" in etapas:
+            print("  - imdb.db (banco de dados SQLite)")
+            print("  - historico.db (execucoes e snapshots de notas)")
+        if "export" in etapas:
+            for formato in config.get("exportacao", {}).get("formatos", ["csv", "json"]):
+                print(f"  - movies.{formato}")
+                print(f"  - series.{formato}")
+    
+    if instrumentacao.ativo:
+        relatorio_path = os.path.join(output_dir, opcoes_instrumentacao.get("relatorio", "relatorio_execucao.json"))
+        instrumentacao.exibir_resumo()
+        instrumentacao.salvar_relatorio(relatorio_path)
+        instrumentacao.finalizar()
+        print(f"\nRelatorio de desempenho: {relatorio_path}")
+    
+    return codigo
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""
+Modulo de Pipeline assincrono de ingestao.
+Download, parsing e gravacao no banco rodam como estagios sobrepostos,
+ligados por filas limitadas (backpressure) para manter a memoria estavel.
+"""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Set
+
+try:
+    from .scraping import ChartPage, extrair_filmes_completos
+    from .crawler import criar_crawler
+    from .cache import criar_cache
+    from .database import DatabaseManager, carregar_indice_anos, registrar_anos
+except ImportError:
+    from scraping import ChartPage, extrair_filmes_completos
+    from crawler import criar_crawler
+    from cache import criar_cache
+    from database import DatabaseManager, carregar_indice_anos, registrar_anos
+
+
+_FIM = None
+
+# Rankings de series (top TV, series populares): os titulos vao para a tabela series, nao para movies
+PADROES_CHART_SERIES = ("/chart/toptv", "/chart/tvmeter")
+
+
+def chart_de_series(url: str) -> bool:
+    return any(padrao in url for padrao in PADROES_CHART_SERIES)
+
+
+def processar_pagina(html: str, n_filmes: int = 250, parser: str = "auto",
+                     indice_path: Optional[str] = None) -> List[Dict]:
+    # Executado no pool de processos: precisa ser uma funcao de modulo. O indice de anos e
+    # carregado uma vez por processo de parsing e reaproveitado nas paginas seguintes
+    indice_anos = carregar_indice_anos(indice_path) if indice_path else None
+    return extrair_filmes_completos(ChartPage(html, parser), n_filmes, indice_anos=indice_anos)
+
+
+async def _estagio_download(crawler, urls: Dict[str, str], fila_html: asyncio.Queue,
+                            n_parsers: int, max_downloads: int) -> None:
+    semaforo = asyncio.Semaphore(max_downloads)
+
+    async def baixar(nome: str, url: str) -> None:
+        async with semaforo:
+            try:
+                html = await asyncio.to_thread(crawler.baixar, url)
+            except Exception as e:
+                print(f"Erro ao baixar '{nome}': {e}")
+                return
+        # Bloqueia aqui quando o parsing esta atrasado (backpressure)
+        await fila_html.put((nome, html))
+
+    await asyncio.gather(*(baixar(nome, url) for nome, url in urls.items()))
+    for _ in range(n_parsers):
+        await fila_html.put(_FIM)
+
+
+async def _estagio_parsing(executor, fila_html: asyncio.Queue, fila_filmes: asyncio.Queue,
+                           n_filmes: int, parser: str, indice_path: Optional[str] = None) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        entrada = await fila_html.get()
+        if entrada is _FIM:
+            break
+        nome, html = entrada
+        del entrada
+        try:
+            filmes = await loop.run_in_executor(executor, processar_pagina, html, n_filmes, parser, indice_path)
+        except Exception as e:
+            print(f"Erro ao processar '{nome}': {e}")
+            continue
+        finally:
+            del html
+        await fila_filmes.put((nome, filmes))
+
+
+def _gravar_incremental(db: DatabaseManager, filmes: List[Dict]) -> int:
+    resultado = db.sincronizar_filmes(filmes)
+    print(f"Filmes sincronizados: {resultado['inseridos']} novos, {resultado['atualizados']} atualizados")
+    return resultado['inseridos'] + resultado['atualizados']
+
+
+def _gravar_series(db: DatabaseManager, titulos: List[Dict]) -> int:
+    # O ranking nao traz temporadas/episodios: so entram as series que faltam, sem apagar dados existentes
+    return db.inserir_series_bulk(titulos)['inseridos']
+
+
+async def _estagio_gravacao(db: DatabaseManager, fila_filmes: asyncio.Queue, n_parsers: int,
+                            incremental: bool = False, indice_path: Optional[str] = None,
+                            charts_series: Set[str] = frozenset(),
+                            marcar_ausentes: bool = False) -> Dict[str, int]:
+    loop = asyncio.get_running_loop()
+    # Um unico thread escritor evita disputa de lock no SQLite
+    escritor = ThreadPoolExecutor(max_workers=1)
+    gravar = (lambda filmes: _gravar_incremental(db, filmes)) if incremental else db.inserir_filmes_em_lote
+    inseridos = {}
+    # Cada chart e sincronizado sozinho; os ausentes so podem ser marcados contra a uniao de todos
+    vistos = [] if incremental and marcar_ausentes else None
+    parsers_ativos = n_parsers
+    try:
+        while parsers_ativos:
+            entrada = await fila_filmes.get()
+            if entrada is _FIM:
+                parsers_ativos -= 1
+                continue
+            nome, filmes = entrada
+            if nome in charts_series:
+                inseridos[nome] = await loop.run_in_executor(escritor, _gravar_series, db, filmes)
+                continue
+            inseridos[nome] = await loop.run_in_executor(escritor, gravar, filmes)
+            if vistos is not None:
+                vistos.extend(filmes)
+            await loop.run_in_executor(escritor, db.registrar_execucao, filmes, nome)
+            if indice_path:
+                await loop.run_in_executor(escritor, registrar_anos, indice_path, filmes)
+        if vistos is not None:
+            resultado = await loop.run_in_executor(escritor, db.sincronizar_filmes, vistos, True)
+            print(f"Filmes fora do ranking: {resultado['ausentes']}")
+    finally:
+        escritor.shutdown(wait=True)
+    return inseridos
+
+
+async def _parser_com_sinal_fim(executor, fila_html, fila_filmes, n_filmes, parser, indice_path=None) -> None:
+    try:
+        await _estagio_parsing(executor, fila_html, fila_filmes, n_filmes, parser, indice_path)
+    finally:
+        await fila_filmes.put(_FIM)
+
+
+def urls_dos_charts(config: dict) -> Dict[str, str]:
+    return config.get("charts") or {"top250": config.get("url", "https://www.imdb.com/chart/top/")}
+
+
+async def executar_pipeline_async(config: dict, db_path: str, urls: Optional[Dict[str, str]] = None,
+                                  indice_path: Optional[str] = None, incremental: bool = False,
+                                  marcar_ausentes: bool = False) -> Dict[str, int]:
+    opcoes = config.get("pipeline", {})
+    tamanho_fila = opcoes.get("tamanho_fila", 4)
+    n_parsers = opcoes.get("workers_parsing", 2)
+    max_downloads = opcoes.get("downloads_simultaneos", config.get("crawler", {}).get("max_workers", 4))
+    n_filmes = config.get("n_filmes", 250)
+    parser = config.get("parser", "auto")
+
+    if urls is None:
+        urls = urls_dos_charts(config)
+
+    db = DatabaseManager(db_path)
+    db.conectar()
+
+    fila_html = asyncio.Queue(maxsize=tamanho_fila)
+    fila_filmes = asyncio.Queue(maxsize=tamanho_fila)
+
+    with criar_crawler(config, criar_cache(config)) as crawler, ProcessPoolExecutor(max_workers=n_parsers) as executor:
+        charts_series = {nome for nome, url in urls.items() if chart_de_series(url)}
+        gravacao = asyncio.ensure_future(
+            _estagio_gravacao(db, fila_filmes, n_parsers, incremental, indice_path, charts_series,
+                              marcar_ausentes))
+        tarefas = [
+            asyncio.ensure_future(_estagio_download(crawler, urls, fila_html, n_parsers, max_downloads)),
+            *(asyncio.ensure_future(_parser_com_sinal_fim(executor, fila_html, fila_filmes, n_filmes,
+                                                          parser, indice_path))
+              for _ in range(n_parsers)),
+            gravacao,
+        ]
+        try:
+            await asyncio.gather(*tarefas)
+        except BaseException:
+            # Se o escritor falha, os parsers ficariam presos na fila_filmes cheia
+            for tarefa in tarefas:
+                tarefa.cancel()
+            raise
+        inseridos = gravacao.result()
+
+    return inseridos
+
+
+def executar_pipeline(config: dict, db_path: str, urls: Optional[Dict[str, str]] = None,
+                      indice_path: Optional[str] = None, incremental: bool = False,
+                      marcar_ausentes: bool = False) -> Dict[str, int]:
+    print("\n" + "="*60)
+    print("PIPELINE ASSINCRONO: DOWNLOAD, PARSING E GRAVACAO")
+    print("="*60)
+
+    if urls is None:
+        urls = urls_dos_charts(config)
+    inseridos = asyncio.run(executar_pipeline_async(config, db_path, urls, indice_path,
+                                                    incremental, marcar_ausentes))
+
+    for nome, total in inseridos.items():
+        print(f"  {nome}: {total} {'series gravadas' if chart_de_series(urls[nome]) else 'filmes gravados'}")
+    return inseridos
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    import time
+
+    try:
+        from .crawler import servir_fixtures
+    except ImportError:
+        from crawler import servir_fixtures
+
+    print("=== Teste do Pipeline contra servidor local ===")
+
+    diretorio = os.path.dirname(os.path.abspath(__file__))
+    with servir_fixtures(diretorio) as base_url, tempfile.TemporaryDirectory() as tmp:
+        config = {
+            "charts": {f"copia_{i}": f"{base_url}/imdb_top250.html" for i in range(8)},
+            "crawler": {"max_workers": 4, "requisicoes_por_segundo": 50},
+            "pipeline": {"tamanho_fila": 2, "workers_parsing": 2},
+            "cache": {"diretorio": os.path.join(tmp, "cache_http")}
+        }
+        inicio = time.perf_counter()
+        executar_pipeline(config, os.path.join(tmp, "imdb.db"), indice_path=os.path.join(tmp, "indice_anos.db"))
+        print(f"\nTempo total: {time.perf_counter() - inicio:.2f}s")
@@ -5,9 +5,11 @@ Exercicios 1 e 2: Extracao de titulos, anos e notas dos filmes.
 
 import requests
 from bs4 import BeautifulSoup
+import importlib
 import json
 import re
-from typing import List, Dict
+from functools import lru_cache
+from typing import IO, Dict, Iterable, Iterator, List, Mapping, Optional, Union
 
 
 def carregar_config(caminho: str = "config.json") -> dict:
@@ -18,26 +20,30 @@ def carregar_config(caminho: str = "config.json") -> dict:
         print(f"Arquivo {caminho} nao encontrado. Usando valores padrao.")
         return {
             "url": "https://www.imdb.com/chart/top/",
-            "n_filmes": 250
+            "n_filmes": 250,
+            "parser": "auto"
         }
     except json.JSONDecodeError as e:
         print(f"Erro ao decodificar JSON: {e}")
         return {
             "url": "https://www.imdb.com/chart/top/",
-            "n_filmes": 250
+            "n_filmes": 250,
+            "parser": "auto"
         }
 
 
-def baixar_html(url: str) -> str:
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-    }
-    
+HEADERS_PADRAO = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+}
+
+
+def baixar_html(url: str, session: requests.Session = None, timeout: float = 30) -> str:
     try:
-        session = requests.Session()
-        response = session.get(url, headers=headers, timeout=30)
+        if session is None:
+            session = requests.Session()
+        response = session.get(url, headers=HEADERS_PADRAO, timeout=timeout)
         response.raise_for_status()
         return response.text
     except requests.RequestException as e:
@@ -45,171 +51,276 @@ def baixar_html(url: str) -> str:
         raise
 
 
-def extrair_titulos(html: str, n_filmes: int = 250) -> List[str]:
-    soup = BeautifulSoup(html, 'html.parser')
-    titulos = []
+_JSON_LD_INICIO = re.compile(r'<script[^>]*type=["\']application/ld\+json["\'][^>]*>', re.IGNORECASE)
+_SCRIPT_FIM = '</script>'
+_TAMANHO_MAX_TAG = 512
+
+
+def iterar_blocos_json_ld(fonte: Union[str, IO[str]], tamanho_chunk: int = 65536) -> Iterator:
+    # Varre o HTML procurando apenas os blocos ld+json, sem montar a arvore DOM.
+    # Aceita o HTML ja em memoria ou um arquivo aberto, lido em pedacos.
+    if isinstance(fonte, str):
+        pos = 0
+        while True:
+            m = _JSON_LD_INICIO.search(fonte, pos)
+            if not m:
+                return
+            fim = fonte.find(_SCRIPT_FIM, m.end())
+            if fim == -1:
+                return
+            pos = fim + len(_SCRIPT_FIM)
+            try:
+                yield json.loads(fonte[m.end():fim])
+            except json.JSONDecodeError:
+                continue
     
-    script_tags = soup.find_all('script', type='application/ld+json')
+    buffer = ''
+    partes_bloco = None
+    for chunk in iter(lambda: fonte.read(tamanho_chunk), ''):
+        buffer += chunk
+        while buffer:
+            if partes_bloco is None:
+                m = _JSON_LD_INICIO.search(buffer)
+                if not m:
+                    # Manter apenas o final, que pode conter uma tag incompleta
+                    inicio_tag = buffer.rfind('<', max(len(buffer) - _TAMANHO_MAX_TAG, 0))
+                    buffer = buffer[inicio_tag:] if inicio_tag != -1 else ''
+                    break
+                buffer = buffer[m.end():]
+                partes_bloco = []
+            fim = buffer.find(_SCRIPT_FIM)
+            if fim == -1:
+                # Guardar o pedaco do bloco, exceto um possivel '</script' cortado
+                corte = max(len(buffer) - len(_SCRIPT_FIM), 0)
+                partes_bloco.append(buffer[:corte])
+                buffer = buffer[corte:]
+                break
+            partes_bloco.append(buffer[:fim])
+            buffer = buffer[fim + len(_SCRIPT_FIM):]
+            conteudo = ''.join(partes_bloco)
+            partes_bloco = None
+            try:
+                yield json.loads(conteudo)
+            except json.JSONDecodeError:
+                continue
+
+
+_ID_TITULO = re.compile(r'/title/(tt\d+)')
+_NEXT_DATA_INICIO = re.compile(r'<script[^>]*id=["\']__NEXT_DATA__["\'][^>]*>', re.IGNORECASE)
+_ANO = re.compile(r'^\d{4}$')
+
+
+def _id_imdb(url: Optional[str]) -> Optional[str]:
+    m = _ID_TITULO.search(url or '')
+    return m.group(1) if m else None
+
+
+def anos_do_next_data(html: str) -> Dict[str, int]:
+    # O estado inicial da pagina (__NEXT_DATA__) traz os 250 itens com id e ano de lancamento.
+    # O ano fica preso ao id do titulo, nao a posicao de um <span> qualquer no documento
+    m = _NEXT_DATA_INICIO.search(html)
+    if not m:
+        return {}
+    fim = html.find(_SCRIPT_FIM, m.end())
+    try:
+        dados = json.loads(html[m.end():fim if fim != -1 else len(html)])
+        arestas = dados['props']['pageProps']['pageData']['chartTitles']['edges']
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return {}
     
-    for script in script_tags:
+    anos = {}
+    for aresta in arestas:
+        node = (aresta or {}).get('node') or {}
+        ano = (node.get('releaseYear') or {}).get('year')
+        if node.get('id') and isinstance(ano, int):
+            anos[node['id']] = ano
+    return anos
+
+
+def itens_do_json_ld(blocos: Iterable) -> List[Dict]:
+    itens = []
+    for data in blocos:
         try:
-            data = json.loads(script.string)
             if isinstance(data, dict) and data.get('@type') == 'ItemList':
-                items = data.get('itemListElement', [])
-                for item in items[:n_filmes]:
-                    if 'item' in item:
-                        titulo = item['item'].get('name', '')
-                        if titulo:
-                            titulos.append(titulo)
-        except (json.JSONDecodeError, TypeError):
+                for idx, item in enumerate(data.get('itemListElement', [])):
+                    if 'item' not in item:
+                        continue
+                    movie_data = item['item']
+                    nota = None
+                    rating = movie_data.get('aggregateRating', {})
+                    if rating:
+                        nota_valor = rating.get('ratingValue')
+                        if nota_valor is not None:
+                            nota = float(nota_valor)
+                    itens.append({
+                        'rank': idx + 1,
+                        'titulo': movie_data.get('name', ''),
+                        'nota': nota,
+                        'imdb_id': _id_imdb(movie_data.get('url'))
+                    })
+        except (TypeError, ValueError):
             continue
-    
-    if not titulos:
-        movie_items = soup.select('li.ipc-metadata-list-summary-item')
-        for item in movie_items[:n_filmes]:
-            title_elem = item.select_one('h3.ipc-title__text')
-            if title_elem:
-                texto = title_elem.get_text(strip=True)
-                titulo = re.sub(r'^\d+\.\s*', '', texto)
-                if titulo:
-                    titulos.append(titulo)
-    
-    return titulos
+    return itens
 
 
-def extrair_filmes_completos(html: str, n_filmes: int = 250) -> List[Dict]:
-    soup = BeautifulSoup(html, 'html.parser')
-    filmes = []
-    
-    # Extrair todos os anos do HTML usando regex mais abrangente
-    anos_html = []
-    
-    # Buscar anos em spans que contem apenas 4 digitos (anos de 1900-2099)
-    ano_pattern = re.compile(r'>(\d{4})</span>')
-    anos_encontrados = ano_pattern.findall(html)
-    
-    # Filtrar apenas anos validos de filmes (1900-2030)
-    anos_validos = [int(a) for a in anos_encontrados if 1900 <= int(a) <= 2030]
-    
-    # Extrair titulos e notas do JSON-LD
-    script_tags = soup.find_all('script', type='application/ld+json')
-    
-    for script in script_tags:
+# Backends em ordem de preferencia para a selecao automatica
+PARSERS_SUPORTADOS = ('selectolax', 'lxml', 'html.parser')
+_MODULOS_PARSER = {
+    # selectolax >= 1.0 usa o motor lexbor; versoes antigas expoem apenas o modest
+    'selectolax': (('selectolax.lexbor', 'LexborHTMLParser'), ('selectolax.parser', 'HTMLParser')),
+    'lxml': (('lxml.etree', None),),
+}
+
+
+@lru_cache(maxsize=None)
+def _carregar_backend(nome: str):
+    for modulo, atributo in _MODULOS_PARSER.get(nome, ()):
         try:
-            data = json.loads(script.string)
-            if isinstance(data, dict) and data.get('@type') == 'ItemList':
-                items = data.get('itemListElement', [])
-                for idx, item in enumerate(items[:n_filmes]):
-                    if 'item' in item:
-                        movie_data = item['item']
-                        
-                        titulo = movie_data.get('name', '')
-                        titulo = titulo.replace('&apos;', "'").replace('&amp;', '&')
-                        
-                        nota = None
-                        rating = movie_data.get('aggregateRating', {})
-                        if rating:
-                            nota_valor = rating.get('ratingValue')
-                            if nota_valor is not None:
-                                nota = float(nota_valor)
-                        
-                        # Usar ano da lista de anos encontrados
-                        ano = anos_validos[idx] if idx < len(anos_validos) else None
-                        
-                        if titulo:
-                            filmes.append({
-                                'titulo': titulo,
-                                'ano': ano,
-                                'nota': nota
-                            })
-        except (json.JSONDecodeError, TypeError, ValueError):
+            mod = importlib.import_module(modulo)
+            return getattr(mod, atributo) if atributo else mod
+        except ImportError:
             continue
+    return None
+
+
+def parser_disponivel(nome: str) -> bool:
+    return nome == 'html.parser' or _carregar_backend(nome) is not None
+
+
+@lru_cache(maxsize=None)
+def selecionar_parser(preferido: str = "auto") -> str:
+    if preferido != "auto":
+        if parser_disponivel(preferido):
+            return preferido
+        print(f"Parser '{preferido}' indisponivel. Selecionando automaticamente.")
     
-    # Se ainda houver filmes sem ano, preencher com anos conhecidos dos classicos
-    anos_conhecidos = {
-        "The Shawshank Redemption": 1994, "The Godfather": 1972, "The Dark Knight": 2008,
-        "The Godfather Part II": 1974, "12 Angry Men": 1957, "Schindler's List": 1993,
-        "The Lord of the Rings: The Return of the King": 2003, "Pulp Fiction": 1994,
-        "The Lord of the Rings: The Fellowship of the Ring": 2001, "Forrest Gump": 1994,
-        "Fight Club": 1999, "Inception": 2010, "The Matrix": 1999, "Goodfellas": 1990,
-        "Se7en": 1995, "The Silence of the Lambs": 1991, "Saving Private Ryan": 1998,
-        "City of God": 2002, "Interstellar": 2014, "The Green Mile": 1999,
-        "Spirited Away": 2001, "Parasite": 2019, "The Pianist": 2002,
-        "Gladiator": 2000, "The Departed": 2006, "The Prestige": 2006,
-        "Whiplash": 2014, "The Intouchables": 2011, "The Lion King": 1994,
-        "Casablanca": 1942, "Psycho": 1960, "Rear Window": 1954,
-        "Il buono, il brutto, il cattivo": 1966, "The Lord of the Rings: The Two Towers": 2002,
-        "The Usual Suspects": 1995, "Terminator 2: Judgment Day": 1991, "Back to the Future": 1985,
-        "Alien": 1979, "WALL·E": 2008, "Coco": 2017, "American History X": 1998,
-        "Harakiri": 1962, "Once Upon a Time in the West": 1968, "Modern Times": 1936,
-        "Cinema Paradiso": 1988, "Grave of the Fireflies": 1988, "Apocalypse Now": 1979,
-        "Aliens": 1986, "Django Unchained": 2012, "The Shining": 1980, "Paths of Glory": 1957,
-        "WALL-E": 2008, "Memento": 2000, "Princess Mononoke": 1997, "The Lives of Others": 2006,
-        "Oldboy": 2003, "Dr. Strangelove": 1964, "Witness for the Prosecution": 1957,
-        "Citizen Kane": 1941, "North by Northwest": 1959, "Vertigo": 1958, "M": 1931,
-        "Reservoir Dogs": 1992, "Amélie": 2001, "Braveheart": 1995, "A Clockwork Orange": 1971,
-        "Double Indemnity": 1944, "Singin' in the Rain": 1952, "Requiem for a Dream": 2000,
-        "Taxi Driver": 1976, "Lawrence of Arabia": 1962, "Eternal Sunshine of the Spotless Mind": 2004,
-        "2001: A Space Odyssey": 1968, "Full Metal Jacket": 1987, "Toy Story": 1995,
-        "Amadeus": 1984, "To Kill a Mockingbird": 1962, "The Sting": 1973,
-        "Snatch": 2000, "Indiana Jones and the Raiders of the Lost Ark": 1981,
-        "Bicycle Thieves": 1948, "The Apartment": 1960, "Scarface": 1983,
-        "Up": 2009, "Heat": 1995, "Unforgiven": 1992, "Die Hard": 1988,
-        "Rashomon": 1950, "Ikiru": 1952, "Metropolis": 1927, "L.A. Confidential": 1997,
-        "The Hunt": 2012, "Yojimbo": 1961, "A Beautiful Mind": 2001, "Monty Python and the Holy Grail": 1975,
-        "All About Eve": 1950, "The Great Escape": 1963, "Pan's Labyrinth": 2006,
-        "The Secret in Their Eyes": 2009, "Chinatown": 1974, "My Neighbour Totoro": 1988,
-        "Lock, Stock and Two Smoking Barrels": 1998, "Raging Bull": 1980,
-        "The Treasure of the Sierra Madre": 1948, "Howl's Moving Castle": 2004,
-        "Ran": 1985, "Three Billboards Outside Ebbing, Missouri": 2017, "Judgment at Nuremberg": 1961,
-        "The Wolf of Wall Street": 2013, "The Great Dictator": 1940, "No Country for Old Men": 2007,
-        "Dead Poets Society": 1989, "There Will Be Blood": 2007, "Shutter Island": 2010,
-        "The Sixth Sense": 1999, "Kill Bill: Vol. 1": 2003, "A Separation": 2011,
-        "The Elephant Man": 1980, "The Truman Show": 1998, "Harry Potter and the Deathly Hallows: Part 2": 2011,
-        "Warrior": 2011, "The Bridge on the River Kwai": 1957, "Trainspotting": 1996,
-        "V for Vendetta": 2005, "Gone Girl": 2014, "The Thing": 1982, "Gran Torino": 2008,
-        "Blade Runner": 1982, "Inside Out": 2015, "Fargo": 1996, "Blade Runner 2049": 2017,
-        "Wild Strawberries": 1957, "The Third Man": 1949, "On the Waterfront": 1954,
-        "Memories of Murder": 2003, "Room": 2015, "The Seventh Seal": 1957,
-        "Capernaum": 2018, "The Wages of Fear": 1953, "Klaus": 2019,
-        "12 Years a Slave": 2013, "Barry Lyndon": 1975, "Before Sunrise": 1995,
-        "Mr. Smith Goes to Washington": 1939, "Mad Max: Fury Road": 2015, "Gone with the Wind": 1939,
-        "Wild Tales": 2014, "The Exorcist": 1973, "It's a Wonderful Life": 1946,
-        "In the Name of the Father": 1993, "The Big Lebowski": 1998, "Prisoners": 2013,
-        "Network": 1976, "Stand by Me": 1986, "Hotel Rwanda": 2004,
-        "Into the Wild": 2007, "Hacksaw Ridge": 2016, "Rush": 2013,
-        "Platoon": 1986, "Logan": 2017, "Cool Hand Luke": 1967,
-        "Catch Me If You Can": 2002, "Life of Brian": 1979, "Rebecca": 1940,
-        "Stalker": 1979, "How to Train Your Dragon": 2010, "Jurassic Park": 1993,
-        "The Grapes of Wrath": 1940, "Dersu Uzala": 1975, "The General": 1926,
-        "Ben-Hur": 1959, "Persona": 1966, "Mary and Max": 2009,
-        "The Deer Hunter": 1978, "The Passion of Joan of Arc": 1928, "Andrei Rublev": 1966,
-        "Dune": 2021, "Le Mans '66": 2019, "Ford v Ferrari": 2019,
-        "Monty Python's Life of Brian": 1979, "Monsters, Inc.": 2001, "Ratatouille": 2007,
-        "Tokyo Story": 1953, "The Grand Budapest Hotel": 2014, "Portrait of a Lady on Fire": 2019,
-        "The Handmaiden": 2016, "Spotlight": 2015, "The Diving Bell and the Butterfly": 2007,
-        "Paris, Texas": 1984, "La Haine": 1995, "Sunrise": 1927,
-        "Before Sunset": 2004, "In the Mood for Love": 2000, "The Battle of Algiers": 1966,
-        "Rang De Basanti": 2006, "PK": 2014, "Taare Zameen Par": 2007,
-        "Drishyam": 2015, "Dangal": 2016, "3 Idiots": 2009,
-        "Andhadhun": 2018, "Tumbbad": 2018, "Super Deluxe": 2019,
-        "Anand": 1971, "Gangs of Wasseypur": 2012, "Lagaan": 2001,
-        "Oppenheimer": 2023, "Spider-Man: Across the Spider-Verse": 2023, "The Batman": 2022,
-        "Everything Everywhere All at Once": 2022, "Top Gun: Maverick": 2022, "Dune: Part Two": 2024,
-        "Poor Things": 2023, "Past Lives": 2023, "The Holdovers": 2023,
-        "Spider-Man: Into the Spider-Verse": 2018, "Joker": 2019, "1917": 2019,
-        "Knives Out": 2019, "Marriage Story": 2019, "Jojo Rabbit": 2019,
-        "Soul": 2020, "Minari": 2020, "Sound of Metal": 2020,
-        "Come and See": 1985, "Harakiri (Seppuku)": 1962, "High and Low": 1963,
-        "Seven Samurai": 1954, "Sanjuro": 1962, "The Hidden Fortress": 1958,
-        "The Bad Sleep Well": 1960, "Stray Dog": 1949, "Drunken Angel": 1948,
-        "Late Spring": 1949, "Early Summer": 1951, "Good Morning": 1959,
-        "Floating Weeds": 1959, "An Autumn Afternoon": 1962, "The Flavor of Green Tea Over Rice": 1952,
-    }
+    for nome in PARSERS_SUPORTADOS:
+        if parser_disponivel(nome):
+            return nome
+    return 'html.parser'
+
+
+class ChartPage:
+    def __init__(self, html: str, parser: str = "auto"):
+        self.html = html
+        self.parser = selecionar_parser(parser)
+        self._soup = None
+        self.itens = itens_do_json_ld(iterar_blocos_json_ld(html))
+        self.fonte = 'json-ld'
+        if not self.itens:
+            self.itens = self._extrair_itens_dom()
+            self.fonte = 'dom'
+        self._completar_anos()
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        # A arvore DOM so e construida quando o bloco ld+json nao existe
+        if self._soup is None:
+            backend = 'html.parser' if self.parser == 'selectolax' else self.parser
+            self._soup = BeautifulSoup(self.html, backend)
+        return self._soup
+
+    def _extrair_itens_dom(self) -> List[Dict]:
+        if self.parser == 'selectolax':
+            return self._extrair_itens_selectolax()
+        
+        itens = []
+        movie_items = self.soup.select('li.ipc-metadata-list-summary-item')
+        for idx, item in enumerate(movie_items):
+            title_elem = item.select_one('h3.ipc-title__text')
+            if not title_elem:
+                continue
+            texto = title_elem.get_text(strip=True)
+            titulo = re.sub(r'^\d+\.\s*', '', texto)
+            nota = None
+            nota_elem = item.select_one('span.ipc-rating-star--rating')
+            if nota_elem:
+                try:
+                    nota = float(nota_elem.get_text(strip=True))
+                except ValueError:
+                    nota = None
+            # Ano e id lidos dentro do proprio <li>: um ano solto em outro ponto da pagina nao desalinha nada
+            ano = next((int(m.get_text(strip=True)) for m in item.select('span.cli-title-metadata-item')
+                        if _ANO.match(m.get_text(strip=True))), None)
+            link = item.select_one('a[href*="/title/tt"]')
+            itens.append({'rank': idx + 1, 'titulo': titulo, 'nota': nota, 'ano': ano,
+                          'imdb_id': _id_imdb(link.get('href') if link else None)})
+        return itens
+
+    def _extrair_itens_selectolax(self) -> List[Dict]:
+        itens = []
+        arvore = _carregar_backend('selectolax')(self.html)
+        for idx, item in enumerate(arvore.css('li.ipc-metadata-list-summary-item')):
+            title_elem = item.css_first('h3.ipc-title__text')
+            if title_elem is None:
+                continue
+            texto = title_elem.text(strip=True)
+            titulo = re.sub(r'^\d+\.\s*', '', texto)
+            nota = None
+            nota_elem = item.css_first('span.ipc-rating-star--rating')
+            if nota_elem is not None:
+                try:
+                    nota = float(nota_elem.text(strip=True))
+                except ValueError:
+                    nota = None
+            ano = next((int(m.text(strip=True)) for m in item.css('span.cli-title-metadata-item')
+                        if _ANO.match(m.text(strip=True))), None)
+            link = item.css_first('a[href*="/title/tt"]')
+            itens.append({'rank': idx + 1, 'titulo': titulo, 'nota': nota, 'ano': ano,
+                          'imdb_id': _id_imdb(link.attributes.get('href') if link is not None else None)})
+        return itens
+
+    def _completar_anos(self) -> None:
+        # Itens sem ano (o ld+json nao traz) recebem o ano do __NEXT_DATA__ pelo id do titulo
+        if all(item.get('ano') is not None for item in self.itens):
+            return
+        anos_por_id = anos_do_next_data(self.html)
+        for item in self.itens:
+            if item.get('ano') is None:
+                item['ano'] = anos_por_id.get(item.get('imdb_id'))
+
+    @property
+    def titulos(self) -> List[str]:
+        return [item['titulo'] for item in self.itens]
+
+    @property
+    def notas(self) -> List[float]:
+        return [item['nota'] for item in self.itens]
+
+    @property
+    def ranks(self) -> List[int]:
+        return [item['rank'] for item in self.itens]
+
+    @property
+    def anos(self) -> List[Optional[int]]:
+        return [item.get('ano') for item in self.itens]
+
+
+def _obter_chart(html: Union[str, ChartPage], parser: str = "auto") -> ChartPage:
+    return html if isinstance(html, ChartPage) else ChartPage(html, parser)
+
+
+def extrair_titulos(html: Union[str, ChartPage], n_filmes: int = 250, parser: str = "auto") -> List[str]:
+    chart = _obter_chart(html, parser)
+    return [titulo for titulo in chart.titulos[:n_filmes] if titulo]
+
+
+def extrair_filmes_completos(html: Union[str, ChartPage], n_filmes: int = 250,
+                             parser: str = "auto", indice_anos: Mapping[str, int] = None) -> List[Dict]:
+    # indice_anos (titulo -> ano, ver database.carregar_indice_anos) so cobre itens que a pagina deixou sem ano
+    chart = _obter_chart(html, parser)
+    indice_anos = indice_anos or {}
+    filmes = []
     
-    for filme in filmes:
-        if filme['ano'] is None and filme['titulo'] in anos_conhecidos:
-            filme['ano'] = anos_conhecidos[filme['titulo']]
+    for item in chart.itens[:n_filmes]:
+        titulo = item['titulo'].replace('&apos;', "'").replace('&amp;', '&')
+        if titulo:
+            ano = item.get('ano')
+            filmes.append({
+                'titulo': titulo,
+                'ano': ano if ano is not None else indice_anos.get(titulo),
+                'nota': item['nota']
+            })
     
     return filmes
 
@@ -245,6 +356,7 @@ def carregar_html_local(caminho: str = "imdb_top250.html") -> str:
 
 if __name__ == "__main__":
     import os
+    from cache import obter_html
     
     config_path = "config.json"
     if os.path.exists("../config.json"):
@@ -253,6 +365,7 @@ if __name__ == "__main__":
     config = carregar_config(config_path)
     url = config.get("url", "https://www.imdb.com/chart/top/")
     n_filmes = config.get("n_filmes", 250)
+    parser = config.get("parser", "auto")
     
     print("\n" + "#"*60)
     print("# IMDb Top 250 - Web Scraping")
@@ -263,21 +376,18 @@ if __name__ == "__main__":
     html_local = "imdb_top250.html"
     
     try:
-        if os.path.exists(html_local):
-            print(f"\nCarregando HTML local de '{html_local}'...")
-            html = carregar_html_local(html_local)
-        else:
-            print("\nBaixando pagina do IMDb Top 250...")
-            html = baixar_html(url)
-            salvar_html_local(html, html_local)
+        html = obter_html(config, html_local)
         
         print(f"HTML carregado com sucesso! ({len(html)} caracteres)")
         
-        titulos = extrair_titulos(html, n_filmes)
+        chart = ChartPage(html, parser)
+        print(f"Parser HTML: {chart.parser}")
+        
+        titulos = extrair_titulos(chart, n_filmes)
         print(f"\nTotal de titulos extraidos: {len(titulos)}")
         exibir_primeiros_titulos(titulos, 10)
         
-        filmes = extrair_filmes_completos(html, n_filmes)
+        filmes = extrair_filmes_completos(chart, n_filmes)
         print(f"\nTotal de filmes com dados completos: {len(filmes)}")
         exibir_filmes_formatados(filmes, 5)
         
@@ -0,0 +1,167 @@
+"""
+Modulo de Serializacao do catalogo.
+Cache de filmes extraidos em JSON (orjson quando instalado) e em formato binario colunar.
+"""
+
+import json
+import os
+import struct
+import sys
+from array import array
+from typing import Iterable, Type
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from .classes import CatalogoColunar, _TitulosCompactos
+    from .catalog import Catalog
+except ImportError:
+    from classes import CatalogoColunar, _TitulosCompactos
+    from catalog import Catalog
+
+
+# Layout binario (little-endian): cabecalho, uma coluna por vez (bytes crus de cada array), o fim
+# de cada titulo (int64) e o buffer UTF-8 dos titulos, no mesmo formato de _TitulosCompactos.
+# Ler e um frombytes por coluna e uma copia do buffer, sem decodificar nenhum titulo
+_MAGICO = b'IMDBCAT2'
+_CABECALHO = struct.Struct('<8sIQ')  # magico, numero de itens, bytes dos titulos
+_COLUNAS = (('_tipos', 'b'), ('_anos', 'h'), ('_notas_x10', 'h'), ('_temporadas', 'h'), ('_episodios', 'i'))
+
+
+def _caminho_binario(caminho_json: str) -> str:
+    return os.path.splitext(caminho_json)[0] + '.bin'
+
+
+def _gravar_atomico(caminho: str, dados: bytes) -> None:
+    temporario = f"{caminho}.tmp-{os.getpid()}"
+    try:
+        with open(temporario, 'wb') as f:
+            f.write(dados)
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+
+def _bytes_le(coluna: array) -> bytes:
+    if sys.byteorder == 'big':
+        coluna = array(coluna.typecode, coluna)
+        coluna.byteswap()
+    return coluna.tobytes()
+
+
+def codificar_catalogo(catalogo: CatalogoColunar) -> bytes:
+    titulos = catalogo._titulos
+    partes = [_CABECALHO.pack(_MAGICO, len(catalogo), len(titulos._dados))]
+    partes.extend(_bytes_le(getattr(catalogo, nome)) for nome, _ in _COLUNAS)
+    partes.append(_bytes_le(titulos._fins))
+    partes.append(bytes(titulos._dados))
+    return b''.join(partes)
+
+
+def decodificar_catalogo(dados: bytes, classe: Type[CatalogoColunar] = Catalog) -> CatalogoColunar:
+    magico, n, tamanho_titulos = _CABECALHO.unpack_from(dados)
+    if magico != _MAGICO:
+        raise ValueError("Arquivo nao e um cache binario de catalogo")
+
+    catalogo = classe()
+    visao = memoryview(dados)
+    pos = _CABECALHO.size
+    colunas = {}
+    for nome, tipo in _COLUNAS + (('_fins', 'q'),):
+        coluna = array(tipo)
+        tamanho = n * coluna.itemsize
+        if len(visao) < pos + tamanho:
+            raise ValueError("Cache binario truncado ou corrompido")
+        coluna.frombytes(visao[pos:pos + tamanho])
+        if sys.byteorder == 'big':
+            coluna.byteswap()
+        colunas[nome] = coluna
+        pos += tamanho
+
+    fins = colunas.pop('_fins')
+    if len(visao) != pos + tamanho_titulos or (n and fins[-1] != tamanho_titulos):
+        raise ValueError("Cache binario truncado ou corrompido")
+    for nome, coluna in colunas.items():
+        setattr(catalogo, nome, coluna)
+    catalogo._titulos = _TitulosCompactos.de_buffer(visao[pos:], fins)
+    catalogo._reindexar()
+    return catalogo
+
+
+def salvar_catalogo_binario(catalogo: CatalogoColunar, caminho: str) -> None:
+    _gravar_atomico(caminho, codificar_catalogo(catalogo))
+
+
+def carregar_catalogo_binario(caminho: str, classe: Type[CatalogoColunar] = Catalog) -> CatalogoColunar:
+    with open(caminho, 'rb') as f:
+        return decodificar_catalogo(f.read(), classe)
+
+
+def salvar_registros_json(registros: Iterable[dict], caminho: str) -> None:
+    # Mesmo formato do json.dump(indent=2) em modo texto usado desde o Exercicio 2: o arquivo e
+    # versionado, entao uma nova extracao so muda as linhas dos filmes que mudaram
+    registros = list(registros)
+    if orjson is not None:
+        dados = orjson.dumps(registros, option=orjson.OPT_INDENT_2)
+    else:
+        dados = json.dumps(registros, ensure_ascii=False, indent=2).encode('utf-8')
+    if os.linesep != '\n':
+        dados = dados.replace(b'\n', os.linesep.encode('ascii'))
+    _gravar_atomico(caminho, dados)
+
+
+def carregar_catalogo_json(caminho: str, classe: Type[CatalogoColunar] = Catalog) -> CatalogoColunar:
+    with open(caminho, 'rb') as f:
+        dados = f.read()
+    registros = orjson.loads(dados) if orjson is not None else json.loads(dados)
+    return classe.de_registros(registros)
+
+
+def salvar_cache_filmes(catalogo: CatalogoColunar, caminho_json: str) -> None:
+    # O JSON continua sendo o formato de troca; o .bin ao lado e o que a proxima execucao le
+    salvar_registros_json(catalogo.registros(), caminho_json)
+    salvar_catalogo_binario(catalogo, _caminho_binario(caminho_json))
+
+
+def carregar_cache_filmes(caminho_json: str, classe: Type[CatalogoColunar] = Catalog) -> CatalogoColunar:
+    # Usa o .bin se ele nao for mais antigo que o JSON (que pode ter sido editado a mao)
+    caminho_bin = _caminho_binario(caminho_json)
+    if os.path.exists(caminho_bin) and (not os.path.exists(caminho_json)
+                                        or os.path.getmtime(caminho_bin) >= os.path.getmtime(caminho_json)):
+        try:
+            return carregar_catalogo_binario(caminho_bin, classe)
+        except (ValueError, struct.error) as e:
+            print(f"Cache binario invalido ({e}); lendo o JSON.")
+    return carregar_catalogo_json(caminho_json, classe)
+
+
+def cache_filmes_existe(caminho_json: str) -> bool:
+    return os.path.exists(caminho_json) or os.path.exists(_caminho_binario(caminho_json))
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    try:
+        from .classes import Movie, Series
+    except ImportError:
+        from classes import Movie, Series
+
+    catalogo = Catalog([Movie("The Shawshank Redemption", 1994, 9.3), Movie("Amélie", 2001, 8.3),
+                        Movie("Filme sem ano", None, 7.5), Series("Breaking Bad", 2008, 5, 62)])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, "filmes_extraidos.json")
+        salvar_cache_filmes(catalogo, caminho)
+        print(f"Backend JSON: {'orjson' if orjson is not None else 'json'}")
+        print(f"Tamanho JSON: {os.path.getsize(caminho)} bytes, binario: "
+              f"{os.path.getsize(_caminho_binario(caminho))} bytes")
+
+        lido = carregar_cache_filmes(caminho)
+        print(f"\nRecarregado do binario: {lido}")
+        for item in lido:
+            print(f"  {item!r}")
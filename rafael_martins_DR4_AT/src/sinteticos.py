@@ -0,0 +1,134 @@
+"""
+Modulo de Dados sinteticos.
+Gera paginas do ranking do IMDb, registros de filmes, catalogos e bancos de qualquer tamanho
+para os benchmarks, no mesmo formato que o scraping, as classes e o banco consomem.
+"""
+
+import html as html_lib
+import json
+import os
+import random
+from typing import Dict, Iterator
+
+try:
+    from .classes import Series
+    from .catalog import Catalog
+    from .database import DatabaseManager
+except ImportError:
+    from classes import Series
+    from catalog import Catalog
+    from database import DatabaseManager
+
+
+_PALAVRAS = ("Amor", "Guerra", "Noite", "Cidade", "Sombra", "Rei", "Mar", "Fogo", "Estrada", "Silencio",
+             "Cafe", "Coracao", "Destino", "Janela", "Ponte", "Lua", "Tempo", "Segredo", "Jardim", "Vento")
+# Titulos com acento, apostrofo e & exercitam a decodificacao de entidades e a normalizacao
+_ESPECIAIS = ("Amélie", "L'Été", "Crime & Castigo", "São Paulo", "Ça Ira")
+
+
+def _titulo(i: int, sorteio: random.Random) -> str:
+    # O indice no final garante titulos unicos (a tabela movies e unica por titulo + ano)
+    if i % 37 == 0:
+        return f"{_ESPECIAIS[i % len(_ESPECIAIS)]} {i}"
+    return f"{sorteio.choice(_PALAVRAS)} {sorteio.choice(_PALAVRAS)} {i}"
+
+
+def gerar_filmes_sinteticos(n: int, semente: int = 42) -> Iterator[Dict]:
+    # Registros como os de extrair_filmes_completos: notas entre 5.0 e 9.9, anos de 1920 a 2025
+    sorteio = random.Random(semente)
+    for i in range(n):
+        yield {'titulo': _titulo(i, sorteio), 'ano': 1920 + sorteio.randrange(106),
+               'nota': round(sorteio.triangular(5.0, 9.9, 8.0), 1)}
+
+
+def gerar_series_sinteticas(n: int, semente: int = 7) -> Iterator[Dict]:
+    sorteio = random.Random(semente)
+    for i in range(n):
+        yield {'titulo': f"Serie {_titulo(i, sorteio)}", 'ano': 1950 + sorteio.randrange(76),
+               'temporadas': sorteio.randint(1, 15), 'episodios': sorteio.randint(6, 300)}
+
+
+def _item_dom(rank: int, id_imdb: str, titulo: str, ano: int, nota: float) -> str:
+    titulo = html_lib.escape(titulo, quote=False)
+    return (f'<li class="ipc-metadata-list-summary-item"><div class="cli-children">'
+            f'<a href="/title/{id_imdb}/?ref_=chttp_t_{rank}" class="ipc-title-link-wrapper">'
+            f'<h3 class="ipc-title__text">{rank}. {titulo}</h3></a>'
+            f'<div class="cli-title-metadata"><span class="cli-title-metadata-item">{ano}</span>'
+            f'<span class="cli-title-metadata-item">2h 2m</span>'
+            f'<span class="cli-title-metadata-item">R</span></div>'
+            f'<span class="ipc-rating-star--rating">{nota}</span></div></li>')
+
+
+def gerar_html_chart(n: int, json_ld: bool = True, next_data: bool = True, semente: int = 42) -> str:
+    # Pagina com a mesma estrutura da real: bloco ld+json (ItemList sem ano), __NEXT_DATA__ com o
+    # ano por id e a lista DOM. Sem json_ld, o ChartPage cai no caminho DOM
+    filmes = list(gerar_filmes_sinteticos(n, semente))
+    ids = [f"tt{1000000 + i:07d}" for i in range(n)]
+    partes = ['<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>IMDb Top 250</title>']
+
+    if json_ld:
+        lista = {
+            '@context': 'https://schema.org', '@type': 'ItemList',
+            'itemListElement': [
+                {'@type': 'ListItem', 'item': {
+                    '@type': 'Movie', 'url': f"https://www.imdb.com/title/{id_imdb}/",
+                    'name': filme['titulo'].replace("'", '&apos;'),
+                    'aggregateRating': {'@type': 'AggregateRating', 'ratingValue': filme['nota']}}}
+                for id_imdb, filme in zip(ids, filmes)
+            ]
+        }
+        partes.append(f'<script type="application/ld+json">{json.dumps(lista, ensure_ascii=False)}</script>')
+    partes.append('</head><body><ul class="ipc-metadata-list">')
+    partes.extend(_item_dom(rank, id_imdb, filme['titulo'], filme['ano'], filme['nota'])
+                  for rank, (id_imdb, filme) in enumerate(zip(ids, filmes), start=1))
+    partes.append('</ul>')
+
+    if next_data:
+        estado = {'props': {'pageProps': {'pageData': {'chartTitles': {'edges': [
+            {'node': {'id': id_imdb, 'releaseYear': {'year': filme['ano']}}}
+            for id_imdb, filme in zip(ids, filmes)
+        ]}}}}}
+        partes.append(f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(estado)}</script>')
+    partes.append('</body></html>')
+    return ''.join(partes)
+
+
+def gerar_catalogo(n: int, fracao_series: float = 0.02, semente: int = 42) -> Catalog:
+    n_series = int(n * fracao_series)
+    catalogo = Catalog.de_registros(gerar_filmes_sinteticos(n - n_series, semente))
+    for serie in gerar_series_sinteticas(n_series, semente):
+        catalogo.append(Series(serie['titulo'], serie['ano'], serie['temporadas'], serie['episodios']))
+    return catalogo
+
+
+def popular_banco(db_path: str, n_filmes: int, n_series: int = 0, semente: int = 42) -> Dict[str, int]:
+    # Carga em streaming (inserir_filmes_bulk): 10M linhas nao passam por uma lista em memoria
+    db = DatabaseManager(db_path)
+    db.conectar()
+    try:
+        resultado = {'filmes': db.inserir_filmes_bulk(gerar_filmes_sinteticos(n_filmes, semente))['inseridos']}
+        resultado['series'] = db.inserir_series_bulk(gerar_series_sinteticas(n_series, semente))['inseridos']
+    finally:
+        db.fechar()
+    return resultado
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    try:
+        from .scraping import ChartPage, extrair_filmes_completos
+    except ImportError:
+        from scraping import ChartPage, extrair_filmes_completos
+
+    pagina = gerar_html_chart(1000)
+    esperado = list(gerar_filmes_sinteticos(1000))
+    for nome, documento in (("json-ld", pagina), ("dom", gerar_html_chart(1000, json_ld=False))):
+        chart = ChartPage(documento)
+        extraidos = extrair_filmes_completos(chart, 1000)
+        print(f"{nome}: {len(documento) / 1024:.0f} KB, fonte={chart.fonte}, "
+              f"{len(extraidos)} filmes, identico ao gerador: {extraidos == esperado}")
+
+    print(gerar_catalogo(10_000))
+    with tempfile.TemporaryDirectory() as tmp:
+        print(popular_banco(os.path.join(tmp, "sintetico.db"), 10_000, 200))
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Os modulos de src/ sao importados como no main.py (python src/main.py), sem pacote instalado
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
@@ -0,0 +1,59 @@
+"""
+Backfill de snapshots: lotes diferentes com o mesmo caminho relativo nao
+substituem as execucoes um do outro; a reextracao de um lote so troca as dele.
+"""
+
+import sqlite3
+
+import pytest
+
+from backfill import executar_backfill
+from database import caminho_historico, descartar_engine
+from sinteticos import gerar_html_chart
+
+N_FILMES = 20
+
+
+@pytest.fixture
+def arquivos(tmp_path):
+    # Dois arquivos com o mesmo caminho relativo (2023/top.html), com paginas diferentes
+    diretorios = {}
+    for lote, semente in (("arquivo_a", 1), ("arquivo_b", 2)):
+        pasta = tmp_path / lote / "2023"
+        pasta.mkdir(parents=True)
+        (pasta / "top.html").write_text(gerar_html_chart(N_FILMES, semente=semente), encoding="utf-8")
+        diretorios[lote] = str(tmp_path / lote)
+    db_path = str(tmp_path / "imdb.db")
+    yield diretorios, db_path
+    descartar_engine(db_path)
+    descartar_engine(caminho_historico(db_path))
+
+
+def _contagens(db_path):
+    with sqlite3.connect(caminho_historico(db_path)) as conn:
+        execucoes = conn.execute("SELECT fonte, total_itens FROM scrape_runs ORDER BY fonte").fetchall()
+        snapshots = conn.execute("SELECT COUNT(*) FROM rating_snapshots").fetchone()[0]
+    return execucoes, snapshots
+
+
+def test_lotes_com_mesmo_caminho_relativo(arquivos):
+    diretorios, db_path = arquivos
+    for lote, diretorio in diretorios.items():
+        resultado = executar_backfill(diretorio, db_path, lote=lote, workers=1, n_filmes=N_FILMES)
+        assert resultado['processados'] == 1
+
+    execucoes, snapshots = _contagens(db_path)
+    assert execucoes == [("arquivo_a:2023/top.html", N_FILMES), ("arquivo_b:2023/top.html", N_FILMES)]
+    assert snapshots == 2 * N_FILMES
+
+
+def test_reextracao_substitui_so_o_proprio_lote(arquivos):
+    diretorios, db_path = arquivos
+    for lote, diretorio in diretorios.items():
+        executar_backfill(diretorio, db_path, lote=lote, workers=1, n_filmes=N_FILMES)
+    executar_backfill(diretorios["arquivo_a"], db_path, lote="arquivo_a", workers=1,
+                      n_filmes=N_FILMES, reiniciar=True)
+
+    execucoes, snapshots = _contagens(db_path)
+    assert [fonte for fonte, _ in execucoes] == ["arquivo_a:2023/top.html", "arquivo_b:2023/top.html"]
+    assert snapshots == 2 * N_FILMES
@@ -0,0 +1,52 @@
+"""
+classificar_nota (um valor) e categorizar_notas (vetorizada) devem dar a mesma categoria
+para qualquer nota, inclusive nas bordas dos limiares, com NaN/None, com limiares fora de ordem
+e com notas minimas empatadas; a ordem das categorias e a de _ordem_categorias.
+"""
+
+import math
+
+import pandas as pd
+import pytest
+
+from analysis import _ordem_categorias, categorizar_notas, classificar_nota
+from database import LIMIARES_NOTA, ROTULO_ABAIXO, SEM_CLASSIFICACAO
+
+LIMIARES_FORA_DE_ORDEM = ((7.0, "Bom"), (9.0, "Obra-prima"), (8.0, "Excelente"))
+# Mesma nota minima em dois rotulos: vale o primeiro listado, e o desempate nao e alfabetico
+LIMIARES_EMPATADOS = ((9.0, "Obra-prima"), (8.0, "Otimo"), (8.0, "Excelente"), (7.0, "Bom"))
+
+
+def _notas_de_borda(limiares):
+    notas = [0.0, 10.0, None, float('nan')]
+    for minimo, _ in limiares:
+        notas += [minimo, math.nextafter(minimo, -math.inf), math.nextafter(minimo, math.inf),
+                  round(minimo - 0.1, 1), round(minimo + 0.1, 1)]
+    return notas
+
+
+@pytest.mark.parametrize("limiares", [LIMIARES_NOTA, LIMIARES_FORA_DE_ORDEM, tuple(reversed(LIMIARES_NOTA)),
+                                      LIMIARES_EMPATADOS])
+def test_escalar_e_vetorizada_concordam(limiares):
+    notas = _notas_de_borda(limiares)
+
+    vetorizada = categorizar_notas(pd.Series(notas, dtype='float64'), limiares)
+
+    assert list(vetorizada.astype(str)) == [classificar_nota(nota, limiares) for nota in notas]
+    assert list(vetorizada.cat.categories) == _ordem_categorias(limiares)
+
+
+def test_empate_fica_com_o_primeiro_rotulo():
+    assert classificar_nota(8.5, LIMIARES_EMPATADOS) == "Otimo"
+    assert _ordem_categorias(LIMIARES_EMPATADOS) == [SEM_CLASSIFICACAO, ROTULO_ABAIXO, "Bom", "Otimo",
+                                                     "Excelente", "Obra-prima"]
+
+
+@pytest.mark.parametrize("limiares", [LIMIARES_NOTA, LIMIARES_FORA_DE_ORDEM])
+@pytest.mark.parametrize("nota, esperado", [
+    (9.0, "Obra-prima"), (8.99, "Excelente"), (8.0, "Excelente"), (7.0, "Bom"),
+    (6.99, ROTULO_ABAIXO), (None, SEM_CLASSIFICACAO), (float('nan'), SEM_CLASSIFICACAO),
+])
+def test_bordas_independem_da_ordem_dos_limiares(limiares, nota, esperado):
+    assert classificar_nota(nota, limiares) == esperado
+    assert categorizar_notas(pd.Series([nota], dtype='float64'), limiares).astype(str).iloc[0] == esperado
@@ -0,0 +1,112 @@
+"""
+Crawler contra o servidor local de servir_fixtures: downloads concorrentes,
+repeticao apos 503 e limite de requisicoes por host.
+"""
+
+import threading
+import time
+
+import pytest
+import requests
+
+from crawler import ChartCrawler, _HandlerSilencioso, servir_fixtures
+
+CONTEUDO = "<html><body>pagina de teste</body></html>"
+
+
+@pytest.fixture
+def diretorio(tmp_path):
+    (tmp_path / "pagina.html").write_text(CONTEUDO, encoding="utf-8")
+    return str(tmp_path)
+
+
+def _handler_registrando(atraso: float = 0.0, falhas_por_caminho: int = 0):
+    # Cada teste recebe uma subclasse propria, com o registro das requisicoes como atributos de classe
+    class Handler(_HandlerSilencioso):
+        lock = threading.Lock()
+        chegadas = []
+        ativas = 0
+        max_ativas = 0
+        falhas = {}
+
+        def do_GET(self):
+            cls = type(self)
+            with cls.lock:
+                cls.chegadas.append(time.monotonic())
+                cls.ativas += 1
+                cls.max_ativas = max(cls.max_ativas, cls.ativas)
+                falhar = cls.falhas.get(self.path, 0) < falhas_por_caminho
+                if falhar:
+                    cls.falhas[self.path] = cls.falhas.get(self.path, 0) + 1
+            try:
+                time.sleep(atraso)
+                if falhar:
+                    self.send_response(503)
+                    self.send_header("Retry-After", "0")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                super().do_GET()
+            finally:
+                with cls.lock:
+                    cls.ativas -= 1
+
+    return Handler
+
+
+def test_baixar_varios_em_paralelo(diretorio):
+    handler = _handler_registrando(atraso=0.3)
+    n_paginas = 4
+    with servir_fixtures(diretorio, handler_cls=handler) as base_url:
+        urls = {f"copia_{i}": f"{base_url}/pagina.html?c={i}" for i in range(n_paginas)}
+        with ChartCrawler(max_workers=4, requisicoes_por_segundo=0) as crawler:
+            inicio = time.perf_counter()
+            htmls = crawler.baixar_varios(urls)
+            duracao = time.perf_counter() - inicio
+
+    assert htmls == {nome: CONTEUDO for nome in urls}
+    assert handler.max_ativas > 1
+    # Em serie seriam 4 x 0.3s
+    assert duracao < n_paginas * 0.3 * 0.75
+
+
+def test_repete_apos_503_e_devolve_a_pagina(diretorio):
+    handler = _handler_registrando(falhas_por_caminho=1)
+    with servir_fixtures(diretorio, handler_cls=handler) as base_url:
+        with ChartCrawler(requisicoes_por_segundo=0, tentativas=3, backoff=0.01) as crawler:
+            html = crawler.baixar(f"{base_url}/pagina.html")
+
+    assert html == CONTEUDO
+    assert len(handler.chegadas) == 2
+
+
+def test_503_sem_tentativas_restantes_levanta_http_error(diretorio):
+    handler = _handler_registrando(falhas_por_caminho=5)
+    with servir_fixtures(diretorio, handler_cls=handler) as base_url:
+        with ChartCrawler(requisicoes_por_segundo=0, tentativas=2, backoff=0.01) as crawler:
+            with pytest.raises(requests.HTTPError):
+                crawler.baixar(f"{base_url}/pagina.html")
+
+    assert len(handler.chegadas) == 2
+
+
+def test_limite_de_requisicoes_por_host(diretorio):
+    handler = _handler_registrando()
+    taxa = 10.0
+    with servir_fixtures(diretorio, handler_cls=handler) as base_url:
+        urls = {f"copia_{i}": f"{base_url}/pagina.html?c={i}" for i in range(5)}
+        with ChartCrawler(max_workers=4, requisicoes_por_segundo=taxa) as crawler:
+            htmls = crawler.baixar_varios(urls)
+
+    assert all(html == CONTEUDO for html in htmls.values())
+    chegadas = sorted(handler.chegadas)
+    intervalos = [b - a for a, b in zip(chegadas, chegadas[1:])]
+    # Quatro workers, mas o mesmo host: uma requisicao a cada 1/taxa segundos (com folga de relogio)
+    assert min(intervalos) >= 0.8 / taxa
+    assert chegadas[-1] - chegadas[0] >= 4 * 0.8 / taxa
+
+
+@pytest.mark.parametrize("tentativas", [0, -1])
+def test_tentativas_invalidas(tentativas):
+    with pytest.raises(ValueError):
+        ChartCrawler(tentativas=tentativas)